@@ -0,0 +1,86 @@
+import logging
+import os
+import sys
+
+from a2a.server.apps import A2AStarletteApplication
+from a2a.types import (
+    AgentCapabilities,
+    AgentCard,
+    AgentSkill,
+)
+from dotenv import load_dotenv
+
+# host.agent puts the repo root on sys.path, so it must be imported before utils.
+from .agent import host_agent
+from .agent_executor import HostAgentExecutor
+from utils.prefork import serve
+from utils.push_delivery import QueuedPushNotifier
+from utils.request_handler import NonBlockingRequestHandler
+from utils.metrics import instrument
+from utils.structured_log import configure_logging
+from utils.task_store import TieredTaskStore
+from utils.tracing import configure as configure_tracing
+
+load_dotenv()
+
+# Logs go through a queue to a background writer; LOG_LEVEL / LOG_FORMAT tune them.
+configure_logging("host")
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Starts the Host Agent as an A2A server."""
+    configure_tracing("host")
+    host = os.getenv("HOST_AGENT_HOST", "localhost")
+    port = int(os.getenv("HOST_AGENT_PORT", "10001"))
+    try:
+        if host_agent is None:
+            raise RuntimeError("HostAgent could not be initialized.")
+
+        capabilities = AgentCapabilities(streaming=True, pushNotifications=True)
+        skill = AgentSkill(
+            id="schedule_pickleball_game",
+            name="Pickleball Game Scheduler",
+            description="Asks friend agents for their availability, finds common times and books a pickleball court.",
+            tags=["scheduling", "pickleball", "orchestration"],
+            examples=["Schedule a pickleball game with my friends this weekend."],
+        )
+        agent_card = AgentCard(
+            name="Host Agent",
+            description="Orchestrates scheduling pickleball with friends.",
+            url=f"http://{host}:{port}/",
+            version="1.0.0",
+            defaultInputModes=["text/plain"],
+            defaultOutputModes=["text/plain"],
+            capabilities=capabilities,
+            skills=[skill],
+        )
+
+        agent_executor = HostAgentExecutor(host_agent)
+        task_store = TieredTaskStore.from_env("host")
+        push_notifier = QueuedPushNotifier.from_env()
+        request_handler = NonBlockingRequestHandler(
+            agent_executor=agent_executor,
+            task_store=task_store,
+            push_notifier=push_notifier,
+        )
+        server = A2AStarletteApplication(
+            agent_card=agent_card, http_handler=request_handler
+        )
+        app = instrument(
+            server.build(),
+            in_flight_tasks=agent_executor.in_flight,
+            task_store=task_store,
+            push_notifier=push_notifier,
+            session_count=host_agent.session_service.session_count,
+        )
+
+        # One process: the host's sessions, court bookings and push receiver live in memory.
+        serve(app, host=host, port=port, workers=1)
+    except Exception as e:
+        logger.error(f"An error occurred during server startup: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
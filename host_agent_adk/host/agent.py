@@ -1,8 +1,11 @@
 import asyncio
 import json
+import logging
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar, Token
 from pathlib import Path
 import uuid
-import os
 from datetime import datetime
 from typing import Any, AsyncIterable, List, Optional
 import requests
@@ -10,7 +13,7 @@ import requests
 from .config_loader import load_nft_config
 import httpx
 import nest_asyncio
-from a2a.client import A2ACardResolver
+from a2a.client import A2ACardResolver, A2AClientHTTPError
 from a2a.types import (
     AgentCard,
     MessageSendParams,
@@ -25,11 +28,12 @@ from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.artifacts import InMemoryArtifactService
 from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.adk.tools.tool_context import ToolContext
 from google.genai import types
-from host.create_nft_api import APIError, mint_deploy_and_sign
+from host.create_nft_api import APIError as NftAPIError
 from host.execute_nft import execute_and_sign, APIError  
+from host.nft_pipeline import MintSpec, nft_pipeline
+from host.nft_token_store import DEFAULT_STREAM, NftTokenStore
 from host.verify_sign import verify_signature
 
 import sys
@@ -40,11 +44,21 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from utils.node_client import NodeClient 
+from utils.deadline import Deadline, deadline_metadata
+from utils.session_service import BoundedSessionService
+from utils.structured_log import log_event
+from utils.tracing import Span, reset_current_span, reset_var, set_current_span, span, trace_metadata, tracer
 
 from .pickleball_tools import (
     book_pickleball_court,
     list_court_availabilities,
 )
+from .audit_store import COMPACT_RESULTS, AuditStore
+from .context_compaction import compact_history, record_prompt_size
+from .friend_health import FriendHealthMonitor
+from .friend_index import PROMPT_ALL_FRIENDS, PROMPT_TOP_K, FriendIndex
+from .latency import HEDGE_ENABLED, ROUND_DEADLINE
+from .push_receiver import PUSH_ENABLED, PushCallbackReceiver
 from .remote_agent_connection import RemoteAgentConnections
 
 load_dotenv()
@@ -70,62 +84,124 @@ print("✅ Host Agent Using base URL:", DEFAULT_BASE_URL)
 
 print("✅ Using DID:", DEFAULT_NFT_DID)
 
+logger = logging.getLogger(__name__)
+
+# Fraction of the remaining budget handed to a friend; the rest covers the trip back.
+DEADLINE_SHARE = 0.9
+# Session state key listing the friends already contacted in a conversation.
+FRIENDS_IN_PLAY_KEY = "friends_in_play"
+
+# Open spans for model and tool calls, keyed by invocation / function call id, with
+# the context token of tool spans (which are current while the tool runs). `stream`
+# gives each run its own table and ends what is left in it; runs started elsewhere
+# (adk web) share _open_spans, which is capped at MAX_OPEN_SPANS.
+MAX_OPEN_SPANS = 1024
+_open_spans: "OrderedDict[str, tuple[Span, Optional[Token]]]" = OrderedDict()
+_run_spans: ContextVar[Optional["OrderedDict[str, tuple[Span, Optional[Token]]]"]] = ContextVar(
+    "host_run_spans", default=None
+)
+
+
+def _mint_spec(cfg: dict[str, Any]) -> MintSpec:
+    return MintSpec(
+        did=cfg.get("did") or DEFAULT_NFT_DID,
+        metadata_path=cfg["metadata_path"],
+        artifact_path=cfg["artifact_path"],
+        password=cfg["password"],
+        nft_data=cfg["data"],
+        nft_value=int(cfg["value"]),
+        quorum_type=int(cfg["quorum_type"]),
+        base_url=DEFAULT_BASE_URL,
+        timeout=float(cfg["timeout"]),
+    )
+
+
+def _spans() -> "OrderedDict[str, tuple[Span, Optional[Token]]]":
+    spans = _run_spans.get()
+    return _open_spans if spans is None else spans
+
+
+def _track_span(key: str, new_span: Span, token: Optional[Token] = None) -> None:
+    spans = _spans()
+    spans[key] = (new_span, token)
+    while len(spans) > MAX_OPEN_SPANS:
+        _, (stale, _) = spans.popitem(last=False)
+        stale.status = stale.status or "span was never ended"
+        stale.end()
+
+
+def _end_leftover_spans(spans: "OrderedDict[str, tuple[Span, Optional[Token]]]", status: str) -> None:
+    """Ends spans whose after-callback never ran, e.g. because the model or a tool raised."""
+    for leftover, _ in spans.values():
+        leftover.status = leftover.status or status
+        leftover.end()
+    spans.clear()
+
+
+def _start_llm_span(callback_context, llm_request):
+    _track_span(callback_context.invocation_id, tracer.start_span("host.llm_call", model=llm_request.model))
+
+
+def _end_llm_span(callback_context, llm_response):
+    llm_span, _ = _spans().pop(callback_context.invocation_id, (None, None))
+    if llm_span is not None:
+        if llm_response.error_code:
+            llm_span.status = f"{llm_response.error_code}: {llm_response.error_message}"
+        llm_span.end()
+
+
+def _start_tool_span(tool, args, tool_context):
+    # Current while the tool runs, so a2a.send and friends' spans nest under it.
+    tool_span = tracer.start_span(f"tool.{tool.name}")
+    _track_span(tool_context.function_call_id, tool_span, set_current_span(tool_span))
+
+
+def _end_tool_span(tool, args, tool_context, tool_response):
+    tool_span, token = _spans().pop(tool_context.function_call_id, (None, None))
+    if tool_span is not None:
+        if token is not None:
+            reset_current_span(token)
+        tool_span.end()
+
 class HostAgent:
     """The Host agent."""
 
     def __init__(self):
         self.remote_agent_connections: dict[str, RemoteAgentConnections] = {}
         self.cards: dict[str, AgentCard] = {}
+        self.index = FriendIndex()
+        # _connect_late runs on the health monitor's probe thread.
+        self._friends_lock = threading.Lock()
         self.agents: str = ""
+        self.health = FriendHealthMonitor(on_card=self._connect_late)
+        self.push_receiver: Optional[PushCallbackReceiver] = None
+        self.audit = AuditStore()
         self._agent = self.create_agent()
 
-        current_dir = os.path.dirname(__file__)
-        file_path = os.path.join(current_dir, "token.txt")
-
-        with open(file_path, "r", encoding="utf-8") as f:
-            token = f.read().strip() 
-
-        self.nft_token = token
-
-        if token:  
-            self.nft_token = token
-            print("⚠️ Using Written NFT:", self.nft_token)
-        else:  
-            try:
-                print("DIDDDDDDD...", DEFAULT_NFT_DID)
-                result = mint_deploy_and_sign(
-                    metadata_path=DEFAULT_METADATA_PATH,
-                    artifact_path=DEFAULT_ARTIFACT_PATH,
-                    password=DEFAULT_NFT_PASSWORD,
-                    did=DEFAULT_NFT_DID,
-                    base_url=DEFAULT_BASE_URL,
-                    timeout=DEFAULT_TIMEOUT,
-                    nft_data=DEFAULT_NFT_DATA,
-                    nft_value=DEFAULT_NFT_VALUE,
-                    quorum_type=DEFAULT_QUORUM_TYPE,
-                )
-                print("🚀 Startup mint result:", result)
-                self.nft_token = result["nft_token"]
-                print("🚀 NFT ID:", self.nft_token)
-
-                
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write(self.nft_token)
-
-            except Exception as e:
-                print("⚠️ Error while creating NFT:", e)
+        # Audit NFTs are minted in the background; audit writes wait for them.
+        self.tokens = NftTokenStore(nft_pipeline)
+        self.tokens.register(DEFAULT_STREAM, _mint_spec(nft_cfg))
+        for stream, overrides in nft_cfg["streams"].items():
+            self.tokens.register(stream, _mint_spec({**nft_cfg, **overrides}))
+        self.tokens.import_legacy_token()
+        self.tokens.start()
 
         self._user_id = "host_agent"
         self.last_parts: List[dict] = []
+        self.session_service = BoundedSessionService.from_env()
         self._runner = Runner(
             app_name=self._agent.name,
             agent=self._agent,
             artifact_service=InMemoryArtifactService(),
-            session_service=InMemorySessionService(),
+            session_service=self.session_service,
             memory_service=InMemoryMemoryService(),
         )
 
     async def _async_init_components(self, remote_agent_addresses: List[str]):
+        if PUSH_ENABLED:
+            receiver = PushCallbackReceiver()
+            if await asyncio.to_thread(receiver.start):
+                self.push_receiver = receiver
         async with httpx.AsyncClient(timeout=30) as client:
             for address in remote_agent_addresses:
                 card_resolver = A2ACardResolver(client, address)
@@ -134,17 +210,60 @@ class HostAgent:
                     remote_connection = RemoteAgentConnections(
                         agent_card=card, agent_url=address
                     )
-                    self.remote_agent_connections[card.name] = remote_connection
-                    self.cards[card.name] = card
+                    remote_connection.push_receiver = self.push_receiver
+                    with self._friends_lock:
+                        self.remote_agent_connections[card.name] = remote_connection
+                        self.cards[card.name] = card
+                    self.index.add(card)
+                    self.health.watch(address, card.name)
                 except httpx.ConnectError as e:
-                    print(f"ERROR: Failed to get agent card from {address}: {e}")
+                    logger.error(f"Failed to get agent card from {address}: {e}")
+                    self.health.watch(address)
                 except Exception as e:
-                    print(f"ERROR: Failed to initialize connection for {address}: {e}")
+                    logger.error(f"Failed to initialize connection for {address}: {e}")
+                    self.health.watch(address)
+
+        self.health.start()
+        self.agents = self._available_agents()
+        logger.info(f"agent_info: {self.agents}")
+
+    def _connect_late(self, address: str, card_json: dict) -> None:
+        """Called by the health monitor when a friend that was down at startup comes up."""
+        card = AgentCard.model_validate(card_json)
+        remote_connection = RemoteAgentConnections(agent_card=card, agent_url=address)
+        remote_connection.push_receiver = self.push_receiver
+        with self._friends_lock:
+            self.remote_agent_connections[card.name] = remote_connection
+            self.cards[card.name] = card
+        self.index.add(card)
+        self.health.watch(address, card.name)
+        logger.info(f"Friend {card.name} is now reachable at {address}")
+
+    def _available_agents(self, query: str = "", in_play: tuple[str, ...] = ()) -> str:
+        """
+        The <Available Agents> block: only friends whose circuit is not open.
 
-        agent_info = [json.dumps({"name": card.name, "description": card.description})
-                      for card in self.cards.values()]
-        print("agent_info:", agent_info)
-        self.agents = "\n".join(agent_info) if agent_info else "No friends found"
+        With up to HOST_PROMPT_ALL_FRIENDS friends every one is listed. Past
+        that, only friends named in `query`, friends already contacted in the
+        conversation (`in_play`) and the HOST_PROMPT_TOP_K best index matches
+        for `query` are listed, so the prompt stays the same size however many
+        friends are registered; `find_friends` looks up the rest.
+        """
+        with self._friends_lock:
+            cards = dict(self.cards)
+        if len(cards) <= PROMPT_ALL_FRIENDS:
+            names = list(cards)
+            hidden = 0
+        else:
+            names = list(dict.fromkeys([*self.index.named(query), *in_play]))
+            names += self.index.search(query, limit=PROMPT_TOP_K, exclude=set(names))
+            hidden = len(cards) - len(names)
+        agent_info = [json.dumps({"name": name, "description": cards[name].description})
+                      for name in names
+                      if name in cards and self.health.is_available(name)]
+        if hidden > 0:
+            agent_info.append(f"({hidden} more friends are registered; use `find_friends` to look them up.)")
+        return "\n".join(agent_info) if agent_info else "No friends found"
 
     @classmethod
     async def create(cls, remote_agent_addresses: List[str]):
@@ -159,8 +278,15 @@ class HostAgent:
             name="Host_Agent",
             instruction=self.root_instruction,
             description="This Host agent orchestrates scheduling pickleball with friends.",
+            before_model_callback=[_start_llm_span, compact_history],
+            after_model_callback=[_end_llm_span, record_prompt_size],
+            before_tool_callback=_start_tool_span,
+            after_tool_callback=_end_tool_span,
             tools=[
                 self.send_message,
+                self.ask_friends,
+                self.find_friends,
+                self.get_audit_record,
                 book_pickleball_court,
                 list_court_availabilities,
                 self.nft_full_flow_tool,
@@ -170,6 +296,9 @@ class HostAgent:
     
 
     def root_instruction(self, context: ReadonlyContext) -> str:
+        user_content = context.user_content
+        query = "".join(p.text for p in user_content.parts or [] if p.text) if user_content else ""
+        in_play = tuple(context.state.get(FRIENDS_IN_PLAY_KEY, ()))
         return f"""
         **Role:** You are the Host Agent, an expert scheduler for pickleball games. Your primary function is to coordinate with friend agents to find a suitable time to play and then book a court.
 
@@ -179,6 +308,9 @@ class HostAgent:
         *   **Task Delegation:** Use the `send_message` tool to ask each friend for their availability.
             *   Frame your request clearly (e.g., "Are you available for pickleball between 2024-08-01 and 2024-08-03?").
             *   Make sure you pass in the official name of the friend agent for each message request.
+            *   If a friend the user mentions is not listed below, use `find_friends` with their name or what they do to get their official name.
+            *   To ask several friends the same question, prefer `ask_friends` with the friends' official names and `min_responses` set to how many answers you need (e.g. 2 of 3 to start planning). Friends listed as "pending" did not answer in time; mention them to the user instead of retrying right away.
+        *   **Audit Detail:** Friend results carry an `audit_ref` instead of signatures and NFT execution details. Only call `get_audit_record` with it when the user asks for proof, signatures or the audit trail.
         *   **Analyze Responses:** Once you have availability from all friends, analyze the responses to find common timeslots.
         *   **Respond to User:** After finding common timeslots, respond back to the user about the timeslots and understand the resutn message from the send_meaage tool and combine and give the response, make sure the add the trust for the gaent reponses. And say for example if the trust issue is bad then you just have to respond with the message no need to ask further questionas to user. Leave the rest to the user
         *   **Check Court Availability:** Before proposing times to the user, use the `list_court_availabilities` tool to ensure the court is also free at the common timeslots.
@@ -193,7 +325,7 @@ class HostAgent:
         **Today's Date (YYYY-MM-DD):** {datetime.now().strftime("%Y-%m-%d")}
 
         <Available Agents>
-        {self.agents}
+        {self._available_agents(query, in_play)}
         </Available Agents>
         """
 
@@ -211,54 +343,218 @@ class HostAgent:
                 state={},
                 session_id=session_id,
             )
-        async for event in self._runner.run_async(
-            user_id=self._user_id, session_id=session.id, new_message=content
-        ):
-            if event.is_final_response():
-                response = "".join(
-                    [p.text for p in event.content.parts if p.text]
-                )
-                yield {"is_task_complete": True, "content": response}
-            else:
-                yield {"is_task_complete": False, "updates": "The host agent is thinking..."}
+        run_spans: OrderedDict[str, tuple[Span, Optional[Token]]] = OrderedDict()
+        spans_token = _run_spans.set(run_spans)
+        status = "run ended before the span did"
+        try:
+            with span("host.adk_run", session_id=session.id):
+                async for event in self._runner.run_async(
+                    user_id=self._user_id, session_id=session.id, new_message=content
+                ):
+                    if event.is_final_response():
+                        response = "".join(
+                            [p.text for p in event.content.parts if p.text]
+                        )
+                        yield {"is_task_complete": True, "content": response}
+                    else:
+                        yield {"is_task_complete": False, "updates": "The host agent is thinking..."}
+        except BaseException as e:
+            status = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _end_leftover_spans(run_spans, status)
+            reset_var(_run_spans, spans_token)
 
     async def send_message(
         self, agent_name: str, task: str, tool_context: ToolContext
     ) -> dict:
+        result, ui_msg = await self._ask_friend(agent_name, task, tool_context, Deadline(ROUND_DEADLINE))
+        if COMPACT_RESULTS:
+            return self._compact(agent_name, result, ui_msg)
+        # Same shape as a friend's entry in ask_friends.
+        return {"result": result, "status": ui_msg}
+
+    def get_audit_record(self, audit_ref: str, tool_context: ToolContext) -> dict:
+        """
+        Returns the full verification and NFT audit detail behind a friend
+        result's `audit_ref`: the verified envelopes with their signatures,
+        trust issues and the NFT execution that audited the exchange.
+        """
+        record = self.audit.get(audit_ref)
+        if record is None:
+            return {"error": f"No audit record {audit_ref} (it may have expired)"}
+        return record
+
+    def _compact(self, agent_name: str, result: dict, ui_msg: str) -> dict:
+        """
+        What the model needs from a friend exchange; the rest goes to the
+        audit store, so it is not replayed to the model on every later turn.
+        """
+        messages = result.get("messages") or []
+        compact = {
+            "friend": agent_name,
+            "verified": bool(messages) and not result.get("error"),
+            "response": "\n".join(str(m["response"]) for m in messages) or None,
+            "status": ui_msg,
+            "audit_ref": self.audit.put({"friend": agent_name, "status": ui_msg, **result}),
+        }
+        if result.get("trust_issues"):
+            compact["trust_issues"] = result["trust_issues"]
+        if result.get("error"):
+            compact["error"] = result["error"]
+        return compact
+
+    def find_friends(self, query: str, limit: int, tool_context: ToolContext) -> dict:
+        """
+        Looks up friend agents by name, skill or what they do (e.g. "Karley",
+        "pickleball", "calendar"). Returns up to `limit` matches with their
+        official names, descriptions and skills, best match first.
+        """
+        limit = min(max(limit, 1), 20)
+        names = self.index.named(query)
+        names += self.index.search(query, limit=limit, exclude=set(names))
+        return {
+            "friends": [
+                {**self.index.describe(name), "available": self.health.is_available(name)}
+                for name in names[:limit]
+            ],
+            "registered": len(self.index),
+        }
+
+    async def ask_friends(
+        self,
+        agent_names: list[str],
+        task: str,
+        min_responses: int,
+        tool_context: ToolContext,
+    ) -> dict:
+        """
+        Sends the same message to several friends at once and returns as soon
+        as `min_responses` of them have answered with a verified response (or
+        when the round deadline passes). Friends that have not answered by
+        then are cancelled and listed under "pending".
+        """
+        deadline = Deadline(ROUND_DEADLINE)
+        needed = min(max(min_responses, 1), len(agent_names)) if agent_names else 0
+        running = {
+            asyncio.ensure_future(self._ask_friend(name, task, tool_context, deadline)): name
+            for name in agent_names
+        }
+        answered: dict[str, Any] = {}
+        failed: dict[str, Any] = {}
+        try:
+            while running and len(answered) < needed and not deadline.expired():
+                done, _ = await asyncio.wait(
+                    running, timeout=deadline.remaining(), return_when=asyncio.FIRST_COMPLETED
+                )
+                for fut in done:
+                    name = running.pop(fut)
+                    if fut.exception() is not None:
+                        failed[name] = {"error": str(fut.exception())}
+                        continue
+                    result, ui_msg = fut.result()
+                    outcome = (
+                        self._compact(name, result, ui_msg) if COMPACT_RESULTS
+                        else {"result": result, "status": ui_msg}
+                    )
+                    if result.get("messages") and not result.get("error"):
+                        answered[name] = outcome
+                    else:
+                        failed[name] = outcome
+        finally:
+            for fut in running:
+                fut.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return {
+            "answered": answered,
+            "failed": failed,
+            "pending": sorted(running.values()),
+            "quorum_met": len(answered) >= needed,
+            "partial": bool(running) or bool(failed),
+        }
+
+    async def _ask_friend(
+        self, agent_name: str, task: str, tool_context: ToolContext, deadline: Deadline
+    ) -> tuple[dict, str]:
         # Validate agent
         if agent_name not in self.remote_agent_connections:
             raise ValueError(f"Agent {agent_name} not found")
         client = self.remote_agent_connections[agent_name]
+        in_play = tool_context.state.get(FRIENDS_IN_PLAY_KEY, [])
+        if agent_name not in in_play:
+            tool_context.state[FRIENDS_IN_PLAY_KEY] = [*in_play, agent_name]
+        breaker = self.health.breaker(agent_name)
+        if not breaker.allow_request():
+            error_msg = f"{agent_name} is currently unavailable ({breaker.last_error}); try again later"
+            return {"messages": [], "nft_execution": None, "trust_issues": None, "error": error_msg}, error_msg
 
         # Prepare message metadata
         state = tool_context.state
-        task_id = state.get("task_id", str(uuid.uuid4()))
         context_id = state.get("context_id", str(uuid.uuid4()))
-        message_id = str(uuid.uuid4())
-
-        payload = {
-            "message": {
-                "role": "user",
-                "parts": [{"type": "text", "text": task}],
-                "messageId": message_id,
-                "taskId": task_id,
-                "contextId": context_id,
+        budget = min(deadline.remaining(), client.latency.timeout())
+        sent: list[dict] = []
+
+        def make_request(remaining: float) -> SendMessageRequest:
+            message_id = str(uuid.uuid4())
+            # A hedged copy is a separate task on the friend, so it needs its own id.
+            task_id = state.get("task_id") if not sent else None
+            payload = {
+                "message": {
+                    "role": "user",
+                    "parts": [{"type": "text", "text": task}],
+                    "messageId": message_id,
+                    "taskId": task_id or str(uuid.uuid4()),
+                    "contextId": context_id,
+                    # Leave the friend time to get its answer back to us.
+                    "metadata": {**deadline_metadata(remaining * DEADLINE_SHARE), **trace_metadata()},
+                }
             }
-        }
-        request = SendMessageRequest(
-            id=message_id,
-            params=MessageSendParams.model_validate(payload)
-        )
+            sent.append(payload)
+            return SendMessageRequest(
+                id=message_id,
+                params=MessageSendParams.model_validate(payload)
+            )
 
-        # Send to remote agent
-        send_response: SendMessageResponse = await client.send_message(request)
-        send_ok = (
-            isinstance(send_response.root, SendMessageSuccessResponse)
-            and isinstance(send_response.root.result, Task)
+        # Send to remote agent; abandoned attempts are cancelled on the friend.
+        settled = False
+        try:
+            try:
+                with span("a2a.send", friend=agent_name, budget=round(budget, 1)):
+                    send_response: Optional[SendMessageResponse] = await client.send_with_deadline(
+                        make_request, budget, hedge=HEDGE_ENABLED
+                    )
+            except (httpx.HTTPError, A2AClientHTTPError) as e:
+                breaker.record_failure(str(e))
+                settled = True
+                error_msg = f"Could not reach {agent_name}: {e}"
+                return {"messages": [], "nft_execution": None, "trust_issues": None, "error": error_msg}, error_msg
+            error_msg = None
+            if send_response is None:
+                send_ok = False
+                error_msg = f"{agent_name} did not answer within {budget:.0f}s"
+                breaker.record_failure(error_msg)
+            else:
+                send_ok = (
+                    isinstance(send_response.root, SendMessageSuccessResponse)
+                    and isinstance(send_response.root.result, Task)
+                )
+                if not send_ok:
+                    error_msg = "Failed to send message"
+                    breaker.record_failure(error_msg)
+                else:
+                    breaker.record_success()
+            settled = True
+        finally:
+            if not settled:
+                # Abandoned by the caller (e.g. quorum reached) or failed in our own code;
+                # either way it says nothing about the friend, but a half-open trial must end.
+                breaker.release()
+        payload = next(
+            (p for p in sent if send_ok and p["message"]["taskId"] == send_response.root.result.id),
+            sent[0],
         )
-        error_msg = None
-        if not send_ok:
-            error_msg = "Failed to send message"
 
         # Extract response parts
         resp_parts: list[dict] = []
@@ -306,13 +602,14 @@ class HostAgent:
         else:   
             payload["verification_message"] = "verified"
         metadata = json.dumps(payload, sort_keys=True)
-        print("metadata", metadata)
-        print("NFT to be executed to: ", self.nft_token)
         try:
+            # A friend with its own configured stream is audited to its own NFT.
+            nft_token = await self.tokens.token(agent_name)
+            log_event(logger, logging.DEBUG, "audit metadata", friend=agent_name, nft=nft_token, metadata=metadata)
             nft_out = await asyncio.to_thread(
                 execute_and_sign,
                 f"Auto-signing structured data after messaging {agent_name}",
-                self.nft_token,
+                nft_token,
                 DEFAULT_NFT_PASSWORD,
                 self._user_id,
                 metadata,
@@ -339,7 +636,8 @@ class HostAgent:
             ui_msg = error_msg
         else:
             ui_msg = "All messages verified successfully"
-        print(f"UI: {ui_msg}")
+        log_event(logger, logging.INFO, "friend exchange", friend=agent_name, verified=bool(verified),
+                  status=ui_msg, nft_status=nft_execution["status"])
 
         result = {
             "messages":      verified,
@@ -398,28 +696,8 @@ class HostAgent:
         tool_context: ToolContext = None,
     ) -> dict:
         """Mints an NFT, stages on-chain deployment, and signs the transaction without prompting."""
-        
-        did = DEFAULT_NFT_DID
-        metadata_path = DEFAULT_METADATA_PATH
-        artifact_path = DEFAULT_ARTIFACT_PATH
-        nft_data = DEFAULT_NFT_DATA
-        nft_value = DEFAULT_NFT_VALUE
-        quorum_type = DEFAULT_QUORUM_TYPE
-        password = DEFAULT_NFT_PASSWORD
-        timeout = DEFAULT_TIMEOUT
-
         try:
-            out = mint_deploy_and_sign(
-                metadata_path=metadata_path,
-                artifact_path=artifact_path,
-                password=password,
-                did=did,
-                base_url=None,
-                timeout=timeout,
-                nft_data=nft_data,
-                nft_value=DEFAULT_NFT_VALUE,
-                quorum_type=quorum_type,
-            )
+            out = await nft_pipeline.mint(_mint_spec(nft_cfg))
             return {
                 "status": "success",
                 "message": (
@@ -429,18 +707,18 @@ class HostAgent:
                 "token": out["nft_token"],
                 "signature": out["signature"],
             }
-        except APIError as e:
+        # Node errors and stage timeouts (NftAPIError), and unreadable metadata or artifact files.
+        except (NftAPIError, OSError, ValueError) as e:
             return {"status": "error", "message": str(e)}
 
-def _get_initialized_host_agent_sync():
+def _get_initialized_host_agent_sync() -> Optional[HostAgent]:
     async def _async_main():
         friend_agent_urls = [
             "http://localhost:10002",
             "http://localhost:10003",
             "http://localhost:10004",
         ]
-        hosting_agent_instance = await HostAgent.create(remote_agent_addresses=friend_agent_urls)
-        return hosting_agent_instance.create_agent()
+        return await HostAgent.create(remote_agent_addresses=friend_agent_urls)
 
     try:
         return asyncio.run(_async_main())
@@ -453,4 +731,7 @@ def _get_initialized_host_agent_sync():
             raise
 
 
-root_agent = _get_initialized_host_agent_sync()
+# The HostAgent is kept so the A2A server (host/__main__.py) can drive the same
+# instance that `adk web` serves through root_agent.
+host_agent = _get_initialized_host_agent_sync()
+root_agent = host_agent.create_agent() if host_agent else None
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import (
+    Part,
+    TaskState,
+    TextPart,
+    UnsupportedOperationError,
+)
+from a2a.utils.errors import ServerError
+
+from .agent import HostAgent
+from utils.tracing import span, traceparent_from_metadata
+
+logger = logging.getLogger(__name__)
+
+
+class HostAgentExecutor(AgentExecutor):
+    """Serves HostAgent.stream over A2A, one ADK session per A2A context."""
+
+    def __init__(self, host_agent: HostAgent):
+        self.host_agent = host_agent
+        self._running: dict[str, asyncio.Task] = {}
+        # Turns within one context run one at a time; different contexts run concurrently.
+        self._session_locks: dict[str, tuple[asyncio.Lock, int]] = {}
+
+    def in_flight(self) -> int:
+        return len(self._running)
+
+    async def execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
+        if not context.task_id or not context.context_id:
+            raise ValueError("RequestContext must have task_id and context_id")
+        if not context.message:
+            raise ValueError("RequestContext must have a message")
+
+        self._running[context.task_id] = asyncio.current_task()
+        lock, users = self._session_locks.get(context.context_id, (asyncio.Lock(), 0))
+        self._session_locks[context.context_id] = (lock, users + 1)
+        try:
+            with span("host.request", parent=traceparent_from_metadata(context.message.metadata),
+                      task_id=context.task_id, context_id=context.context_id):
+                async with lock:
+                    await self._execute(context, event_queue)
+        finally:
+            self._running.pop(context.task_id, None)
+            lock, users = self._session_locks[context.context_id]
+            if users == 1:
+                del self._session_locks[context.context_id]
+            else:
+                self._session_locks[context.context_id] = (lock, users - 1)
+
+    async def _execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        if not context.current_task:
+            await updater.submit()
+        await updater.start_work()
+
+        query = context.get_user_input()
+        try:
+            async for item in self.host_agent.stream(query, context.context_id):
+                if not item["is_task_complete"]:
+                    await updater.update_status(
+                        TaskState.working,
+                        message=updater.new_agent_message(
+                            [Part(root=TextPart(text=item["updates"]))]
+                        ),
+                    )
+                    continue
+                await updater.add_artifact(
+                    [Part(root=TextPart(text=item["content"]))], name="host_response"
+                )
+                await updater.complete()
+                return
+            await updater.failed(
+                message=updater.new_agent_message(
+                    [Part(root=TextPart(text="The host agent finished without a response."))]
+                )
+            )
+        except Exception as e:
+            logger.error(f"Error during execution: {e}")
+            await updater.failed(
+                message=updater.new_agent_message([Part(root=TextPart(text=str(e)))])
+            )
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        """Stops the host's ADK run; friend calls it abandons are cancelled on the friends."""
+        if not context.task_id or not context.context_id:
+            raise ServerError(error=UnsupportedOperationError())
+
+        running = self._running.pop(context.task_id, None)
+        if running is not None and not running.done():
+            running.cancel()
+
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.update_status(TaskState.canceled, final=True)
@@ -0,0 +1,44 @@
+"""Side store for the full verification and NFT audit detail behind compact send_message results."""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional
+
+COMPACT_RESULTS = os.getenv("HOST_COMPACT_RESULTS", "true").lower() != "false"
+AUDIT_RECORDS = int(os.getenv("HOST_AUDIT_RECORDS", "1000"))
+
+
+class AuditStore:
+    """
+    Bounded, in-memory record of what each friend exchange produced: the
+    verified envelopes with their signatures, trust issues, errors and the
+    result of the NFT execution that audited it.
+
+    Only a short reference goes back to the model; the detail stays here and
+    is fetched by id when someone actually asks for it. The oldest records
+    are evicted once `max_records` is reached (the NFT execution itself is
+    the durable copy).
+    """
+
+    def __init__(self, max_records: int = AUDIT_RECORDS):
+        self.max_records = max_records
+        self._records: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def put(self, record: dict[str, Any]) -> str:
+        ref = f"audit-{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self._records[ref] = {**record, "audit_ref": ref, "recorded_at": time.time()}
+            while len(self._records) > self.max_records:
+                self._records.popitem(last=False)
+        return ref
+
+    def get(self, ref: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            return self._records.get(ref)
@@ -35,4 +35,6 @@ def load_nft_config(path: str | os.PathLike | None = None) -> Dict[str, Any]:
         "data":          cfg.get("data", ""),
         "value":         int(cfg.get("value", 0)),
         "quorum_type":   int(cfg.get("quorum_type", 2)),
+        # Audit streams with their own token: name -> overrides of the keys above.
+        "streams":       cfg.get("streams", {}),
     }
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""Keeps the host model's prompt bounded by collapsing old turns into a state snapshot."""
+
+import json
+import logging
+import os
+from typing import Any, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# Estimated prompt tokens (history only) above which old turns are compacted.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("HOST_CONTEXT_TOKEN_BUDGET", "12000"))
+# Share of the budget the most recent, verbatim turns may use after compaction.
+RECENT_SHARE = float(os.getenv("HOST_CONTEXT_RECENT_SHARE", "0.5"))
+# Longest text kept per item in the snapshot, and most items kept per list.
+SNIPPET_CHARS = 300
+SNAPSHOT_ITEMS = 10
+
+PROMPT_TOKENS_KEY = "prompt_tokens"
+
+
+def estimate_tokens(content: types.Content) -> int:
+    """Rough token count (~4 characters per token), good enough for a budget."""
+    chars = 0
+    for part in content.parts or []:
+        if part.text:
+            chars += len(part.text)
+        if part.function_call:
+            chars += len(part.function_call.name or "") + len(_dumps(part.function_call.args))
+        if part.function_response:
+            chars += len(part.function_response.name or "") + len(_dumps(part.function_response.response))
+    return chars // 4 + 1
+
+
+def compact_history(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """
+    ADK before_model_callback for the host.
+
+    Once the history in `llm_request` passes HOST_CONTEXT_TOKEN_BUDGET, every
+    turn before the newest ones that fit in RECENT_SHARE of the budget is
+    replaced by one structured snapshot: what the user asked, the latest
+    answer from each friend, court listings and bookings, and the host's
+    last reply. Only the request is rewritten; the session keeps the full
+    history. Turns are only cut where a user message starts, so function
+    calls and their responses stay paired.
+    """
+    contents = llm_request.contents
+    sizes = [estimate_tokens(c) for c in contents]
+    total = sum(sizes)
+    cut = 0
+    if total > CONTEXT_TOKEN_BUDGET:
+        cut = _cut_index(contents, sizes, int(CONTEXT_TOKEN_BUDGET * RECENT_SHARE))
+
+    if cut > 0:
+        snapshot = types.Part.from_text(text=(
+            "[Earlier conversation, compacted. Use it as established facts.]\n"
+            + json.dumps(_snapshot(contents[:cut]), ensure_ascii=False)
+        ))
+        first = contents[cut]
+        llm_request.contents = [
+            types.Content(role=first.role, parts=[snapshot, *(first.parts or [])]),
+            *contents[cut + 1:],
+        ]
+        sent = sum(estimate_tokens(c) for c in llm_request.contents[:1]) + sum(sizes[cut + 1:])
+    else:
+        sent = total
+
+    callback_context.state[PROMPT_TOKENS_KEY] = sent
+    logger.info(
+        f"Host prompt history ~{sent} tokens in {len(llm_request.contents)} contents"
+        + (f" (compacted {cut} contents, ~{total} tokens before)" if cut else "")
+    )
+    return None
+
+
+def record_prompt_size(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """ADK after_model_callback: logs the prompt size the model actually billed."""
+    usage = llm_response.usage_metadata
+    if usage is not None and usage.prompt_token_count:
+        logger.info(
+            f"Host model call: {usage.prompt_token_count} prompt tokens, "
+            f"{usage.candidates_token_count or 0} output tokens "
+            f"(history estimate {callback_context.state.get(PROMPT_TOKENS_KEY)})"
+        )
+    return None
+
+
+def _cut_index(contents: list[types.Content], sizes: list[int], recent_budget: int) -> int:
+    """Start of the oldest user turn that still fits in `recent_budget`; 0 when nothing can go."""
+    starts = [i for i, c in enumerate(contents) if _is_user_turn(c)]
+    cut = starts[-1] if starts else 0
+    for start in reversed(starts[:-1]):
+        if sum(sizes[start:]) > recent_budget:
+            break
+        cut = start
+    return cut
+
+
+def _is_user_turn(content: types.Content) -> bool:
+    parts = content.parts or []
+    return (
+        content.role == "user"
+        and any(p.text for p in parts)
+        and not any(p.function_response for p in parts)
+    )
+
+
+def _snapshot(contents: list[types.Content]) -> dict[str, Any]:
+    requests: list[str] = []
+    friends: dict[str, Any] = {}
+    courts: dict[str, Any] = {}
+    bookings: list[Any] = []
+    other_tools: dict[str, Any] = {}
+    host_reply: Optional[str] = None
+
+    for content in contents:
+        for part in content.parts or []:
+            if part.text and content.role == "user":
+                requests.append(_snip(part.text))
+            elif part.text:
+                host_reply = _snip(part.text)
+            elif part.function_response:
+                name = part.function_response.name
+                response = part.function_response.response or {}
+                if name in ("send_message", "ask_friends"):
+                    # Both return dicts, which ADK passes on unwrapped.
+                    for friend, reply in _friend_replies(response):
+                        friends[friend] = reply
+                    continue
+                # ADK hands non-dict return values over as {"result": value}.
+                response = response.get("result", response)
+                if name == "list_court_availabilities":
+                    courts[str(response.get("date", len(courts)))] = _snip(_dumps(response))
+                elif name == "book_pickleball_court":
+                    bookings.append(_snip(_dumps(response)))
+                else:
+                    other_tools[name] = _snip(_dumps(response))
+
+    snapshot: dict[str, Any] = {"user_requests": requests[-SNAPSHOT_ITEMS:]}
+    if len(requests) > SNAPSHOT_ITEMS:
+        snapshot["older_requests_omitted"] = len(requests) - SNAPSHOT_ITEMS
+    if friends:
+        snapshot["friend_replies"] = friends
+    if courts:
+        snapshot["court_listings"] = dict(list(courts.items())[-SNAPSHOT_ITEMS:])
+    if bookings:
+        snapshot["bookings"] = bookings[-SNAPSHOT_ITEMS:]
+    if other_tools:
+        snapshot["other_tool_results"] = other_tools
+    if host_reply:
+        snapshot["last_host_reply"] = host_reply
+    return snapshot
+
+
+def _friend_replies(response: Any):
+    """(friend, reply) pairs from a send_message or ask_friends result, compact or full."""
+    if not isinstance(response, dict):
+        return
+    if isinstance(response.get("result"), dict) and "status" in response:
+        # Full send_message results: {"result": {"messages": [...], ...}, "status": ui_msg}.
+        for message in response["result"].get("messages") or []:
+            yield message.get("agent"), {
+                "response": _snip(str(message.get("response"))),
+                "status": response["status"],
+            }
+        return
+    if "friend" in response:
+        yield response["friend"], {
+            k: _snip(str(v)) if k == "response" else v
+            for k, v in response.items() if k != "friend"
+        }
+        return
+    for group in ("answered", "failed"):
+        for friend, outcome in (response.get(group) or {}).items():
+            yield friend, {"outcome": group, **{
+                k: _snip(str(v)) if k in ("response", "result") else v
+                for k, v in outcome.items() if k != "friend"
+            }}
+    for friend in response.get("pending") or []:
+        yield friend, {"outcome": "pending"}
+
+
+def _snip(text: str) -> str:
+    return text if len(text) <= SNIPPET_CHARS else text[:SNIPPET_CHARS] + "…"
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str) if value is not None else ""
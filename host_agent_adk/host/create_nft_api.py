@@ -1,15 +1,22 @@
+import hashlib
+import logging
 import os
 import json
 from pathlib import Path
 import sys
+import uuid
 import requests
-from typing import Optional, Dict
+from typing import BinaryIO, Optional, Dict, Union
 
 ROOT = Path(__file__).resolve().parents[2]  
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from utils.node_client import NodeClient 
+from utils.structured_log import log_event
+from utils.tracing import traced
+
+from host.nft_index import CHUNK_BYTES, nft_index
 
 class APIError(Exception):
     """Raised when an external API call fails or returns invalid data."""
@@ -21,34 +28,128 @@ default_did = node.get_did()
 
 print("✅ Using DID:", default_did)
 
+logger = logging.getLogger(__name__)
+
+class MultipartUpload:
+    """
+    A multipart/form-data body read straight from disk in CHUNK_BYTES pieces,
+    so an artifact of any size uploads in constant memory. Every file part
+    is hashed as it is sent; `digests` holds the SHA-256 of what the server
+    actually received. The length is known up front, so it is sent with a
+    Content-Length rather than chunked.
+    """
+
+    def __init__(self, fields: Dict[str, str], files: Dict[str, tuple]):
+        """`files` maps a field name to (filename, path or bytes, content type)."""
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.digests: Dict[str, str] = {}
+        self._segments: list = []
+        for name, value in fields.items():
+            self._segments.append(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n".encode()
+            )
+        for name, (filename, source, content_type) in files.items():
+            self._segments.append(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                f'filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'.encode()
+            )
+            size = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+            self._segments.append((name, source, size))
+            self._segments.append(b"\r\n")
+        self._segments.append(f"--{self.boundary}--\r\n".encode())
+        self._length = sum(len(s) if isinstance(s, bytes) else s[2] for s in self._segments)
+        self._index = 0
+        self._offset = 0
+        self._file: Optional[BinaryIO] = None
+        self._hash = None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        out = bytearray()
+        while self._index < len(self._segments) and (size < 0 or len(out) < size):
+            want = CHUNK_BYTES if size < 0 else size - len(out)
+            segment = self._segments[self._index]
+            if isinstance(segment, bytes):
+                chunk = segment[self._offset:self._offset + want]
+            else:
+                chunk = self._read_file(segment, want)
+            out += chunk
+            self._offset += len(chunk)
+            if self._offset >= (len(segment) if isinstance(segment, bytes) else segment[2]):
+                self._finish_segment(segment)
+        return bytes(out)
+
+    def _read_file(self, segment: tuple, want: int) -> bytes:
+        name, source, size = segment
+        if self._hash is None:
+            self._hash = hashlib.sha256()
+            if not isinstance(source, bytes):
+                self._file = open(source, "rb")
+        want = min(want, size - self._offset)
+        if isinstance(source, bytes):
+            chunk = source[self._offset:self._offset + want]
+        else:
+            chunk = self._file.read(want)
+            if len(chunk) < want:
+                raise APIError(f"{source} shrank while it was being uploaded")
+        self._hash.update(chunk)
+        return chunk
+
+    def _finish_segment(self, segment: Union[bytes, tuple]) -> None:
+        if not isinstance(segment, bytes):
+            self.digests[segment[0]] = self._hash.hexdigest()
+            self._hash = None
+        self.close()
+        self._index += 1
+        self._offset = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@traced("node.create_nft")
 def create_nft(
     did: Optional[str],
     metadata_path: str,
     artifact_path: str,
     base_url: Optional[str] = None,
     timeout: float = 10.0,
+    metadata: Optional[bytes] = None,
 ) -> str:
-    print("CREATE")
+    """
+    Calls POST /api/create-nft, streaming the metadata and artifact files,
+    and returns the NFT token. A (DID, metadata, artifact) combination that
+    was minted before returns its recorded token without calling the node.
+    `metadata` may be passed when the caller has already read the file.
+    """
     url = (base_url or default_base_url).rstrip("/") + "/api/create-nft"
-   
-    data = {"did": did or default_did}
-    files = {
-        "metadata": (
-            os.path.basename(metadata_path),
-            open(metadata_path, "rb"),
-            "application/json",
-        ),
-        "artifact": (
-            os.path.basename(artifact_path),
-            open(artifact_path, "rb"),
-            "application/octet-stream",
-        ),
-    }
-    
+    did = did or default_did
+    metadata_sha = hashlib.sha256(metadata).hexdigest() if metadata is not None else nft_index.digest(metadata_path)
+    artifact_sha = nft_index.digest(artifact_path)
+    token = nft_index.token(did, metadata_sha, artifact_sha)
+    if token is not None:
+        log_event(logger, logging.INFO, "create_nft reused minted token", did=did,
+                  artifact_sha256=artifact_sha, token=token)
+        return token
 
+    log_event(logger, logging.DEBUG, "create_nft request", did=did,
+              metadata=metadata_path, artifact=artifact_path)
+    body = MultipartUpload(
+        {"did": did},
+        {
+            "metadata": (os.path.basename(metadata_path),
+                         metadata if metadata is not None else metadata_path, "application/json"),
+            "artifact": (os.path.basename(artifact_path), artifact_path, "application/octet-stream"),
+        },
+    )
     try:
-        resp = requests.post(url, data=data, files=files, timeout=timeout)
-        print("resp", resp)
+        resp = requests.post(url, data=body, headers={"Content-Type": body.content_type}, timeout=timeout)
         resp.raise_for_status()
         data = resp.json()
     except requests.RequestException as e:
@@ -56,20 +157,21 @@ def create_nft(
     except ValueError as e:
         raise APIError(f"Invalid JSON in create_nft response: {e}") from e
     finally:
-        for _name, f in files.items():
-            
-            if hasattr(f[1], "close"):
-                f[1].close()
+        body.close()
 
-    print("data", data)
+    log_event(logger, logging.DEBUG, "create_nft response", status=resp.status_code, data=data)
 
     if not data.get("status", False):
         raise APIError(f"Create-NFT API returned error: {data.get('message', '<no message>')}")
     token = data.get("result")
     if not isinstance(token, str):
         raise APIError(f"Unexpected result field in create_nft: {token!r}")
+    # Index what was sent, which differs from the pre-upload hash only if a file changed meanwhile.
+    nft_index.record_token(did, body.digests.get("metadata", metadata_sha),
+                           body.digests.get("artifact", artifact_sha), token)
     return token
 
+@traced("node.deploy_nft")
 def deploy_nft(
     did: str,
     nft_token: str,
@@ -85,7 +187,6 @@ def deploy_nft(
     Calls POST /api/deploy-nft to stage the on‐chain deployment.
     Returns the parsed `result` object (containing id, mode, etc.)
     """
-    print("DEPLOY")
     url = (base_url or default_base_url).rstrip("/") + "/api/deploy-nft"
     payload = {
         "did": did,
@@ -96,7 +197,7 @@ def deploy_nft(
         "nft_value": nft_value,
         "quorum_type": quorum_type,
     }
-    print("payload", payload)
+    log_event(logger, logging.DEBUG, "deploy_nft request", payload=payload)
     try:
         resp = requests.post(url, json=payload, timeout=timeout)
         resp.raise_for_status()
@@ -113,6 +214,7 @@ def deploy_nft(
         raise APIError(f"Unexpected result field in deploy_nft: {result!r}")
     return result
 
+@traced("node.signature_response")
 def signature_response(
     deploy_id: str,
     mode: int,
@@ -128,14 +230,15 @@ def signature_response(
         "mode": mode,
         "password": password,
     }
-    print("SIGNATURE-REQUEST >", payload)
+    # The payload carries the password, so only the id and mode are logged.
+    log_event(logger, logging.DEBUG, "signature_response request", id=deploy_id, mode=mode)
 
     try:
         
-        resp = requests.post(url, json=payload)
+        resp = requests.post(url, json=payload, timeout=timeout)
         resp.raise_for_status()
         data = resp.json()
-        print("SIGNATURE-RESPONSE >", data)
+        log_event(logger, logging.DEBUG, "signature_response response", data=data)
     except requests.RequestException as e:
         raise APIError(f"HTTP error during signature_response: {e}") from e
     except ValueError as e:
@@ -144,11 +247,9 @@ def signature_response(
     if not data.get("status", False):
         raise APIError(f"Signature-Response API returned error: {data.get('message', '<no message>')}")
 
-    print("Here5")
-    message = data["message"]
-    print("message", message)
-    return message
+    return data["message"]
 
+@traced("nft.mint_deploy_and_sign")
 def mint_deploy_and_sign(
     metadata_path: str,
     artifact_path: str,
@@ -170,25 +271,37 @@ def mint_deploy_and_sign(
         "nft_token": "<Qm…>",
         "signature": "3044…"
       }
+    The metadata file is read once, for both the upload and the deploy
+    call. A flow that already ran for the same DID, files and deploy
+    parameters returns its recorded result without calling the node.
     """
-    
-    token = create_nft(did, metadata_path, artifact_path, base_url, timeout)
+    did = did or default_did
+    with open(metadata_path, "rb") as f:
+        metadata = f.read()
+    metadata_sha = hashlib.sha256(metadata).hexdigest()
+    artifact_sha = nft_index.digest(artifact_path)
+    deploy_params = {"nft_data": nft_data, "nft_value": nft_value, "quorum_type": quorum_type}
+    signed = nft_index.signed(did, metadata_sha, artifact_sha, deploy_params)
+    if signed is not None:
+        log_event(logger, logging.INFO, "mint reused signed NFT", did=did, token=signed["nft_token"])
+        return signed
+
+    token = create_nft(did, metadata_path, artifact_path, base_url, timeout, metadata=metadata)
 
-    
     deploy_info = deploy_nft(
-        did or default_did,
+        did,
         token,
         nft_data=nft_data,
         nft_file_name=os.path.basename(artifact_path),
-        nft_metadata=json.dumps(json.load(open(metadata_path, "r"))),
+        nft_metadata=json.dumps(json.loads(metadata)),
         nft_value=nft_value,
         quorum_type=quorum_type,
         base_url=base_url,
         timeout=timeout,
     )
 
-    
     sig = signature_response(deploy_info["id"], deploy_info["mode"], password, base_url, timeout)
+    nft_index.record_signature(did, metadata_sha, artifact_sha, deploy_params, sig)
 
     return {
         "nft_token": token,
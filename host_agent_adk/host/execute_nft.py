@@ -1,3 +1,4 @@
+import logging
 import os
 from pathlib import Path
 import requests
@@ -5,6 +6,8 @@ import json
 from typing import Optional, Dict
 
 from utils.node_client import NodeClient
+from utils.structured_log import log_event
+from utils.tracing import traced
 
 class APIError(Exception):
     """Raised when an external API call fails or returns invalid data."""
@@ -16,6 +19,9 @@ default_base_url = node.get_base_url()
 default_did = node.get_did()
 print("✅ Using DID:", default_did)
 
+logger = logging.getLogger(__name__)
+
+@traced("node.execute_nft")
 def execute_nft(
     comment: str,
     executor: Optional[str],
@@ -41,13 +47,12 @@ def execute_nft(
         "quorum_type": quorum_type,
         "receiver": receiver,
     }
-    print("payload", payload)
+    log_event(logger, logging.DEBUG, "execute_nft request", payload=payload)
     try:
         resp = requests.post(url, json=payload, timeout=timeout)
-        print("resp", resp)
         resp.raise_for_status()
         data = resp.json()
-        print("data", data)
+        log_event(logger, logging.DEBUG, "execute_nft response", status=resp.status_code, data=data)
     except requests.RequestException as e:
         raise APIError(f"HTTP error during execute_nft: {e}") from e
     except ValueError as e:
@@ -61,6 +66,7 @@ def execute_nft(
     return result
 
 
+@traced("node.signature_response")
 def signature_response(
     deploy_id: str,
     mode: int,
@@ -78,13 +84,13 @@ def signature_response(
         "mode": mode,
         "password": password,
     }
-    print("payload", payload)
+    # The payload carries the password, so only the id and mode are logged.
+    log_event(logger, logging.DEBUG, "signature_response request", id=deploy_id, mode=mode)
     try:
-        print("Executing NFT...")
-        resp = requests.post(url, json=payload)
+        resp = requests.post(url, json=payload, timeout=timeout)
         resp.raise_for_status()
         data = resp.json()
-        print("SIGNATURE-RESPONSE >", data)
+        log_event(logger, logging.DEBUG, "signature_response response", data=data)
     except requests.RequestException as e:
         raise APIError(f"HTTP error during signature_response: {e}") from e
     except ValueError as e:
@@ -92,11 +98,10 @@ def signature_response(
     if not data.get("status", False):
         raise APIError(f"Signature-Response API returned error: {data.get('message', '<no message>')}")
 
-    message = data["message"]
-    print("message", message)
-    return message
+    return data["message"]
 
 
+@traced("nft.execute_and_sign")
 def execute_and_sign(
     comment: str,
     nft: str,
@@ -0,0 +1,168 @@
+"""Health tracking and circuit breaking for friend agents."""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+import httpx
+
+BREAKER_FAILURES = int(os.getenv("HOST_BREAKER_FAILURES", "3"))
+BREAKER_RESET_SECONDS = float(os.getenv("HOST_BREAKER_RESET_SECONDS", "30"))
+PROBE_INTERVAL_SECONDS = float(os.getenv("HOST_PROBE_INTERVAL_SECONDS", "15"))
+PROBE_TIMEOUT_SECONDS = float(os.getenv("HOST_PROBE_TIMEOUT_SECONDS", "2"))
+
+CARD_PATH = "/.well-known/agent.json"
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker for one friend.
+
+    * closed: requests flow; `failure_threshold` consecutive failures open it.
+    * open: requests fail fast until `reset_seconds` pass or a probe succeeds.
+    * half_open: one trial request is let through; success closes the
+      breaker, failure opens it again. A trial that never reports back is
+      given up on after `reset_seconds`, once a probe sees the friend up.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURES,
+        reset_seconds: float = BREAKER_RESET_SECONDS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error: Optional[str] = None
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial_started = time.monotonic()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.last_error = None
+            self._trial_in_flight = False
+
+    def record_failure(self, error: str = "") -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = error or self.last_error
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """A request ended without telling us anything (e.g. it was cancelled)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def probe_succeeded(self) -> None:
+        """The friend's server answers again; let the next real request test it."""
+        with self._lock:
+            if self.state == OPEN:
+                self.state = HALF_OPEN
+            elif (
+                self.state == HALF_OPEN
+                and self._trial_in_flight
+                and time.monotonic() - self._trial_started >= self.reset_seconds
+            ):
+                # The trial request was lost without reporting back; allow a new one.
+                self._trial_in_flight = False
+
+    def is_available(self) -> bool:
+        return self.state != OPEN or time.monotonic() - self.opened_at >= self.reset_seconds
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "failures": self.failures, "last_error": self.last_error}
+
+
+class FriendHealthMonitor:
+    """
+    Keeps a breaker per friend and probes each friend's agent card on a
+    daemon thread, so dead friends are noticed (and recovered ones picked up)
+    without spending a real request on them.
+
+    `on_card(address, card_json)` is called when a friend that was never
+    reached before serves its card, so the host can connect to it late.
+    """
+
+    def __init__(
+        self,
+        interval: float = PROBE_INTERVAL_SECONDS,
+        probe_timeout: float = PROBE_TIMEOUT_SECONDS,
+        on_card: Optional[Callable[[str, dict], None]] = None,
+    ):
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        self.on_card = on_card
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self._addresses: dict[str, Optional[str]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, address: str, name: Optional[str] = None) -> None:
+        """Probes `address`; `name` is None until its card has been fetched."""
+        self._addresses[address] = name
+        if name is not None:
+            self.breakers.setdefault(name, CircuitBreaker())
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        return self.breakers.setdefault(name, CircuitBreaker())
+
+    def is_available(self, name: str) -> bool:
+        return self.breaker(name).is_available()
+
+    def start(self) -> None:
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="friend-probe", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def probe_all(self, client: httpx.Client) -> None:
+        for address, name in list(self._addresses.items()):
+            try:
+                resp = client.get(address.rstrip("/") + CARD_PATH)
+                resp.raise_for_status()
+            except Exception as e:
+                if name is not None:
+                    self.breaker(name).record_failure(f"probe failed: {e}")
+                continue
+            if name is not None:
+                self.breaker(name).probe_succeeded()
+            elif self.on_card is not None:
+                try:
+                    self.on_card(address, resp.json())
+                except Exception as e:
+                    logger.error(f"Failed to connect late to {address}: {e}")
+
+    def _run(self) -> None:
+        with httpx.Client(timeout=self.probe_timeout) as client:
+            while not self._stop.wait(self.interval):
+                self.probe_all(client)
@@ -0,0 +1,130 @@
+"""Local search index over friend agent cards, so the host prompt lists only relevant friends."""
+
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Optional
+
+from a2a.types import AgentCard
+
+# Up to this many friends the prompt lists everyone, as before.
+PROMPT_ALL_FRIENDS = int(os.getenv("HOST_PROMPT_ALL_FRIENDS", "10"))
+# Otherwise, how many best-matching friends are listed per turn (named friends always are).
+PROMPT_TOP_K = int(os.getenv("HOST_PROMPT_TOP_K", "5"))
+
+# Where a token came from decides how much a match counts.
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "skills": 1.5, "description": 1.0, "examples": 0.5}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "for", "from", "i", "in", "is", "it",
+    "me", "my", "of", "on", "or", "the", "to", "with", "you", "your", "agent",
+}
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    return [t for t in _TOKEN.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+class FriendIndex:
+    """
+    Inverted index from tokens to friends, built from each agent card's name,
+    description, skill names/descriptions, tags and examples.
+
+    `search` scores only the friends that share a token with the query
+    (tf-idf weighted by field), and `named` finds friends whose name the
+    user mentioned; both only touch the postings of the query's tokens,
+    never the full list of registered friends.
+
+    Friends that come up late are added from the health monitor's probe
+    thread while the event loop searches, so updates and lookups hold `_lock`.
+    """
+
+    def __init__(self):
+        self.cards: dict[str, AgentCard] = {}
+        self._postings: dict[str, dict[str, float]] = {}
+        self._card_tokens: dict[str, set[str]] = {}
+        self._name_tokens: dict[str, set[str]] = {}
+        self._by_name_token: dict[str, set[str]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def add(self, card: AgentCard) -> None:
+        with self._lock:
+            self.remove(card.name)
+            self.cards[card.name] = card
+
+            weights: Counter[str] = Counter()
+            fields = {
+                "name": [card.name],
+                "description": [card.description],
+                "skills": [f"{s.name} {s.description}" for s in card.skills or []],
+                "tags": [t for s in card.skills or [] for t in s.tags or []],
+                "examples": [e for s in card.skills or [] for e in s.examples or []],
+            }
+            for field, texts in fields.items():
+                for text in texts:
+                    for token in tokenize(text):
+                        weights[token] += FIELD_WEIGHTS[field]
+            for token, weight in weights.items():
+                self._postings.setdefault(token, {})[card.name] = weight
+            self._card_tokens[card.name] = set(weights)
+
+            name_tokens = set(tokenize(card.name.replace("_", " ")))
+            self._name_tokens[card.name] = name_tokens
+            for token in name_tokens:
+                self._by_name_token.setdefault(token, set()).add(card.name)
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            if self.cards.pop(name, None) is None:
+                return
+            for token in self._card_tokens.pop(name, set()):
+                postings = self._postings.get(token)
+                if postings is not None:
+                    postings.pop(name, None)
+                    if not postings:
+                        del self._postings[token]
+            for token in self._name_tokens.pop(name, set()):
+                names = self._by_name_token.get(token)
+                if names is not None:
+                    names.discard(name)
+                    if not names:
+                        del self._by_name_token[token]
+
+    def named(self, query: str) -> list[str]:
+        """Friends whose full name (e.g. "Karley Agent" -> karley) appears in `query`."""
+        tokens = set(tokenize(query))
+        with self._lock:
+            candidates = {name for t in tokens for name in self._by_name_token.get(t, ())}
+            return sorted(name for name in candidates if self._name_tokens[name] <= tokens)
+
+    def search(self, query: str, limit: int = PROMPT_TOP_K, exclude: set[str] = frozenset()) -> list[str]:
+        """Best-matching friend names for `query`, most relevant first."""
+        with self._lock:
+            scores: Counter[str] = Counter()
+            total = len(self.cards) or 1
+            for token in set(tokenize(query)):
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for name, weight in postings.items():
+                    if name not in exclude:
+                        scores[name] += (1 + math.log(weight)) * idf
+            return [name for name, _ in sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]]
+
+    def describe(self, name: str) -> dict:
+        card = self.cards[name]
+        return {
+            "name": card.name,
+            "description": card.description,
+            "skills": [
+                {"name": s.name, "tags": s.tags, "examples": s.examples}
+                for s in card.skills or []
+            ],
+        }
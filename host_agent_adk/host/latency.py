@@ -0,0 +1,63 @@
+"""Per-friend latency tracking used for adaptive timeouts and hedged requests."""
+
+import os
+from collections import deque
+from typing import Optional
+
+DEFAULT_FRIEND_TIMEOUT = float(os.getenv("HOST_FRIEND_TIMEOUT_SECONDS", "30"))
+MIN_FRIEND_TIMEOUT = float(os.getenv("HOST_FRIEND_MIN_TIMEOUT_SECONDS", "5"))
+MAX_FRIEND_TIMEOUT = float(os.getenv("HOST_FRIEND_MAX_TIMEOUT_SECONDS", "60"))
+ROUND_DEADLINE = float(os.getenv("HOST_ROUND_DEADLINE_SECONDS", "45"))
+HEDGE_ENABLED = os.getenv("HOST_HEDGE", "true").lower() != "false"
+
+
+class LatencyTracker:
+    """
+    Tracks how long one friend takes to answer.
+
+    Keeps an EWMA of the latency and of its deviation (the same estimator TCP
+    uses for its retransmission timeout) plus a window of recent samples for
+    the p95 that decides when a hedged request is worth sending.
+    """
+
+    def __init__(self, alpha: float = 0.2, window: int = 64, min_samples: int = 5):
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.ewma: Optional[float] = None
+        self.deviation = 0.0
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        if self.ewma is None:
+            self.ewma = seconds
+            self.deviation = seconds / 2
+            return
+        self.deviation += self.alpha * (abs(seconds - self.ewma) - self.deviation)
+        self.ewma += self.alpha * (seconds - self.ewma)
+
+    def timeout(
+        self,
+        default: float = DEFAULT_FRIEND_TIMEOUT,
+        floor: float = MIN_FRIEND_TIMEOUT,
+        ceiling: float = MAX_FRIEND_TIMEOUT,
+    ) -> float:
+        """Adaptive timeout: EWMA + 4 deviations, clamped to [floor, ceiling]."""
+        if self.ewma is None:
+            return default
+        return min(max(self.ewma + 4 * self.deviation, floor), ceiling)
+
+    def p95(self) -> Optional[float]:
+        """p95 of recent latencies, or None until enough samples were seen."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def snapshot(self) -> dict[str, Optional[float]]:
+        return {
+            "ewma": self.ewma,
+            "p95": self.p95(),
+            "timeout": self.timeout(),
+            "samples": len(self._samples),
+        }
@@ -0,0 +1,152 @@
+"""Content-hash index of minted NFTs, so the same artifact is never minted twice."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Union
+
+NFT_INDEX_DB = os.getenv("HOST_NFT_INDEX_DB") or str(Path(tempfile.gettempdir()) / "a2a_nft_index.sqlite3")
+CHUNK_BYTES = 256 * 1024
+
+
+def sha256_file(path: Union[str, os.PathLike]) -> str:
+    """Hex SHA-256 of a file, read in CHUNK_BYTES pieces."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class NftIndex:
+    """
+    SQLite record of what has been minted, keyed by (DID, metadata SHA-256,
+    artifact SHA-256), with the deploy signature once the full flow has run.
+
+    File hashes are cached by path, size and mtime, so checking a file that
+    was already minted costs one stat instead of a read. Connections are
+    opened per thread and per process, like `CalendarStore`.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike] = NFT_INDEX_DB):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS file_hashes ("
+                " path TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " sha256 TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS minted ("
+                " did TEXT NOT NULL,"
+                " metadata_sha256 TEXT NOT NULL,"
+                " artifact_sha256 TEXT NOT NULL,"
+                " token TEXT NOT NULL,"
+                " deploy_params TEXT,"
+                " signature TEXT,"
+                " created REAL NOT NULL,"
+                " PRIMARY KEY (did, metadata_sha256, artifact_sha256))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS mint_jobs ("
+                " job_id TEXT PRIMARY KEY,"
+                " stage TEXT NOT NULL,"
+                " token TEXT,"
+                " deploy_id TEXT,"
+                " deploy_mode INTEGER,"
+                " signature TEXT,"
+                " error TEXT,"
+                " updated REAL NOT NULL)"
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def digest(self, path: Union[str, os.PathLike]) -> str:
+        """SHA-256 of the file at `path`, hashed only if it changed since last time."""
+        path = str(Path(path).resolve())
+        stat = os.stat(path)
+        row = self._conn().execute(
+            "SELECT sha256 FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        sha = sha256_file(path)
+        self.remember_digest(path, stat.st_size, stat.st_mtime_ns, sha)
+        return sha
+
+    def remember_digest(self, path: Union[str, os.PathLike], size: int, mtime_ns: int, sha: str) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO file_hashes(path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+            (str(Path(path).resolve()), size, mtime_ns, sha),
+        )
+
+    def token(self, did: str, metadata_sha: str, artifact_sha: str) -> Optional[str]:
+        row = self._conn().execute(
+            "SELECT token FROM minted WHERE did = ? AND metadata_sha256 = ? AND artifact_sha256 = ?",
+            (did, metadata_sha, artifact_sha),
+        ).fetchone()
+        return row[0] if row else None
+
+    def signed(self, did: str, metadata_sha: str, artifact_sha: str,
+               deploy_params: dict[str, Any]) -> Optional[dict[str, str]]:
+        """The token and signature of a full mint with the same deploy parameters, if one ran."""
+        row = self._conn().execute(
+            "SELECT token, signature FROM minted WHERE did = ? AND metadata_sha256 = ?"
+            " AND artifact_sha256 = ? AND deploy_params = ? AND signature IS NOT NULL",
+            (did, metadata_sha, artifact_sha, _params(deploy_params)),
+        ).fetchone()
+        return {"nft_token": row[0], "signature": row[1]} if row else None
+
+    def record_token(self, did: str, metadata_sha: str, artifact_sha: str, token: str) -> None:
+        self._conn().execute(
+            "INSERT INTO minted(did, metadata_sha256, artifact_sha256, token, created) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT(did, metadata_sha256, artifact_sha256) DO UPDATE SET token = excluded.token",
+            (did, metadata_sha, artifact_sha, token, time.time()),
+        )
+
+    def record_signature(self, did: str, metadata_sha: str, artifact_sha: str,
+                         deploy_params: dict[str, Any], signature: str) -> None:
+        self._conn().execute(
+            "UPDATE minted SET deploy_params = ?, signature = ?"
+            " WHERE did = ? AND metadata_sha256 = ? AND artifact_sha256 = ?",
+            (_params(deploy_params), signature, did, metadata_sha, artifact_sha),
+        )
+
+    def job(self, job_id: str) -> Optional[dict[str, Any]]:
+        """The persisted state of a mint pipeline run, if it was started before."""
+        cursor = self._conn().execute("SELECT * FROM mint_jobs WHERE job_id = ?", (job_id,))
+        row = cursor.fetchone()
+        return dict(zip([c[0] for c in cursor.description], row)) if row else None
+
+    def save_job(self, job_id: str, stage: str, **fields: Any) -> None:
+        """Records that a pipeline run reached `stage`; unnamed fields keep their values."""
+        columns = ("token", "deploy_id", "deploy_mode", "signature", "error")
+        values = {c: fields.get(c) for c in columns}
+        self._conn().execute(
+            "INSERT INTO mint_jobs(job_id, stage, token, deploy_id, deploy_mode, signature, error, updated)"
+            " VALUES (:job_id, :stage, :token, :deploy_id, :deploy_mode, :signature, :error, :updated)"
+            " ON CONFLICT(job_id) DO UPDATE SET stage = excluded.stage, updated = excluded.updated"
+            + "".join(f", {c} = excluded.{c}" for c in columns if c in fields),
+            {"job_id": job_id, "stage": stage, "updated": time.time(), **values},
+        )
+
+
+def _params(deploy_params: dict[str, Any]) -> str:
+    return json.dumps(deploy_params, sort_keys=True, separators=(",", ":"))
+
+
+nft_index = NftIndex()
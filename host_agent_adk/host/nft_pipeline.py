@@ -0,0 +1,162 @@
+"""Resumable create → deploy → sign NFT pipeline with a timeout per stage."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from host.create_nft_api import APIError, create_nft, deploy_nft, signature_response
+from host.nft_index import NftIndex, nft_index
+
+logger = logging.getLogger(__name__)
+
+# Mints (of different files or DIDs) running at once.
+MINT_CONCURRENCY = int(os.getenv("HOST_NFT_MINT_CONCURRENCY", "8"))
+# Per-stage timeouts; unset, a stage gets the timeout of the mint it belongs to.
+STAGE_TIMEOUTS = {
+    stage: float(os.environ[f"HOST_NFT_{stage.upper()}_TIMEOUT_SECONDS"])
+    for stage in ("create", "deploy", "sign")
+    if os.getenv(f"HOST_NFT_{stage.upper()}_TIMEOUT_SECONDS")
+}
+
+# Stages a run has completed, in order.
+NEW, CREATED, DEPLOYED, SIGNED = "new", "created", "deployed", "signed"
+
+
+@dataclass(frozen=True)
+class MintSpec:
+    """Everything needed to mint, deploy and sign one NFT."""
+
+    did: str
+    metadata_path: str
+    artifact_path: str
+    password: str
+    nft_data: str = ""
+    nft_value: int = 1
+    quorum_type: int = 2
+    base_url: Optional[str] = None
+    timeout: float = 10.0
+
+
+class NftPipeline:
+    """
+    Runs create → deploy → sign as a small state machine whose progress is
+    saved in the `NftIndex` after every stage. A run that crashed or timed
+    out picks up at the stage it had not finished, reusing the token (and
+    deployment) it already has instead of minting a fresh one.
+
+    Each stage gets its own timeout, passed to the HTTP call and enforced
+    around it, so nothing waits on the node indefinitely. Runs execute on
+    one background event loop, up to MINT_CONCURRENCY at a time, and two
+    requests for the same mint share one run. `submit` works from any
+    thread or loop; `mint` is the awaitable form.
+    """
+
+    def __init__(self, index: NftIndex = nft_index, concurrency: int = MINT_CONCURRENCY,
+                 stage_timeouts: Optional[dict[str, float]] = None):
+        self._index = index
+        self.concurrency = concurrency
+        self.stage_timeouts = STAGE_TIMEOUTS if stage_timeouts is None else stage_timeouts
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._running: dict[MintSpec, Future] = {}
+
+    def submit(self, spec: MintSpec) -> Future:
+        """Starts (or joins) the run for `spec`; the future resolves to {"nft_token", "signature"}."""
+        with self._lock:
+            future = self._running.get(spec)
+            if future is not None and not future.done():
+                return future
+            future = asyncio.run_coroutine_threadsafe(self._run(spec), self._event_loop())
+            self._running[spec] = future
+        future.add_done_callback(lambda f: self._forget(spec, f))
+        return future
+
+    async def mint(self, spec: MintSpec) -> dict[str, str]:
+        return await asyncio.wrap_future(self.submit(spec))
+
+    def _forget(self, spec: MintSpec, future: Future) -> None:
+        with self._lock:
+            if self._running.get(spec) is future:
+                del self._running[spec]
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        # Started lazily, and again in a forked child, where the thread does not survive.
+        if self._loop is None or self._pid != os.getpid():
+            self._loop = asyncio.new_event_loop()
+            self._pid = os.getpid()
+            self._slots = None
+            self._running.clear()
+            threading.Thread(target=self._loop.run_forever, name="nft-pipeline", daemon=True).start()
+        return self._loop
+
+    async def _run(self, spec: MintSpec) -> dict[str, str]:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        async with self._slots:
+            metadata_sha, artifact_sha = await asyncio.gather(
+                asyncio.to_thread(self._index.digest, spec.metadata_path),
+                asyncio.to_thread(self._index.digest, spec.artifact_path),
+            )
+            params = {"nft_data": spec.nft_data, "nft_value": spec.nft_value, "quorum_type": spec.quorum_type}
+            signed = self._index.signed(spec.did, metadata_sha, artifact_sha, params)
+            if signed is not None:
+                return signed
+
+            job_id = hashlib.sha256(
+                json.dumps([spec.did, metadata_sha, artifact_sha, params], sort_keys=True).encode()
+            ).hexdigest()
+            job = self._index.job(job_id) or {"stage": NEW}
+            if job["stage"] != NEW:
+                logger.info(f"Resuming NFT mint {job_id[:12]} after stage '{job['stage']}'")
+            try:
+                if job["stage"] == NEW:
+                    job["token"] = await self._stage(
+                        "create", spec, create_nft, spec.did, spec.metadata_path,
+                        spec.artifact_path, spec.base_url,
+                    )
+                    job["stage"] = CREATED
+                    self._index.save_job(job_id, CREATED, token=job["token"], error=None)
+
+                if job["stage"] == CREATED:
+                    with open(spec.metadata_path, "rb") as f:
+                        metadata = json.dumps(json.loads(f.read()))
+                    deploy_info = await self._stage(
+                        "deploy", spec, deploy_nft, spec.did, job["token"],
+                        spec.nft_data, os.path.basename(spec.artifact_path), metadata,
+                        spec.nft_value, spec.quorum_type, spec.base_url,
+                    )
+                    job.update(stage=DEPLOYED, deploy_id=deploy_info["id"], deploy_mode=deploy_info["mode"])
+                    self._index.save_job(job_id, DEPLOYED, deploy_id=job["deploy_id"],
+                                         deploy_mode=job["deploy_mode"], error=None)
+
+                if job["stage"] == DEPLOYED:
+                    signature = await self._stage(
+                        "sign", spec, signature_response, job["deploy_id"], job["deploy_mode"],
+                        spec.password, spec.base_url,
+                    )
+                    self._index.save_job(job_id, SIGNED, signature=signature, error=None)
+                    self._index.record_signature(spec.did, metadata_sha, artifact_sha, params, signature)
+                    job.update(stage=SIGNED, signature=signature)
+            except Exception as e:
+                self._index.save_job(job_id, job["stage"], error=str(e))
+                raise
+            return {"nft_token": job["token"], "signature": job["signature"]}
+
+    async def _stage(self, stage: str, spec: MintSpec, fn: Callable[..., Any], *args: Any) -> Any:
+        timeout = self.stage_timeouts.get(stage, spec.timeout)
+        try:
+            # The HTTP timeout bounds the call; wait_for covers everything around it.
+            return await asyncio.wait_for(asyncio.to_thread(fn, *args, timeout=timeout), timeout + 1.0)
+        except asyncio.TimeoutError:
+            raise APIError(f"NFT {stage} stage timed out after {timeout:.0f}s") from None
+
+
+nft_pipeline = NftPipeline()
@@ -0,0 +1,179 @@
+"""The NFT tokens the host writes its audit records to, minted in the background."""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from host.nft_index import NftIndex, nft_index
+from host.nft_pipeline import MINT_CONCURRENCY, MintSpec, NftPipeline, nft_pipeline
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STREAM = "default"
+# How long an audit write waits for its stream's token before giving up.
+TOKEN_WAIT_SECONDS = float(os.getenv("HOST_NFT_TOKEN_WAIT_SECONDS", "120"))
+# After a failed mint, callers get the same error for this long before minting is retried.
+MINT_RETRY_SECONDS = float(os.getenv("HOST_NFT_MINT_RETRY_SECONDS", "30"))
+# Where the host used to keep its single token; read once and imported into the index.
+LEGACY_TOKEN_FILE = Path(__file__).with_name("token.txt")
+
+
+class NftTokenStore:
+    """
+    One NFT token per audit stream, keyed in the `NftIndex` by (DID,
+    metadata SHA-256, artifact SHA-256). The index (and the node's create
+    call) dedupes on exactly that, so streams with the same DID and files
+    share the first one's token; a warning is logged when their deploy
+    settings differ, since only the first stream's are used.
+
+    `start()` resolves every registered stream on a background thread: a
+    token already in the index is used as is, otherwise the full mint,
+    deploy and sign flow runs. The host serves meanwhile; an audit write
+    that needs a token awaits `token(stream)`, which waits for the mint in
+    progress instead of failing. The index is SQLite, so a minted token is
+    written atomically and survives restarts, and minting goes through the
+    resumable `NftPipeline`.
+    """
+
+    def __init__(self, pipeline: NftPipeline = nft_pipeline, index: NftIndex = nft_index):
+        self._pipeline = pipeline
+        self._index = index
+        self._specs: dict[str, MintSpec] = {}
+        self._futures: dict[str, Future] = {}
+        self._failed_at: dict[str, float] = {}
+        self._owners: dict[tuple[str, str, str], str] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=MINT_CONCURRENCY, thread_name_prefix="nft-mint")
+
+    def register(self, stream: str, spec: MintSpec) -> None:
+        with self._lock:
+            self._specs[stream] = spec
+
+    def streams(self) -> list[str]:
+        return list(self._specs)
+
+    def start(self) -> None:
+        """Starts resolving the token of every registered stream without waiting for it."""
+        for stream in self.streams():
+            self._resolve(stream)
+
+    def token_nowait(self, stream: str = DEFAULT_STREAM) -> Optional[str]:
+        """The stream's token if it is already known, without waiting."""
+        future = self._futures.get(self._stream(stream))
+        if future is None or not future.done() or future.exception() is not None:
+            return None
+        return future.result()
+
+    async def token(self, stream: str = DEFAULT_STREAM, timeout: float = TOKEN_WAIT_SECONDS) -> str:
+        """The stream's token, waiting up to `timeout` seconds for it to be minted."""
+        stream = self._stream(stream)
+        future = self._resolve(stream)
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"The NFT for stream '{stream}' was not minted within {timeout:.0f}s") from None
+
+    def import_legacy_token(self, stream: str = DEFAULT_STREAM, path: Path = LEGACY_TOKEN_FILE) -> None:
+        """Adopts a token left in the old token.txt for `stream`, so it is not minted again."""
+        try:
+            token = path.read_text(encoding="utf-8").strip()
+        except OSError:
+            return
+        spec = self._specs.get(stream)
+        if not token or spec is None:
+            return
+        try:
+            key = self._key(spec)
+        except OSError as e:
+            # Without the files there is no key to store it under; use it for this run only.
+            logger.warning(f"Using {path.name} token for '{stream}' without indexing it: {e}")
+            future: Future = Future()
+            future.set_result(token)
+            with self._lock:
+                self._futures[stream] = future
+            return
+        if self._index.token(*key) is None:
+            self._index.record_token(*key, token)
+            logger.info(f"Imported the NFT token from {path.name} for '{stream}'")
+
+    def _stream(self, stream: str) -> str:
+        return stream if stream in self._specs else DEFAULT_STREAM
+
+    def _key(self, spec: MintSpec) -> tuple[str, str, str]:
+        return spec.did, self._index.digest(spec.metadata_path), self._index.digest(spec.artifact_path)
+
+    def _resolve(self, stream: str) -> Future:
+        with self._lock:
+            future = self._futures.get(stream)
+            if future is not None:
+                failed = future.done() and future.exception() is not None
+                if not failed or time.monotonic() - self._failed_at.get(stream, 0.0) < MINT_RETRY_SECONDS:
+                    return future
+            spec = self._specs.get(stream)
+            future = Future()
+            if spec is None:
+                future.set_exception(KeyError(f"No NFT stream '{stream}' is configured"))
+                return future
+            self._futures[stream] = future
+        self._executor.submit(self._load_or_mint, stream, spec, future)
+        return future
+
+    def _load_or_mint(self, stream: str, spec: MintSpec, future: Future) -> None:
+        """
+        Settles `future` with the stream's token. Mints and shared streams are
+        chained with callbacks, never waited on, so a pool thread is never
+        blocked on work that needs another pool thread.
+        """
+        try:
+            key = self._key(spec)
+            with self._lock:
+                owner = self._owners.setdefault(key, stream)
+            if owner != stream:
+                if _deploy_settings(self._specs[owner]) != _deploy_settings(spec):
+                    logger.warning(
+                        f"NFT stream '{stream}' has the same DID and files as '{owner}', so it shares "
+                        f"that stream's NFT and its own nft_data/nft_value/quorum_type/password are "
+                        f"ignored; give it its own metadata_path or artifact_path to mint a separate NFT"
+                    )
+                self._resolve(owner).add_done_callback(lambda done: self._settle(stream, future, done))
+                return
+            token = self._index.token(*key)
+            if token is not None:
+                logger.info(f"NFT stream '{stream}' uses token {token}")
+                future.set_result(token)
+                return
+            started = time.monotonic()
+            self._pipeline.submit(spec).add_done_callback(
+                lambda done: self._minted(stream, future, done, started)
+            )
+        except Exception as e:
+            self._fail(stream, future, e)
+
+    def _minted(self, stream: str, future: Future, done: Future, started: float) -> None:
+        if done.exception() is not None:
+            self._fail(stream, future, done.exception())
+            return
+        token = done.result()["nft_token"]
+        logger.info(f"Minted NFT {token} for stream '{stream}' in {time.monotonic() - started:.1f}s")
+        future.set_result(token)
+
+    def _settle(self, stream: str, future: Future, done: Future) -> None:
+        if done.exception() is not None:
+            self._fail(stream, future, done.exception())
+        else:
+            future.set_result(done.result())
+
+    def _fail(self, stream: str, future: Future, error: BaseException) -> None:
+        # Recorded before the future fails, so _resolve never sees a failure without its time.
+        with self._lock:
+            self._failed_at[stream] = time.monotonic()
+        logger.error(f"Could not mint the NFT for stream '{stream}': {error}")
+        future.set_exception(error)
+
+def _deploy_settings(spec: MintSpec) -> tuple:
+    return spec.nft_data, spec.nft_value, spec.quorum_type, spec.password
@@ -1,26 +1,52 @@
-from datetime import date, datetime, timedelta
-from typing import Dict
+import sys
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
 
-# In-memory database for court schedules, mapping date to a dictionary of time slots and party names
-COURT_SCHEDULE: Dict[str, Dict[str, str]] = {}
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
+from utils.calendar_store import DEFAULT_HORIZON_DAYS, IntervalCalendar
 
-def generate_court_schedule():
-    """Generates a schedule for the pickleball court for the next 7 days."""
+# Interval-indexed court calendar: opening hours are free windows, bookings are events
+COURT_SCHEDULE = IntervalCalendar(owner="Court")
+COURT_OPEN = time(8)  # 8 AM
+COURT_CLOSE = time(21)  # last slot starts at 8 PM
+
+
+def generate_court_schedule(horizon_days: int = DEFAULT_HORIZON_DAYS) -> IntervalCalendar:
+    """Generates a schedule for the pickleball court for the next `horizon_days` days."""
     global COURT_SCHEDULE
     today = date.today()
-    possible_times = [f"{h:02}:00" for h in range(8, 21)]  # 8 AM to 8 PM
-
-    for i in range(7):
-        current_date = today + timedelta(days=i)
-        date_str = current_date.strftime("%Y-%m-%d")
-        COURT_SCHEDULE[date_str] = {time: "unknown" for time in possible_times}
+    COURT_SCHEDULE = IntervalCalendar(owner="Court")
+    COURT_SCHEDULE.add_availability_many(
+        (
+            datetime.combine(today + timedelta(days=i), COURT_OPEN),
+            datetime.combine(today + timedelta(days=i), COURT_CLOSE),
+        )
+        for i in range(horizon_days)
+    )
+    return COURT_SCHEDULE
 
 
 # Initialize the schedule when the module is loaded
 generate_court_schedule()
 
 
+def _booked_slots(day: date) -> dict[str, str]:
+    """Maps every booked slot start (HH:MM) on `day` to its reservation name."""
+    start = datetime.combine(day, time())
+    step = timedelta(minutes=COURT_SCHEDULE.slot_minutes)
+    booked = {}
+    for ev_start, ev_end, party in COURT_SCHEDULE.events_between(start, start + timedelta(days=1)):
+        cur = ev_start
+        while cur < ev_end:
+            if cur.date() == day:
+                booked[cur.strftime("%H:%M")] = party
+            cur += step
+    return booked
+
+
 def list_court_availabilities(date: str) -> dict:
     """
     Lists the available and booked time slots for a pickleball court on a given date.
@@ -32,33 +58,25 @@ def list_court_availabilities(date: str) -> dict:
         A dictionary with the status and the detailed schedule for the day.
     """
     try:
-        datetime.strptime(date, "%Y-%m-%d")
+        day = datetime.strptime(date, "%Y-%m-%d").date()
     except ValueError:
         return {
             "status": "error",
             "message": "Invalid date format. Please use YYYY-MM-DD.",
         }
 
-    daily_schedule = COURT_SCHEDULE.get(date)
-    if not daily_schedule:
+    if not COURT_SCHEDULE.is_open(day):
         return {
             "status": "success",
             "message": f"The court is not open on {date}.",
             "schedule": {},
         }
 
-    available_slots = [
-        time for time, party in daily_schedule.items() if party == "unknown"
-    ]
-    booked_slots = {
-        time: party for time, party in daily_schedule.items() if party != "unknown"
-    }
-
     return {
         "status": "success",
         "message": f"Schedule for {date}.",
-        "available_slots": available_slots,
-        "booked_slots": booked_slots,
+        "available_slots": COURT_SCHEDULE.day_slots(day),
+        "booked_slots": _booked_slots(day),
     }
 
 
@@ -89,7 +107,7 @@ def book_pickleball_court(
     if start_dt >= end_dt:
         return {"status": "error", "message": "Start time must be before end time."}
 
-    if date not in COURT_SCHEDULE:
+    if not COURT_SCHEDULE.is_open(start_dt.date()):
         return {"status": "error", "message": f"The court is not open on {date}."}
 
     if not reservation_name:
@@ -98,23 +116,21 @@ def book_pickleball_court(
             "message": "Cannot book a court without a reservation name.",
         }
 
-    required_slots = []
-    current_time = start_dt
-    while current_time < end_dt:
-        required_slots.append(current_time.strftime("%H:%M"))
-        current_time += timedelta(hours=1)
-
-    daily_schedule = COURT_SCHEDULE.get(date, {})
-    for slot in required_slots:
-        if daily_schedule.get(slot, "booked") != "unknown":
-            party = daily_schedule.get(slot)
+    if not COURT_SCHEDULE.is_free(start_dt, end_dt):
+        conflicts = COURT_SCHEDULE.events_between(start_dt, end_dt)
+        if conflicts:
+            slot_start, _, party = conflicts[0]
+            slot = max(slot_start, start_dt).strftime("%H:%M")
             return {
                 "status": "error",
                 "message": f"The time slot {slot} on {date} is already booked by {party}.",
             }
+        return {
+            "status": "error",
+            "message": f"The court is not open from {start_time} to {end_time} on {date}.",
+        }
 
-    for slot in required_slots:
-        COURT_SCHEDULE[date][slot] = reservation_name
+    COURT_SCHEDULE.add_event(start_dt, end_dt, reservation_name)
 
     return {
         "status": "success",
@@ -0,0 +1,140 @@
+"""Webhook that friend servers push task updates to, so the host need not wait on open requests."""
+
+import asyncio
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import uvicorn
+from a2a.types import Task, TaskState
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+logger = logging.getLogger(__name__)
+
+PUSH_ENABLED = os.getenv("HOST_PUSH_ENABLED", "true").lower() != "false"
+PUSH_HOST = os.getenv("HOST_PUSH_HOST", "localhost")
+PUSH_PORT = int(os.getenv("HOST_PUSH_PORT", "10010"))
+
+TOKEN_HEADER = "X-A2A-Notification-Token"
+
+TERMINAL_STATES = {
+    TaskState.completed,
+    TaskState.canceled,
+    TaskState.failed,
+    TaskState.rejected,
+    TaskState.input_required,
+}
+
+
+class PushCallbackReceiver:
+    """
+    Small Starlette app, run by uvicorn on a daemon thread, that receives
+    task updates from friends.
+
+    Callers register interest with `await wait_for(task_id, timeout)`; the
+    coroutine is suspended without holding any connection until the friend
+    pushes a final state. Updates that arrive before anyone waits (fast
+    friends) are kept briefly so they are not lost.
+    """
+
+    def __init__(self, host: str = PUSH_HOST, port: int = PUSH_PORT, keep_early: int = 256):
+        self.host = host
+        self.port = port
+        self.token = secrets.token_urlsafe(24)
+        self.keep_early = keep_early
+        self.received = 0
+        self.rejected = 0
+        self._waiters: dict[str, tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._early: OrderedDict[str, Task] = OrderedDict()
+        self._lock = threading.Lock()
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/a2a/push"
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None and self._server.started
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[Route("/a2a/push", self._handle, methods=["POST"])])
+
+    def start(self, ready_timeout: float = 5.0) -> bool:
+        """Starts serving in the background; returns False if the port could not be bound."""
+        if self._thread is not None:
+            return self.running
+        # log_config=None: log through the host's logging setup rather than uvicorn's own handlers.
+        config = uvicorn.Config(self.app(), host=self.host, port=self.port, log_level="warning", log_config=None)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="push-receiver", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + ready_timeout
+        while not self._server.started and self._thread.is_alive() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        if not self.running:
+            logger.warning(f"Push receiver could not start on {self.url}; friends will be awaited directly.")
+        return self.running
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+
+    async def wait_for(self, task_id: str, timeout: float) -> Optional[Task]:
+        """Waits until `task_id` reaches a final state; returns None on timeout."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            early = self._early.pop(task_id, None)
+            if early is None:
+                self._waiters[task_id] = (loop, future)
+        if early is not None:
+            return early
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            with self._lock:
+                self._waiters.pop(task_id, None)
+
+    async def _handle(self, request: Request) -> Response:
+        # Every friend sends the token it was given; an update without it is not from a friend.
+        token = request.headers.get(TOKEN_HEADER)
+        if token is None or not secrets.compare_digest(token, self.token):
+            self.rejected += 1
+            return JSONResponse({"error": "invalid token"}, status_code=401)
+        try:
+            task = Task.model_validate(await request.json())
+        except Exception:
+            self.rejected += 1
+            return JSONResponse({"error": "invalid task payload"}, status_code=400)
+
+        self.received += 1
+        if task.status.state in TERMINAL_STATES:
+            self._deliver(task)
+        return Response(status_code=204)
+
+    def _deliver(self, task: Task) -> None:
+        with self._lock:
+            waiter = self._waiters.pop(task.id, None)
+            if waiter is None:
+                self._early[task.id] = task
+                while len(self._early) > self.keep_early:
+                    self._early.popitem(last=False)
+                return
+        loop, future = waiter
+        loop.call_soon_threadsafe(_resolve, future, task)
+
+
+def _resolve(future: asyncio.Future, task: Task) -> None:
+    if not future.done():
+        future.set_result(task)
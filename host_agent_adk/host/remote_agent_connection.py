@@ -1,19 +1,38 @@
-from typing import Callable
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+from uuid import uuid4
 
 import httpx
 from a2a.client import A2AClient
 from a2a.types import (
     AgentCard,
+    CancelTaskRequest,
+    CancelTaskResponse,
+    GetTaskRequest,
+    GetTaskSuccessResponse,
+    MessageSendConfiguration,
+    PushNotificationConfig,
     SendMessageRequest,
     SendMessageResponse,
+    SendMessageSuccessResponse,
     Task,
     TaskArtifactUpdateEvent,
+    TaskIdParams,
+    TaskQueryParams,
+    TaskState,
     TaskStatusUpdateEvent,
 )
 from dotenv import load_dotenv
 
+from .latency import MAX_FRIEND_TIMEOUT, LatencyTracker
+from .push_receiver import TERMINAL_STATES as PUSH_FINAL_STATES, PushCallbackReceiver
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 TaskCallbackArg = Task | TaskStatusUpdateEvent | TaskArtifactUpdateEvent
 TaskUpdateCallback = Callable[[TaskCallbackArg, AgentCard], Task]
 
@@ -22,14 +41,22 @@ class RemoteAgentConnections:
     """A class to hold the connections to the remote agents."""
 
     def __init__(self, agent_card: AgentCard, agent_url: str):
-        print(f"agent_card: {agent_card}")
-        print(f"agent_url: {agent_url}")
-        self._httpx_client = httpx.AsyncClient(timeout=30)
+        logger.debug("Connecting to %s at %s", agent_card.name, agent_url)
+        # Per-request timeouts come from the caller's deadline; this is only the backstop.
+        self._httpx_client = httpx.AsyncClient(timeout=MAX_FRIEND_TIMEOUT)
         self.agent_client = A2AClient(self._httpx_client, agent_card, url=agent_url)
         self.card = agent_card
         self.conversation_name = None
         self.conversation = None
         self.pending_tasks = set()
+        self.latency = LatencyTracker()
+        self.hedged_requests = 0
+        # Set by the host when its push callback receiver is running.
+        self.push_receiver: Optional[PushCallbackReceiver] = None
+
+    @property
+    def supports_push(self) -> bool:
+        return self.push_receiver is not None and bool(self.card.capabilities.pushNotifications)
 
     def get_agent(self) -> AgentCard:
         return self.card
@@ -38,3 +65,151 @@ class RemoteAgentConnections:
         self, message_request: SendMessageRequest
     ) -> SendMessageResponse:
         return await self.agent_client.send_message(message_request)
+
+    async def send_and_wait(
+        self, message_request: SendMessageRequest, timeout: float
+    ) -> Optional[SendMessageResponse]:
+        """
+        Sends one request and returns its final response within `timeout`.
+
+        Friends that support push notifications get a non-blocking send
+        carrying our webhook; the call returns as soon as the friend has
+        accepted the task and we wait for the final state to be pushed.
+        If no push arrives in time the task is fetched once before giving up,
+        in case the notification was lost.
+        """
+        if not self.supports_push:
+            return await self.agent_client.send_message(
+                message_request, http_kwargs={"timeout": timeout}
+            )
+
+        started = time.monotonic()
+        message_request.params.configuration = MessageSendConfiguration(
+            acceptedOutputModes=["text", "text/plain"],
+            blocking=False,
+            pushNotificationConfig=PushNotificationConfig(
+                url=self.push_receiver.url, token=self.push_receiver.token
+            ),
+        )
+        response = await self.agent_client.send_message(
+            message_request, http_kwargs={"timeout": timeout}
+        )
+        root = response.root
+        if not isinstance(root, SendMessageSuccessResponse) or not isinstance(root.result, Task):
+            return response
+        if root.result.status.state in PUSH_FINAL_STATES:
+            return response
+
+        task_id = root.result.id
+        task = await self.push_receiver.wait_for(task_id, timeout - (time.monotonic() - started))
+        if task is None:
+            fetched = await self.agent_client.get_task(
+                GetTaskRequest(id=str(uuid4()), params=TaskQueryParams(id=task_id))
+            )
+            if not isinstance(fetched.root, GetTaskSuccessResponse):
+                return None
+            task = fetched.root.result
+            if task.status.state not in PUSH_FINAL_STATES:
+                return None
+        return SendMessageResponse(root=SendMessageSuccessResponse(id=root.id, result=task))
+
+    async def send_with_deadline(
+        self,
+        make_request: Callable[[float], SendMessageRequest],
+        budget: float,
+        hedge: bool = True,
+    ) -> Optional[SendMessageResponse]:
+        """
+        Sends a message and waits at most `budget` seconds for the answer.
+
+        `make_request(budget)` must build a request with a fresh task id; it
+        is called again for the hedged copy, which is sent once the first
+        attempt has been outstanding for longer than this friend's p95.
+        The first good answer wins and the losing attempts are cancelled on
+        the friend. Returns None when nothing came back in time.
+        """
+        started = time.monotonic()
+        hedge_after = self.latency.p95() if hedge else None
+        attempts: dict[asyncio.Task, str] = {}
+        last_response: Optional[SendMessageResponse] = None
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            remaining = budget - (time.monotonic() - started)
+            request = make_request(remaining)
+            attempt = asyncio.ensure_future(self.send_and_wait(request, remaining))
+            attempts[attempt] = request.params.message.taskId
+
+        launch()
+        try:
+            while attempts:
+                elapsed = time.monotonic() - started
+                wait = budget - elapsed
+                if wait <= 0:
+                    break
+                if hedge_after is not None:
+                    wait = min(wait, max(hedge_after - elapsed, 0.0))
+                done, _ = await asyncio.wait(
+                    attempts, timeout=wait, return_when=asyncio.FIRST_COMPLETED
+                )
+                for attempt in done:
+                    task_id = attempts.pop(attempt)
+                    if attempt.exception() is not None:
+                        last_error = attempt.exception()
+                        continue
+                    if attempt.result() is None:
+                        # Accepted but never finished in time: stop it on the friend.
+                        self.cancel_in_background(task_id)
+                        self.latency.observe(budget)
+                        continue
+                    last_response = attempt.result()
+                    if _answered(last_response):
+                        self.latency.observe(time.monotonic() - started)
+                        return last_response
+                if hedge_after is not None and time.monotonic() - started >= hedge_after:
+                    hedge_after = None
+                    if attempts:
+                        self.hedged_requests += 1
+                        launch()
+
+            if attempts:
+                # Deadline passed: count it so the adaptive timeout backs off.
+                self.latency.observe(budget)
+                return None
+            if last_response is None and last_error is not None:
+                raise last_error
+            return last_response
+        finally:
+            for attempt, task_id in attempts.items():
+                attempt.cancel()
+                self.cancel_in_background(task_id)
+
+    async def cancel_task(self, task_id: str) -> CancelTaskResponse:
+        """Asks the remote agent to stop working on `task_id`."""
+        request = CancelTaskRequest(id=str(uuid4()), params=TaskIdParams(id=task_id))
+        return await self.agent_client.cancel_task(request)
+
+    def cancel_in_background(self, task_id: str) -> None:
+        """
+        Fires a `tasks/cancel` for abandoned work without blocking the caller.
+        The asyncio task is kept in `pending_tasks` until it finishes.
+        """
+
+        async def _cancel() -> None:
+            try:
+                await self.cancel_task(task_id)
+            except Exception as e:
+                logger.warning("Failed to cancel task %s on %s: %s", task_id, self.card.name, e)
+
+        task = asyncio.get_running_loop().create_task(_cancel())
+        self.pending_tasks.add(task)
+        task.add_done_callback(self.pending_tasks.discard)
+
+
+def _answered(response: SendMessageResponse) -> bool:
+    root = response.root
+    return (
+        isinstance(root, SendMessageSuccessResponse)
+        and isinstance(root.result, Task)
+        and root.result.status.state not in (TaskState.failed, TaskState.canceled)
+    )
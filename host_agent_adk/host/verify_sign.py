@@ -1,10 +1,13 @@
 import json
+import logging
 import os
 from pathlib import Path
 import requests
 from typing import Optional
 
 from utils.node_client import NodeClient
+from utils.sign_sidecar import SidecarError, SidecarUnavailable, sidecar
+from utils.tracing import traced
 
 
 class APIError(Exception):
@@ -15,7 +18,10 @@ class APIError(Exception):
 node = NodeClient(framework="host")
 default_base_url = node.get_base_url()  
 
+logger = logging.getLogger(__name__)
 
+
+@traced("node.verify_signature")
 def verify_signature(
     signer_did: str,
     signed_msg: str,
@@ -27,6 +33,14 @@ def verify_signature(
     Calls GET /api/verify-signature to verify a signature for a given DID and signed message.
     Returns True if verification passed, False otherwise.
     """
+    if sidecar is not None:
+        try:
+            return sidecar.verify(default_base_url, signer_did, signed_msg, signature)
+        except SidecarUnavailable as e:
+            logger.warning(f"Verifying without the sidecar: {e}")
+        except SidecarError as e:
+            raise APIError(str(e)) from e
+
     url = (default_base_url).rstrip("/") + "/api/verify-signature"
     params = {
         "signer_did": signer_did,
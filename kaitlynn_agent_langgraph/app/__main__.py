@@ -2,11 +2,7 @@ import logging
 import os
 import sys
 
-import httpx
-import uvicorn
 from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryPushNotifier, InMemoryTaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
@@ -15,10 +11,18 @@ from a2a.types import (
 from app.agent import KaitlynAgent
 from app.agent_executor import KaitlynAgentExecutor
 from dotenv import load_dotenv
+from utils.prefork import serve
+from utils.push_delivery import QueuedPushNotifier
+from utils.request_handler import NonBlockingRequestHandler
+from utils.metrics import instrument
+from utils.structured_log import configure_logging
+from utils.task_store import TieredTaskStore
+from utils.tracing import configure as configure_tracing
 
 load_dotenv()
 
-logging.basicConfig(level=logging.INFO)
+# Logs go through a queue to a background writer; LOG_LEVEL / LOG_FORMAT tune them.
+configure_logging("kaitlynn")
 logger = logging.getLogger(__name__)
 
 
@@ -28,6 +32,7 @@ class MissingAPIKeyError(Exception):
 
 def main():
     """Starts Kaitlyn's Agent server."""
+    configure_tracing("kaitlynn")
     host = "localhost"
     port = 10004
     try:
@@ -53,17 +58,26 @@ def main():
             skills=[skill],
         )
 
-        httpx_client = httpx.AsyncClient()
-        request_handler = DefaultRequestHandler(
-            agent_executor=KaitlynAgentExecutor(),
-            task_store=InMemoryTaskStore(),
-            push_notifier=InMemoryPushNotifier(httpx_client),
+        agent_executor = KaitlynAgentExecutor()
+        task_store = TieredTaskStore.from_env("kaitlynn")
+        push_notifier = QueuedPushNotifier.from_env()
+        request_handler = NonBlockingRequestHandler(
+            agent_executor=agent_executor,
+            task_store=task_store,
+            push_notifier=push_notifier,
         )
         server = A2AStarletteApplication(
             agent_card=agent_card, http_handler=request_handler
         )
+        app = instrument(
+            server.build(),
+            in_flight_tasks=agent_executor.in_flight,
+            task_store=task_store,
+            push_notifier=push_notifier,
+        )
 
-        uvicorn.run(server.build(), host=host, port=port)
+        # AGENT_WORKERS > 1 forks that many server processes on one socket.
+        serve(app, host=host, port=port)
 
     except MissingAPIKeyError as e:
         logger.error(f"Error: {e}")
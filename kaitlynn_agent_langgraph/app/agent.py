@@ -1,45 +1,79 @@
+import asyncio
+import os
 import random
+import sys
 from collections.abc import AsyncIterable
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
 from typing import Any, List, Literal
 
-from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.messages import AIMessage, RemoveMessage, ToolMessage, trim_messages
 from langchain_core.runnables import RunnableConfig
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
 from langgraph.prebuilt import create_react_agent
 from pydantic import BaseModel, Field
 
-memory = MemorySaver()
+from app.checkpointer import SqliteCheckpointSaver
 
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
-def generate_kaitlyns_calendar() -> dict[str, list[str]]:
-    """Generates Kaitlyn's calendar for the next 7 days."""
-    calendar = {}
+from utils.calendar_store import (
+    DEFAULT_HORIZON_DAYS,
+    DEFAULT_SLOT_MINUTES,
+    IntervalCalendar,
+    SharedCalendar,
+    iter_days,
+    load_shared_calendar,
+)
+from utils.tracing import span
+
+memory = SqliteCheckpointSaver.from_env()
+
+# Messages kept in a thread's state; older turns are trimmed before each model call.
+MAX_HISTORY_MESSAGES = int(os.getenv("KAITLYNN_MAX_HISTORY_MESSAGES", "20"))
+
+# Graph runs allowed in flight at once; further requests wait their turn.
+MAX_CONCURRENCY = int(os.getenv("KAITLYNN_MAX_CONCURRENCY", "32"))
+
+
+def generate_kaitlyns_calendar(horizon_days: int = DEFAULT_HORIZON_DAYS) -> IntervalCalendar:
+    """Generates Kaitlyn's calendar for the next `horizon_days` days."""
+    calendar = IntervalCalendar(owner="Kaitlyn", slot_minutes=DEFAULT_SLOT_MINUTES)
     today = date.today()
+    windows = []
     # Kaitlyn's availability: evenings on weekdays, more free on weekends.
-    for i in range(7):
+    for i in range(horizon_days):
         current_date = today + timedelta(days=i)
-        date_str = current_date.strftime("%Y-%m-%d")
         day_of_week = current_date.weekday()  # Monday is 0 and Sunday is 6
 
         if day_of_week < 5:  # Weekday
-            possible_times = [f"{h:02}:00" for h in range(18, 22)]  # 6 PM to 10 PM
-            available_slots = sorted(
-                random.sample(possible_times, random.randint(2, 3))
-            )
+            possible_hours = list(range(18, 22))  # 6 PM to 10 PM
+            hours = random.sample(possible_hours, random.randint(2, 3))
         else:  # Weekend
-            possible_times = [f"{h:02}:00" for h in range(10, 20)]  # 10 AM to 8 PM
-            available_slots = sorted(
-                random.sample(possible_times, random.randint(4, 6))
-            )
+            possible_hours = list(range(10, 20))  # 10 AM to 8 PM
+            hours = random.sample(possible_hours, random.randint(4, 6))
 
-        calendar[date_str] = available_slots
+        for hour in hours:
+            start = datetime.combine(current_date, time(hour))
+            windows.append((start, start + timedelta(hours=1)))
+    calendar.add_availability_many(windows)
     return calendar
 
 
-KAITLYNS_CALENDAR = generate_kaitlyns_calendar()
+def load_kaitlyns_calendar() -> SharedCalendar:
+    """
+    Kaitlyn's calendar from the shared calendar store, so every worker process
+    serves the same one. Imported from KAITLYNN_CALENDAR_PATH (.ics/.json) if set,
+    otherwise generated once.
+    """
+    return load_shared_calendar(owner="Kaitlyn", generate=generate_kaitlyns_calendar, path=os.getenv("KAITLYNN_CALENDAR_PATH"))
+
+
+KAITLYNS_CALENDAR = load_kaitlyns_calendar()
 
 
 class AvailabilityToolInput(BaseModel):
@@ -54,8 +88,7 @@ class AvailabilityToolInput(BaseModel):
     )
 
 
-@tool(args_schema=AvailabilityToolInput)
-def get_availability(date_range: str) -> str:
+def _check_availability(date_range: str) -> str:
     """Use this to get Kaitlyn's availability for a given date or date range."""
     dates_to_check = [d.strip() for d in date_range.split("to")]
     start_date_str = dates_to_check[0]
@@ -68,12 +101,11 @@ def get_availability(date_range: str) -> str:
         if start > end:
             return "Invalid date range. The start date cannot be after the end date."
 
+        calendar = KAITLYNS_CALENDAR.current()
         results = []
-        delta = end - start
-        for i in range(delta.days + 1):
-            day = start + timedelta(days=i)
+        for day in iter_days(start, end):
             date_str = day.strftime("%Y-%m-%d")
-            available_slots = KAITLYNS_CALENDAR.get(date_str, [])
+            available_slots = calendar.day_slots(day)
             if available_slots:
                 availability = (
                     f"On {date_str}, Kaitlyn is available at: "
@@ -92,6 +124,41 @@ def get_availability(date_range: str) -> str:
         )
 
 
+async def _acheck_availability(date_range: str) -> str:
+    """Use this to get Kaitlyn's availability for a given date or date range."""
+    # The lookups themselves are O(log n), but KAITLYNS_CALENDAR.current() may
+    # query SQLite and reload the calendar, so keep it off the event loop.
+    return await asyncio.to_thread(_check_availability, date_range)
+
+
+get_availability = StructuredTool.from_function(
+    func=_check_availability,
+    coroutine=_acheck_availability,
+    name="get_availability",
+    args_schema=AvailabilityToolInput,
+)
+
+
+def trim_history(state: dict) -> dict:
+    """
+    Pre-model hook: once a thread holds more than MAX_HISTORY_MESSAGES
+    messages, rewrite its state to the most recent ones (starting on a user
+    turn so tool calls are never split), keeping checkpoints and prompts bounded.
+    """
+    messages = state["messages"]
+    if len(messages) <= MAX_HISTORY_MESSAGES:
+        return {}
+    trimmed = trim_messages(
+        messages,
+        max_tokens=MAX_HISTORY_MESSAGES,
+        token_counter=len,
+        strategy="last",
+        start_on="human",
+        include_system=True,
+    )
+    return {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *trimmed]}
+
+
 class ResponseFormat(BaseModel):
     """Respond to the user in this format."""
 
@@ -120,6 +187,7 @@ class KaitlynAgent:
     def __init__(self):
         self.model = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
         self.tools = [get_availability]
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
 
         self.graph = create_react_agent(
             self.model,
@@ -127,6 +195,7 @@ class KaitlynAgent:
             checkpointer=memory,
             prompt=self.SYSTEM_INSTRUCTION,
             response_format=ResponseFormat,
+            pre_model_hook=trim_history,
         )
 
     def invoke(self, query, context_id):
@@ -142,29 +211,33 @@ class KaitlynAgent:
         inputs = {"messages": [("user", augmented_query)]}
         config: RunnableConfig = {"configurable": {"thread_id": context_id}}
 
-        for item in self.graph.stream(inputs, config, stream_mode="values"):
-            message = item["messages"][-1]
-            if (
-                isinstance(message, AIMessage)
-                and message.tool_calls
-                and len(message.tool_calls) > 0
-            ):
-                yield {
-                    "is_task_complete": False,
-                    "require_user_input": False,
-                    "content": "Checking Kaitlyn's availability...",
-                }
-            elif isinstance(message, ToolMessage):
-                yield {
-                    "is_task_complete": False,
-                    "require_user_input": False,
-                    "content": "Processing availability...",
-                }
-
-        yield self.get_agent_response(config)
+        async with self._semaphore:
+            with span("langgraph.astream", thread_id=context_id):
+                async for item in self.graph.astream(inputs, config, stream_mode="values"):
+                    message = item["messages"][-1]
+                    if (
+                        isinstance(message, AIMessage)
+                        and message.tool_calls
+                        and len(message.tool_calls) > 0
+                    ):
+                        yield {
+                            "is_task_complete": False,
+                            "require_user_input": False,
+                            "content": "Checking Kaitlyn's availability...",
+                        }
+                    elif isinstance(message, ToolMessage):
+                        yield {
+                            "is_task_complete": False,
+                            "require_user_input": False,
+                            "content": "Processing availability...",
+                        }
+            current_state = await self.graph.aget_state(config)
+        yield self._format_response(current_state)
 
     def get_agent_response(self, config):
-        current_state = self.graph.get_state(config)
+        return self._format_response(self.graph.get_state(config))
+
+    def _format_response(self, current_state):
         structured_response = current_state.values.get("structured_response")
         if structured_response and isinstance(structured_response, ResponseFormat):
             if structured_response.status == "input_required":
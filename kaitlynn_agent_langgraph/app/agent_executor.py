@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import os
@@ -17,6 +18,8 @@ from a2a.types import (
 from a2a.utils.errors import ServerError
 from app.agent import KaitlynAgent
 from app.sign_api import sign_message
+from utils.deadline import budget_from_metadata
+from utils.tracing import span, traceparent_from_metadata
 from utils.node_client import NodeClient 
 
 logging.basicConfig(level=logging.INFO)
@@ -32,6 +35,10 @@ class KaitlynAgentExecutor(AgentExecutor):
 
     def __init__(self):
         self.agent = KaitlynAgent()
+        self._running: dict[str, asyncio.Task] = {}
+
+    def in_flight(self) -> int:
+        return len(self._running)
 
     async def execute(
         self,
@@ -43,6 +50,27 @@ class KaitlynAgentExecutor(AgentExecutor):
         if not context.message:
             raise ValueError("RequestContext must have a message")
 
+        self._running[context.task_id] = asyncio.current_task()
+        budget = budget_from_metadata(context.message.metadata)
+        with span("kaitlynn.execute", parent=traceparent_from_metadata(context.message.metadata), task_id=context.task_id):
+            try:
+                await asyncio.wait_for(self._execute(context, event_queue), timeout=budget)
+            except asyncio.TimeoutError:
+                logger.warning(f"Task {context.task_id} ran past the host's {budget:.1f}s deadline")
+                updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+                await updater.failed(
+                    message=updater.new_agent_message(
+                        [Part(root=TextPart(text="Kaitlynn could not answer before the deadline."))]
+                    )
+                )
+            finally:
+                self._running.pop(context.task_id, None)
+
+    async def _execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
         updater = TaskUpdater(event_queue, context.task_id, context.context_id)
         if not context.current_task:
             await updater.submit()
@@ -77,7 +105,7 @@ class KaitlynAgentExecutor(AgentExecutor):
                     envelope_json = json.dumps(envelope, sort_keys=True)
                     try:
                         did = default_did
-                        signature = sign_message(envelope_json, did)
+                        signature = await asyncio.to_thread(sign_message, envelope_json, did)
                     except Exception as e:
                         logger.error(f"Error signing envelope: {e}")
                         signature = ""
@@ -102,4 +130,13 @@ class KaitlynAgentExecutor(AgentExecutor):
             logger.error(f"Error during execution: {e}")
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
-        raise ServerError(error=UnsupportedOperationError())
\ No newline at end of file
+        """Stops the graph stream (and any pending signing call) for the task."""
+        if not context.task_id or not context.context_id:
+            raise ServerError(error=UnsupportedOperationError())
+
+        running = self._running.pop(context.task_id, None)
+        if running is not None and not running.done():
+            running.cancel()
+
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.update_status(TaskState.canceled, final=True)
@@ -1,4 +1,5 @@
 import json
+import logging
 import os
 from pathlib import Path
 import requests
@@ -10,6 +11,8 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from utils.node_client import NodeClient 
+from utils.sign_sidecar import SidecarError, SidecarUnavailable, resolve_did, sidecar
+from utils.tracing import traced
 
 class APIError(Exception):
     """Raised when the external API call fails or returns invalid data."""
@@ -19,9 +22,12 @@ default_password = "mypassword"
 
 node = NodeClient(framework="langgraph")
 default_base_url = node.get_base_url()  
-default_did = node.get_did()
+default_did = resolve_did(node)
 print("✅ Using DID for signing:", default_did)
+logger = logging.getLogger(__name__)
 
+
+@traced("node.sign_message")
 def sign_message(msg_hash: str, did: str | None = None, password: str | None = None) -> str:
     """
     Send a SHA-256 hex digest to the `/api/sign` endpoint to get back either:
@@ -46,6 +52,14 @@ def sign_message(msg_hash: str, did: str | None = None, password: str | None = N
     pw = default_password
     base = default_base_url.rstrip('/')
 
+    if sidecar is not None:
+        try:
+            return sidecar.sign(base, target_did, msg_hash, pw)
+        except SidecarUnavailable as e:
+            logger.warning(f"Signing without the sidecar: {e}")
+        except SidecarError as e:
+            raise APIError(str(e)) from e
+
     try:
         resp = requests.post(
             f"{base}/api/sign",
@@ -1,10 +1,7 @@
 import logging
 import os
 
-import uvicorn
 from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
@@ -16,11 +13,19 @@ from dotenv import load_dotenv
 from google.adk.artifacts import InMemoryArtifactService
 from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from utils.prefork import serve
+from utils.push_delivery import QueuedPushNotifier
+from utils.request_handler import NonBlockingRequestHandler
+from utils.session_service import BoundedSessionService
+from utils.metrics import instrument
+from utils.structured_log import configure_logging
+from utils.task_store import TieredTaskStore
+from utils.tracing import configure as configure_tracing
 
 load_dotenv()
 
-logging.basicConfig(level=logging.INFO)
+# Logs go through a queue to a background writer; LOG_LEVEL / LOG_FORMAT tune them.
+configure_logging("karley")
 logger = logging.getLogger(__name__)
 
 
@@ -32,6 +37,7 @@ class MissingAPIKeyError(Exception):
 
 def main():
     """Starts the agent server."""
+    configure_tracing("karley")
     host = "localhost"
     port = 10002
     try:
@@ -42,7 +48,7 @@ def main():
                     "GOOGLE_API_KEY environment variable not set and GOOGLE_GENAI_USE_VERTEXAI is not TRUE."
                 )
 
-        capabilities = AgentCapabilities(streaming=True)
+        capabilities = AgentCapabilities(streaming=True, pushNotifications=True)
         skill = AgentSkill(
             id="check_schedule",
             name="Check Karley's Schedule",
@@ -62,24 +68,36 @@ def main():
         )
 
         adk_agent = create_agent()
+        session_service = BoundedSessionService.from_env()
         runner = Runner(
             app_name=agent_card.name,
             agent=adk_agent,
             artifact_service=InMemoryArtifactService(),
-            session_service=InMemorySessionService(),
+            session_service=session_service,
             memory_service=InMemoryMemoryService(),
         )
         agent_executor = KarleyAgentExecutor(runner)
+        task_store = TieredTaskStore.from_env("karley")
+        push_notifier = QueuedPushNotifier.from_env()
 
-        request_handler = DefaultRequestHandler(
+        request_handler = NonBlockingRequestHandler(
             agent_executor=agent_executor,
-            task_store=InMemoryTaskStore(),
+            task_store=task_store,
+            push_notifier=push_notifier,
         )
         server = A2AStarletteApplication(
             agent_card=agent_card, http_handler=request_handler
         )
+        app = instrument(
+            server.build(),
+            in_flight_tasks=agent_executor.in_flight,
+            task_store=task_store,
+            push_notifier=push_notifier,
+            session_count=session_service.session_count,
+        )
 
-        uvicorn.run(server.build(), host=host, port=port)
+        # AGENT_WORKERS > 1 forks that many server processes on one socket.
+        serve(app, host=host, port=port)
     except MissingAPIKeyError as e:
         logger.error(f"Error: {e}")
         exit(1)
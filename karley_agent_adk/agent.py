@@ -1,29 +1,56 @@
+import os
 import random
-from datetime import date, datetime, timedelta
+import sys
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
 
 from google.adk.agents import LlmAgent
 
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
-def generate_karley_calendar() -> dict[str, list[str]]:
-    """Generates a random calendar for Karley for the next 7 days."""
-    calendar = {}
+from utils.calendar_store import (
+    DEFAULT_HORIZON_DAYS,
+    DEFAULT_SLOT_MINUTES,
+    IntervalCalendar,
+    SharedCalendar,
+    iter_days,
+    load_shared_calendar,
+)
+
+
+def generate_karley_calendar(horizon_days: int = DEFAULT_HORIZON_DAYS) -> IntervalCalendar:
+    """Generates a random calendar for Karley over the next `horizon_days` days."""
+    calendar = IntervalCalendar(owner="Karley", slot_minutes=DEFAULT_SLOT_MINUTES)
     today = date.today()
-    possible_times = [f"{h:02}:00" for h in range(8, 21)]  # 8 AM to 8 PM
+    possible_hours = list(range(8, 21))  # 8 AM to 8 PM
 
-    for i in range(7):
+    windows = []
+    for i in range(horizon_days):
         current_date = today + timedelta(days=i)
-        date_str = current_date.strftime("%Y-%m-%d")
 
-        # Select 8 random unique time slots to increase availability
-        available_slots = sorted(random.sample(possible_times, 8))
-        calendar[date_str] = available_slots
+        # Select 8 random unique hours to increase availability
+        for hour in random.sample(possible_hours, 8):
+            start = datetime.combine(current_date, time(hour))
+            windows.append((start, start + timedelta(hours=1)))
+    calendar.add_availability_many(windows)
 
     print("Karley's calendar:", calendar)
 
     return calendar
 
 
-KARLEY_CALENDAR = generate_karley_calendar()
+def load_karley_calendar() -> SharedCalendar:
+    """
+    Karley's calendar from the shared calendar store, so every worker process
+    serves the same one. Imported from KARLEY_CALENDAR_PATH (.ics/.json) if set,
+    otherwise generated once.
+    """
+    return load_shared_calendar(owner="Karley", generate=generate_karley_calendar, path=os.getenv("KARLEY_CALENDAR_PATH"))
+
+
+KARLEY_CALENDAR = load_karley_calendar()
 
 
 def get_availability(start_date: str, end_date: str) -> str:
@@ -44,12 +71,11 @@ def get_availability(start_date: str, end_date: str) -> str:
         if start > end:
             return "Invalid date range. The start date cannot be after the end date."
 
+        calendar = KARLEY_CALENDAR.current()
         results = []
-        delta = end - start
-        for i in range(delta.days + 1):
-            day = start + timedelta(days=i)
+        for day in iter_days(start, end):
             date_str = day.strftime("%Y-%m-%d")
-            available_slots = KARLEY_CALENDAR.get(date_str, [])
+            available_slots = calendar.day_slots(day)
             if available_slots:
                 availability = f"On {date_str}, Karley is available at: {', '.join(available_slots)}."
                 results.append(availability)
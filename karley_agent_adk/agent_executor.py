@@ -11,9 +11,7 @@ from a2a.server.agent_execution.context import RequestContext
 from a2a.server.events.event_queue import EventQueue
 from a2a.server.tasks import TaskUpdater
 from a2a.types import (
-    FilePart,
-    FileWithBytes,
-    FileWithUri,
+    InvalidParamsError,
     Part,
     TaskState,
     TextPart,
@@ -24,6 +22,7 @@ from google.adk import Runner
 from google.adk.events import Event
 from google.genai import types
 
+from part_converters import AttachmentError, convert_a2a_parts_to_genai, convert_genai_parts_to_a2a
 from sign_api import sign_message
 import sys
 from pathlib import Path
@@ -32,6 +31,8 @@ ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from utils.deadline import budget_from_metadata
+from utils.tracing import span, traceparent_from_metadata
 from utils.node_client import NodeClient 
 
 logger = logging.getLogger(__name__)
@@ -49,6 +50,9 @@ class KarleyAgentExecutor(AgentExecutor):
         self.runner = runner
         self._running_sessions = {}
 
+    def in_flight(self) -> int:
+        return len(self._running_sessions)
+
     def _run_agent(
         self, session_id, new_message: types.Content
     ) -> AsyncGenerator[Event, None]:
@@ -65,7 +69,21 @@ class KarleyAgentExecutor(AgentExecutor):
         session_obj = await self._upsert_session(session_id)
         session_id = session_obj.id
 
-        async for event in self._run_agent(session_id, new_message):
+        events = self._run_agent(session_id, new_message)
+        try:
+            with span("adk.run", session_id=session_id):
+                await self._consume_events(events, new_message, task_updater)
+        finally:
+            # Closing the generator stops ADK's run_async if we were cancelled mid-run.
+            await events.aclose()
+
+    async def _consume_events(
+        self,
+        events: AsyncGenerator[Event, None],
+        new_message: types.Content,
+        task_updater: TaskUpdater,
+    ) -> None:
+        async for event in events:
             if event.is_final_response():
                
                 parts = convert_genai_parts_to_a2a(
@@ -84,7 +102,7 @@ class KarleyAgentExecutor(AgentExecutor):
                 env_json = json.dumps(envelope, sort_keys=True)
 
                 did = default_did
-                signature = sign_message(env_json, did)
+                signature = await asyncio.to_thread(sign_message, env_json, did)
 
                 payload = {
                     "agent":     did,
@@ -127,21 +145,50 @@ class KarleyAgentExecutor(AgentExecutor):
             raise ValueError("RequestContext must have task_id and context_id")
         if not context.message:
             raise ValueError("RequestContext must have a message")
+        try:
+            new_message = types.UserContent(parts=convert_a2a_parts_to_genai(context.message.parts))
+        except AttachmentError as e:
+            raise ServerError(error=InvalidParamsError(message=str(e))) from e
 
         updater = TaskUpdater(event_queue, context.task_id, context.context_id)
         if not context.current_task:
             updater.submit()
         updater.start_work()
-        await self._process_request(
-            types.UserContent(
-                parts=convert_a2a_parts_to_genai(context.message.parts),
-            ),
-            context.context_id,
-            updater,
-        )
+        with span("karley.execute", parent=traceparent_from_metadata(context.message.metadata), task_id=context.task_id):
+            self._running_sessions[context.task_id] = asyncio.current_task()
+            budget = budget_from_metadata(context.message.metadata)
+            try:
+                await asyncio.wait_for(
+                    self._process_request(
+                        new_message,
+                        context.context_id,
+                        updater,
+                    ),
+                    timeout=budget,
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Task {context.task_id} ran past the host's {budget:.1f}s deadline")
+                updater.update_status(
+                    TaskState.failed,
+                    message=updater.new_agent_message(
+                        [Part(root=TextPart(text="Karley could not answer before the deadline."))]
+                    ),
+                    final=True,
+                )
+            finally:
+                self._running_sessions.pop(context.task_id, None)
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue):
-        raise ServerError(error=UnsupportedOperationError())
+        """Stops the in-flight ADK run (and any pending signing call) for the task."""
+        if not context.task_id or not context.context_id:
+            raise ServerError(error=UnsupportedOperationError())
+
+        running = self._running_sessions.pop(context.task_id, None)
+        if running is not None and not running.done():
+            running.cancel()
+
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        updater.update_status(TaskState.canceled, final=True)
 
     async def _upsert_session(self, session_id: str):
         session = await self.runner.session_service.get_session(
@@ -156,69 +203,3 @@ class KarleyAgentExecutor(AgentExecutor):
         if session is None:
             raise RuntimeError(f"Failed to get or create session: {session_id}")
         return session
-
-
-def convert_a2a_parts_to_genai(parts: list[Part]) -> list[types.Part]:
-    """Convert a list of A2A Part types into a list of Google Gen AI Part types."""
-    return [convert_a2a_part_to_genai(part) for part in parts]
-
-
-def convert_a2a_part_to_genai(part: Part) -> types.Part:
-    """Convert a single A2A Part type into a Google Gen AI Part type."""
-    root = part.root
-    if isinstance(root, TextPart):
-        return types.Part(text=root.text)
-    if isinstance(root, FilePart):
-        if isinstance(root.file, FileWithUri):
-            return types.Part(
-                file_data=types.FileData(
-                    file_uri=root.file.uri, mime_type=root.file.mimeType
-                )
-            )
-        if isinstance(root.file, FileWithBytes):
-            return types.Part(
-                inline_data=types.Blob(
-                    data=root.file.bytes.encode("utf-8"),
-                    mime_type=root.file.mimeType or "application/octet-stream",
-                )
-            )
-        raise ValueError(f"Unsupported file type: {type(root.file)}")
-    raise ValueError(f"Unsupported part type: {type(part)}")
-
-
-def convert_genai_parts_to_a2a(parts: list[types.Part]) -> list[Part]:
-    """Convert a list of Google Gen AI Part types into a list of A2A Part types."""
-    return [
-        convert_genai_part_to_a2a(part)
-        for part in parts
-        if (part.text or part.file_data or part.inline_data)
-    ]
-
-
-def convert_genai_part_to_a2a(part: types.Part) -> Part:
-    """Convert a single Google Gen AI Part type into an A2A Part type."""
-    if part.text:
-        return Part(root=TextPart(text=part.text))
-    if part.file_data:
-        if not part.file_data.file_uri:
-            raise ValueError("File URI is missing")
-        return Part(
-            root=FilePart(
-                file=FileWithUri(
-                    uri=part.file_data.file_uri,
-                    mimeType=part.file_data.mime_type,
-                )
-            )
-        )
-    if part.inline_data:
-        if not part.inline_data.data:
-            raise ValueError("Inline data is missing")
-        return Part(
-            root=FilePart(
-                file=FileWithBytes(
-                    bytes=part.inline_data.data.decode("utf-8"),
-                    mimeType=part.inline_data.mime_type,
-                )
-            )
-        )
-    raise ValueError(f"Unsupported part type: {part}")
\ No newline at end of file
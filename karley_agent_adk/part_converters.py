@@ -0,0 +1,198 @@
+"""
+Converters between A2A parts and Google Gen AI parts.
+
+`FileWithBytes.bytes` is base64 text, so it is decoded to raw bytes on the
+way in and encoded on the way out (it used to be `.encode("utf-8")`d,
+which handed the model the base64 text instead of the file). Sizes are
+checked from the base64 length before anything is decoded.
+
+Agents on one machine can opt in to skipping base64 for big files: with
+PART_SPILL_BYTES set, outgoing inline data above it is written to
+PART_SPILL_DIR (created private to this user) and sent as a `file://` URI,
+and incoming `file://` URIs inside that directory are read back (through
+mmap) into inline data for the model. Other URIs are passed to the model
+untouched.
+"""
+
+import base64
+import binascii
+import logging
+import mimetypes
+import mmap
+import os
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from a2a.types import FilePart, FileWithBytes, FileWithUri, Part, TextPart
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# Largest attachment accepted, per part and per message.
+PART_MAX_BYTES = int(os.getenv("PART_MAX_BYTES", str(20 * 1024 * 1024)))
+PART_MAX_MESSAGE_BYTES = int(os.getenv("PART_MAX_MESSAGE_BYTES", str(32 * 1024 * 1024)))
+# Outgoing inline data above this is written to PART_SPILL_DIR instead of base64-encoded;
+# 0 (the default) always sends base64, since a file:// URI only works on this machine.
+PART_SPILL_BYTES = int(os.getenv("PART_SPILL_BYTES", "0"))
+PART_SPILL_DIR = Path(os.getenv("PART_SPILL_DIR") or Path(tempfile.gettempdir()) / "a2a_parts")
+PART_SPILL_TTL_SECONDS = float(os.getenv("PART_SPILL_TTL_SECONDS", "3600"))
+
+
+class AttachmentError(ValueError):
+    """An attachment is malformed or larger than the configured limits."""
+
+
+def decoded_size(b64: str) -> int:
+    """Size of the data in a base64 string, without decoding it."""
+    length = len(b64.rstrip("="))
+    return length * 3 // 4
+
+
+def decode_base64(b64: str, limit: int = PART_MAX_BYTES) -> bytes:
+    size = decoded_size(b64)
+    if size > limit:
+        raise AttachmentError(f"Attachment is {size} bytes; the limit is {limit}")
+    try:
+        return base64.b64decode(b64, validate=True)
+    except binascii.Error as e:
+        raise AttachmentError(f"Attachment is not valid base64: {e}") from e
+
+
+def encode_base64(data: bytes) -> str:
+    return binascii.b2a_base64(memoryview(data), newline=False).decode("ascii")
+
+
+def spill(data: bytes, mime_type: str | None) -> str:
+    """Writes `data` to the spill directory and returns its file:// URI."""
+    # Spilled files are other users' attachments; keep the directory private.
+    PART_SPILL_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    os.chmod(PART_SPILL_DIR, 0o700)
+    _sweep_spill_dir()
+    path = PART_SPILL_DIR / (uuid.uuid4().hex + (mimetypes.guess_extension(mime_type or "") or ""))
+    with open(path, "wb") as f:
+        f.write(memoryview(data))
+    return path.as_uri()
+
+
+def read_spilled(uri: str, limit: int = PART_MAX_BYTES) -> bytes | None:
+    """Bytes of a file:// URI inside the spill directory, or None for any other URI."""
+    parsed = urlparse(uri)
+    if parsed.scheme != "file":
+        return None
+    path = Path(unquote(parsed.path)).resolve()
+    if path.parent != PART_SPILL_DIR.resolve() or not path.is_file():
+        return None
+    size = path.stat().st_size
+    if size > limit:
+        raise AttachmentError(f"Attachment is {size} bytes; the limit is {limit}")
+    if size == 0:
+        return b""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm[:]
+
+
+def convert_a2a_parts_to_genai(parts: list[Part]) -> list[types.Part]:
+    """Convert a list of A2A Part types into a list of Google Gen AI Part types."""
+    total = 0
+    converted = []
+    for part in parts:
+        genai_part = convert_a2a_part_to_genai(part)
+        if genai_part.inline_data is not None and genai_part.inline_data.data:
+            total += len(genai_part.inline_data.data)
+            if total > PART_MAX_MESSAGE_BYTES:
+                raise AttachmentError(
+                    f"Attachments add up to more than {PART_MAX_MESSAGE_BYTES} bytes"
+                )
+        converted.append(genai_part)
+    return converted
+
+
+def convert_a2a_part_to_genai(part: Part) -> types.Part:
+    """Convert a single A2A Part type into a Google Gen AI Part type."""
+    root = part.root
+    if isinstance(root, TextPart):
+        return types.Part(text=root.text)
+    if isinstance(root, FilePart):
+        mime_type = root.file.mimeType or "application/octet-stream"
+        if isinstance(root.file, FileWithUri):
+            data = read_spilled(root.file.uri)
+            if data is not None:
+                return types.Part(inline_data=types.Blob(data=data, mime_type=mime_type))
+            return types.Part(
+                file_data=types.FileData(
+                    file_uri=root.file.uri, mime_type=root.file.mimeType
+                )
+            )
+        if isinstance(root.file, FileWithBytes):
+            return types.Part(
+                inline_data=types.Blob(data=decode_base64(root.file.bytes), mime_type=mime_type)
+            )
+        raise ValueError(f"Unsupported file type: {type(root.file)}")
+    raise ValueError(f"Unsupported part type: {type(part)}")
+
+
+def convert_genai_parts_to_a2a(parts: list[types.Part]) -> list[Part]:
+    """Convert a list of Google Gen AI Part types into a list of A2A Part types."""
+    return [
+        convert_genai_part_to_a2a(part)
+        for part in parts
+        if (part.text or part.file_data or part.inline_data)
+    ]
+
+
+def convert_genai_part_to_a2a(part: types.Part) -> Part:
+    """Convert a single Google Gen AI Part type into an A2A Part type."""
+    if part.text:
+        return Part(root=TextPart(text=part.text))
+    if part.file_data:
+        if not part.file_data.file_uri:
+            raise ValueError("File URI is missing")
+        return Part(
+            root=FilePart(
+                file=FileWithUri(
+                    uri=part.file_data.file_uri,
+                    mimeType=part.file_data.mime_type,
+                )
+            )
+        )
+    if part.inline_data:
+        data = part.inline_data.data
+        if not data:
+            raise ValueError("Inline data is missing")
+        if PART_SPILL_BYTES and len(data) > PART_SPILL_BYTES:
+            return Part(
+                root=FilePart(
+                    file=FileWithUri(uri=spill(data, part.inline_data.mime_type),
+                                     mimeType=part.inline_data.mime_type)
+                )
+            )
+        return Part(
+            root=FilePart(
+                file=FileWithBytes(
+                    bytes=encode_base64(data),
+                    mimeType=part.inline_data.mime_type,
+                )
+            )
+        )
+    raise ValueError(f"Unsupported part type: {part}")
+
+
+_last_sweep = 0.0
+
+
+def _sweep_spill_dir() -> None:
+    """Deletes spilled files older than PART_SPILL_TTL_SECONDS, at most once a minute."""
+    global _last_sweep
+    now = time.time()
+    if now - _last_sweep < 60:
+        return
+    _last_sweep = now
+    for path in PART_SPILL_DIR.iterdir():
+        try:
+            if now - path.stat().st_mtime > PART_SPILL_TTL_SECONDS:
+                path.unlink()
+        except OSError as e:
+            logger.debug(f"Could not sweep {path}: {e}")
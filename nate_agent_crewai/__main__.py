@@ -7,10 +7,7 @@ and starts the server to handle incoming requests.
 import logging
 import os
 
-import uvicorn
 from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
@@ -19,10 +16,18 @@ from a2a.types import (
 from agent import SchedulingAgent
 from agent_executor import SchedulingAgentExecutor
 from dotenv import load_dotenv
+from utils.prefork import serve
+from utils.push_delivery import QueuedPushNotifier
+from utils.request_handler import NonBlockingRequestHandler
+from utils.metrics import instrument
+from utils.structured_log import configure_logging
+from utils.task_store import TieredTaskStore
+from utils.tracing import configure as configure_tracing
 
 load_dotenv()
 
-logging.basicConfig(level=logging.INFO)
+# Logs go through a queue to a background writer; LOG_LEVEL / LOG_FORMAT tune them.
+configure_logging("nate")
 logger = logging.getLogger(__name__)
 
 
@@ -32,13 +37,14 @@ class MissingAPIKeyError(Exception):
 
 def main():
     """Entry point for Nate's Scheduling Agent."""
+    configure_tracing("nate")
     host = "localhost"
     port = 10003
     try:
         if not os.getenv("GOOGLE_API_KEY"):
             raise MissingAPIKeyError("GOOGLE_API_KEY environment variable not set.")
 
-        capabilities = AgentCapabilities(streaming=False)
+        capabilities = AgentCapabilities(streaming=True, pushNotifications=True)
         skill = AgentSkill(
             id="availability_checker",
             name="Availability Checker",
@@ -62,15 +68,26 @@ def main():
             skills=[skill],
         )
 
-        request_handler = DefaultRequestHandler(
-            agent_executor=SchedulingAgentExecutor(),
-            task_store=InMemoryTaskStore(),
+        agent_executor = SchedulingAgentExecutor()
+        task_store = TieredTaskStore.from_env("nate")
+        push_notifier = QueuedPushNotifier.from_env()
+        request_handler = NonBlockingRequestHandler(
+            agent_executor=agent_executor,
+            task_store=task_store,
+            push_notifier=push_notifier,
         )
         server = A2AStarletteApplication(
             agent_card=agent_card, http_handler=request_handler
         )
+        app = instrument(
+            server.build(),
+            in_flight_tasks=agent_executor.in_flight,
+            task_store=task_store,
+            push_notifier=push_notifier,
+        )
 
-        uvicorn.run(server.build(), host=host, port=port)
+        # AGENT_WORKERS > 1 forks that many server processes on one socket.
+        serve(app, host=host, port=port)
 
     except MissingAPIKeyError as e:
         logger.error(f"Error: {e}")
@@ -1,34 +1,57 @@
 import os
 import random
-from datetime import date, datetime, timedelta
-from typing import Type
+import sys
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Any, Callable, Type
 
 from crewai import LLM, Agent, Crew, Process, Task
 from crewai.tools import BaseTool
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.calendar_store import (
+    DEFAULT_HORIZON_DAYS,
+    DEFAULT_SLOT_MINUTES,
+    IntervalCalendar,
+    SharedCalendar,
+    iter_days,
+    load_shared_calendar,
+)
+
 load_dotenv()
 
 
-def generate_calendar() -> dict[str, list[str]]:
-    """Generates a random calendar for the next 7 days."""
-    calendar = {}
+def generate_calendar(horizon_days: int = DEFAULT_HORIZON_DAYS) -> IntervalCalendar:
+    """Generates a random calendar for the next `horizon_days` days."""
+    calendar = IntervalCalendar(owner="Nate", slot_minutes=DEFAULT_SLOT_MINUTES)
     today = date.today()
-    possible_times = [f"{h:02}:00" for h in range(8, 21)]  # 8 AM to 8 PM
+    possible_hours = list(range(8, 21))  # 8 AM to 8 PM
 
-    for i in range(7):
+    windows = []
+    for i in range(horizon_days):
         current_date = today + timedelta(days=i)
-        date_str = current_date.strftime("%Y-%m-%d")
-        available_slots = sorted(random.sample(possible_times, 8))
-        calendar[date_str] = available_slots
+        for hour in random.sample(possible_hours, 8):
+            start = datetime.combine(current_date, time(hour))
+            windows.append((start, start + timedelta(hours=1)))
+    calendar.add_availability_many(windows)
     print("---- Nate's Generated Calendar ----")
     print(calendar)
     print("---------------------------------")
     return calendar
 
 
-MY_CALENDAR = generate_calendar()
+def load_nate_calendar() -> SharedCalendar:
+    """
+    Nate's calendar from the shared calendar store, so every worker process
+    serves the same one. Imported from NATE_CALENDAR_PATH (.ics/.json) if set,
+    otherwise generated once.
+    """
+    return load_shared_calendar(owner="Nate", generate=generate_calendar, path=os.getenv("NATE_CALENDAR_PATH"))
+
+
+MY_CALENDAR = load_nate_calendar()
 
 
 class AvailabilityToolInput(BaseModel):
@@ -63,12 +86,11 @@ class AvailabilityTool(BaseTool):
                     "Invalid date range. The start date cannot be after the end date."
                 )
 
+            calendar = MY_CALENDAR.current()
             results = []
-            delta = end - start
-            for i in range(delta.days + 1):
-                day = start + timedelta(days=i)
+            for day in iter_days(start, end):
                 date_str = day.strftime("%Y-%m-%d")
-                available_slots = MY_CALENDAR.get(date_str, [])
+                available_slots = calendar.day_slots(day)
                 if available_slots:
                     availability = f"On {date_str}, I am available at: {', '.join(available_slots)}."
                     results.append(availability)
@@ -89,8 +111,13 @@ class SchedulingAgent:
 
     SUPPORTED_CONTENT_TYPES = ["text/plain"]
 
-    def __init__(self):
-        """Initializes the SchedulingAgent."""
+    TASK_DESCRIPTION = (
+        "Answer the user's question about my availability. The user asked: '{question}'. "
+        "Today's date is {today}."
+    )
+
+    def __init__(self, verbose: bool | None = None):
+        """Initializes the SchedulingAgent and its reusable crew template."""
         if os.getenv("GOOGLE_API_KEY"):
             self.llm = LLM(
                 model="gemini/gemini-2.0-flash",
@@ -99,6 +126,10 @@ class SchedulingAgent:
         else:
             raise ValueError("GOOGLE_API_KEY environment variable not set.")
 
+        if verbose is None:
+            verbose = os.getenv("NATE_CREW_VERBOSE", "false").lower() == "true"
+        self.verbose = verbose
+
         self.scheduling_assistant = Agent(
             role="Personal Scheduling Assistant",
             goal="Check my calendar and answer questions about my availability.",
@@ -108,30 +139,41 @@ class SchedulingAgent:
                 "Calendar Availability Checker tool to find out when I am free. You never "
                 "engage in conversations outside of scheduling."
             ),
-            verbose=True,
+            verbose=verbose,
             allow_delegation=False,
             tools=[AvailabilityTool()],
             llm=self.llm,
         )
 
-    def invoke(self, question: str) -> str:
-        """Kicks off the crew to answer a scheduling question."""
-        task_description = (
-            f"Answer the user's question about my availability. The user asked: '{question}'. "
-            f"Today's date is {date.today().strftime('%Y-%m-%d')}."
-        )
-
         check_availability_task = Task(
-            description=task_description,
+            description=self.TASK_DESCRIPTION,
             expected_output="A polite and concise answer to the user's question about my availability, based on the calendar tool's output.",
             agent=self.scheduling_assistant,
         )
 
-        crew = Crew(
+        # Built once; each kickoff runs on a copy because kickoff() interpolates
+        # inputs into the task in place, which is not safe across threads.
+        self.crew_template = Crew(
             agents=[self.scheduling_assistant],
             tasks=[check_availability_task],
             process=Process.sequential,
-            verbose=True,
+            verbose=verbose,
+        )
+
+    def invoke(self, question: str, step_callback: Callable[[Any], None] | None = None) -> str:
+        """
+        Kicks off the crew to answer a scheduling question.
+
+        `step_callback`, if given, is called from the crew's thread with every
+        intermediate step (tool calls, tool results and the final answer).
+        """
+        crew = self.crew_template.copy()
+        if step_callback:
+            crew.step_callback = step_callback
+        result = crew.kickoff(
+            inputs={
+                "question": question,
+                "today": date.today().strftime("%Y-%m-%d"),
+            }
         )
-        result = crew.kickoff()
         return str(result)
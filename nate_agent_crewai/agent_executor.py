@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 from pathlib import Path
@@ -5,7 +6,10 @@ import sys
 
 # Add repo root (A2A) to sys.path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.deadline import budget_from_metadata
+from utils.tracing import span, traceparent_from_metadata
 from utils.node_client import NodeClient
+from utils.structured_log import log_event
 
 
 
@@ -16,12 +20,13 @@ from a2a.types import (
     InternalError,
     InvalidParamsError,
     Part,
+    TaskState,
     TextPart,
     UnsupportedOperationError,
 )
 from a2a.utils.errors import ServerError
 from sign_api import sign_message
-from agent import SchedulingAgent
+from crew_pool import CrewPool, CrewPoolFullError
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -36,9 +41,13 @@ print("✅ Agent Using base URL:", default_base_url)
 class SchedulingAgentExecutor(AgentExecutor):
     """AgentExecutor for the scheduling agent."""
 
-    def __init__(self):
+    def __init__(self, pool: CrewPool | None = None):
         """Initializes the SchedulingAgentExecutor."""
-        self.agent = SchedulingAgent()
+        self.pool = pool or CrewPool.from_env()
+        self._running: dict[str, asyncio.Task] = {}
+
+    def in_flight(self) -> int:
+        return len(self._running)
 
     async def execute(
         self,
@@ -51,6 +60,27 @@ class SchedulingAgentExecutor(AgentExecutor):
         if not context.message:
             raise ValueError("RequestContext must have a message")
 
+        self._running[context.task_id] = asyncio.current_task()
+        budget = budget_from_metadata(context.message.metadata)
+        with span("nate.execute", parent=traceparent_from_metadata(context.message.metadata), task_id=context.task_id):
+            try:
+                await asyncio.wait_for(self._execute(context, event_queue), timeout=budget)
+            except asyncio.TimeoutError:
+                logger.warning(f"Task {context.task_id} ran past the host's {budget:.1f}s deadline")
+                updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+                await updater.failed(
+                    message=updater.new_agent_message(
+                        [Part(root=TextPart(text="Nate could not answer before the deadline."))]
+                    )
+                )
+            finally:
+                self._running.pop(context.task_id, None)
+
+    async def _execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
         updater = TaskUpdater(event_queue, context.task_id, context.context_id)
         if not context.current_task:
             await updater.submit()
@@ -60,13 +90,29 @@ class SchedulingAgentExecutor(AgentExecutor):
             raise ServerError(error=InvalidParamsError())
 
         query = context.get_user_input()
-        print("📨 Incoming from Host – full context:", context)
-        print("📨 Incoming from Host – user input   :", context.get_user_input())
+        log_event(logger, logging.DEBUG, "incoming request", task_id=context.task_id,
+                  context_id=context.context_id, query=query)
         try:
-            result = self.agent.invoke(query)
-            print(f"Final Result ===> {result}")
+            result = ""
+            with span("crewai.kickoff"):
+                async for item in self.pool.stream(query):
+                    if item["is_task_complete"]:
+                        result = item["content"]
+                        break
+                    await updater.update_status(
+                        TaskState.working,
+                        message=updater.new_agent_message(
+                            [Part(root=TextPart(text=item["content"]))]
+                        ),
+                    )
+            log_event(logger, logging.DEBUG, "crew result", task_id=context.task_id, result=result)
+        except CrewPoolFullError as e:
+            logger.warning(f"Rejecting request, crew pool is full: {e}")
+            raise ServerError(
+                error=InternalError(message="Nate's agent is busy, please retry shortly.")
+            ) from e
         except Exception as e:
-            print(f"Error invoking agent: {e}")
+            logger.error(f"Error invoking agent: {e}")
             raise ServerError(error=InternalError()) from e
         
         envelope = {
@@ -81,9 +127,7 @@ class SchedulingAgentExecutor(AgentExecutor):
         signature = "nates_signature"
         try:
             did = default_did
-            signature = sign_message(envelope_json, did)
-            print("signature", signature)
-                        
+            signature = await asyncio.to_thread(sign_message, envelope_json, did)
         except Exception as e:
             logger.error(f"Error fetching account info: {e}")
        
@@ -99,8 +143,16 @@ class SchedulingAgentExecutor(AgentExecutor):
         await updater.complete()
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
-        """Handles task cancellation."""
-        raise ServerError(error=UnsupportedOperationError())
+        """Handles task cancellation by aborting the crew and any pending signing call."""
+        if not context.task_id or not context.context_id:
+            raise ServerError(error=UnsupportedOperationError())
+
+        running = self._running.pop(context.task_id, None)
+        if running is not None and not running.done():
+            running.cancel()
+
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.update_status(TaskState.canceled, final=True)
 
     def _validate_request(self, context: RequestContext) -> bool:
         """Validates the request context."""
@@ -0,0 +1,162 @@
+"""Bounded worker pool for running Nate's crew off the event loop."""
+
+import asyncio
+import logging
+import os
+import threading
+from collections.abc import AsyncIterator
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+from agent import SchedulingAgent
+from crewai.agents.parser import AgentAction, AgentFinish
+from crewai.tools.tool_types import ToolResult
+
+logger = logging.getLogger(__name__)
+
+# Built once per worker process when the pool runs in process mode.
+_worker_agent: SchedulingAgent | None = None
+
+
+def _init_worker() -> None:
+    global _worker_agent
+    _worker_agent = SchedulingAgent()
+
+
+def _invoke_in_worker(question: str) -> str:
+    return _worker_agent.invoke(question)
+
+
+def describe_step(step: Any) -> str | None:
+    """Turns a CrewAI step callback payload into a short progress message."""
+    if isinstance(step, AgentAction):
+        return f"Using {step.tool} with {step.tool_input}"
+    if isinstance(step, ToolResult):
+        result = str(step.result)
+        return f"Tool returned: {result[:200]}{'…' if len(result) > 200 else ''}"
+    if isinstance(step, AgentFinish):
+        return "Final answer ready."
+    return None
+
+
+class CrewPoolFullError(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class CrewCancelledError(Exception):
+    """Raised from the step callback to abort a crew whose caller went away."""
+
+
+class CrewPool:
+    """
+    Runs crew kickoffs on a thread or process pool.
+
+    At most `max_workers` crews run at once and at most `max_queue` more may
+    wait; anything beyond that is rejected immediately with CrewPoolFullError
+    instead of piling up behind a slow LLM.
+    """
+
+    def __init__(self, mode: str = "thread", max_workers: int = 4, max_queue: int = 16):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unsupported pool mode: {mode!r}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+        self._executor: Executor
+        if mode == "process":
+            self.agent = None
+            self._executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker)
+        else:
+            self.agent = SchedulingAgent()
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew")
+
+    @classmethod
+    def from_env(cls) -> "CrewPool":
+        """Builds a pool from NATE_POOL_MODE / NATE_POOL_WORKERS / NATE_POOL_QUEUE."""
+        return cls(
+            mode=os.getenv("NATE_POOL_MODE", "thread"),
+            max_workers=int(os.getenv("NATE_POOL_WORKERS", "4")),
+            max_queue=int(os.getenv("NATE_POOL_QUEUE", "16")),
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                raise CrewPoolFullError(
+                    f"{self._in_flight} crews running or queued (limit {self.max_workers + self.max_queue})"
+                )
+            self._in_flight += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, question: str) -> str:
+        """Answers `question` on the pool without blocking the event loop."""
+        self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            if self.mode == "process":
+                return await loop.run_in_executor(self._executor, _invoke_in_worker, question)
+            return await loop.run_in_executor(self._executor, self.agent.invoke, question)
+        finally:
+            self._release()
+
+    async def stream(self, question: str) -> AsyncIterator[dict[str, Any]]:
+        """
+        Answers `question` on the pool, yielding progress as it happens.
+
+        Yields `{"is_task_complete": False, "content": ...}` for every crew
+        step and finally `{"is_task_complete": True, "content": answer}`.
+        Step events cannot cross process boundaries, so in process mode only
+        the final answer is yielded.
+
+        If the consumer stops early (e.g. the task is cancelled), a queued
+        kickoff is dropped and a running one aborts at its next step.
+        """
+        self._acquire()
+        cancelled = threading.Event()
+        future = None
+        try:
+            loop = asyncio.get_running_loop()
+            steps: asyncio.Queue = asyncio.Queue()
+
+            def on_step(step: Any) -> None:
+                if cancelled.is_set():
+                    raise CrewCancelledError("crew cancelled by caller")
+                loop.call_soon_threadsafe(steps.put_nowait, step)
+
+            if self.mode == "process":
+                future = loop.run_in_executor(self._executor, _invoke_in_worker, question)
+            else:
+                future = loop.run_in_executor(self._executor, self.agent.invoke, question, on_step)
+
+            while not future.done() or not steps.empty():
+                if steps.empty():
+                    getter = asyncio.ensure_future(steps.get())
+                    await asyncio.wait({getter, future}, return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        getter.cancel()
+                        continue
+                    step = getter.result()
+                else:
+                    step = steps.get_nowait()
+                if content := describe_step(step):
+                    yield {"is_task_complete": False, "content": content}
+
+            yield {"is_task_complete": True, "content": await future}
+        finally:
+            if future is not None and not future.done():
+                cancelled.set()
+                future.cancel()
+            self._release()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,4 +1,5 @@
 import json
+import logging
 import os
 from pathlib import Path
 import sys
@@ -7,6 +8,8 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 from utils.node_client import NodeClient
+from utils.sign_sidecar import SidecarError, SidecarUnavailable, resolve_did, sidecar
+from utils.tracing import traced
 
 class APIError(Exception):
     """Raised when the external API call fails or returns invalid data."""
@@ -14,13 +17,16 @@ class APIError(Exception):
 
 node = NodeClient(framework="crew")
 default_base_url = node.get_base_url() 
-default_did = node.get_did()
+default_did = resolve_did(node)
 default_password = "mypassword"
 
 print("✅ Sign Using DID for details:", default_did)
 print("✅ Sign Using base URL:", default_base_url)
 
+logger = logging.getLogger(__name__)
 
+
+@traced("node.sign_message")
 def sign_message(msg_hash: str, did: str | None = None, password: str | None = None) -> str:
     """
     Send a SHA-256 hex digest to the `/api/sign` endpoint to get back either:
@@ -45,6 +51,14 @@ def sign_message(msg_hash: str, did: str | None = None, password: str | None = N
     pw = default_password
     base = default_base_url.rstrip('/')
 
+    if sidecar is not None:
+        try:
+            return sidecar.sign(base, target_did, msg_hash, pw)
+        except SidecarUnavailable as e:
+            logger.warning(f"Signing without the sidecar: {e}")
+        except SidecarError as e:
+            raise APIError(str(e)) from e
+
     try:
         resp = requests.post(
             f"{default_base_url}/api/sign",
@@ -95,6 +109,6 @@ def sign_message(msg_hash: str, did: str | None = None, password: str | None = N
     sig = data2.get("result", {}).get("signature")
     if not sig:
         raise APIError("Signature-response API succeeded but no `signature` in result")
-    print("SIGNNNNN", sig)
+    logger.debug("Signed message with %s", target_did)
 
     return sig
\ No newline at end of file
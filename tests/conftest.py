@@ -0,0 +1,15 @@
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HOST_PACKAGE = ROOT / "host_agent_adk" / "host"
+
+sys.path.insert(0, str(ROOT))
+
+# host/__init__.py builds the whole agent (node lookups, friend connections), so
+# the tests load the host modules they need without running it.
+if "host" not in sys.modules:
+    host = types.ModuleType("host")
+    host.__path__ = [str(HOST_PACKAGE)]
+    sys.modules["host"] = host
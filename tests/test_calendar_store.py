@@ -0,0 +1,110 @@
+import json
+from datetime import datetime
+
+from utils.calendar_store import IntervalCalendar, IntervalSet, load_calendar
+
+
+def at(hour: int, minute: int = 0, day: int = 1) -> datetime:
+    return datetime(2026, 6, day, hour, minute)
+
+
+def test_add_merges_overlapping_and_touching_intervals():
+    s = IntervalSet()
+    s.add(at(9), at(10))
+    s.add(at(11), at(12))
+    s.add(at(10), at(11))
+    assert list(s) == [(at(9), at(12))]
+    s.add(at(8), at(9, 30))
+    s.add(at(13), at(14))
+    assert list(s) == [(at(8), at(12)), (at(13), at(14))]
+
+
+def test_add_ignores_empty_intervals():
+    s = IntervalSet([(at(9), at(10))])
+    s.add(at(11), at(11))
+    s.add(at(12), at(11))
+    assert list(s) == [(at(9), at(10))]
+
+
+def test_update_merges_like_add():
+    s = IntervalSet([(at(9), at(10))])
+    s.update([(at(13), at(14)), (at(10), at(11)), (at(12), at(12)), (at(13, 30), at(15))])
+    assert list(s) == [(at(9), at(11)), (at(13), at(15))]
+
+
+def test_remove_splits_trims_and_leaves_touching_intervals():
+    s = IntervalSet([(at(9), at(17))])
+    s.remove(at(12), at(13))
+    assert list(s) == [(at(9), at(12)), (at(13), at(17))]
+    s.remove(at(8), at(9, 30))
+    s.remove(at(16), at(18))
+    assert list(s) == [(at(9, 30), at(12)), (at(13), at(16))]
+    # [start, end) is half-open: removing a neighbouring interval changes nothing.
+    s.remove(at(12), at(13))
+    assert list(s) == [(at(9, 30), at(12)), (at(13), at(16))]
+    s.remove(at(9), at(17))
+    assert list(s) == []
+
+
+def test_difference_update_matches_repeated_remove():
+    windows = [(at(9), at(12)), (at(13), at(17)), (at(9, day=2), at(17, day=2))]
+    cuts = [
+        (at(8), at(9, 30)),
+        (at(11), at(11, 30)),
+        (at(11, 15), at(13, 15)),
+        (at(16), at(10, day=2)),
+        (at(12, day=2), at(12, day=2)),
+        (at(15, day=2), at(20, day=2)),
+    ]
+    bulk = IntervalSet(windows)
+    bulk.difference_update(cuts)
+    one_by_one = IntervalSet(windows)
+    for start, end in cuts:
+        one_by_one.remove(start, end)
+    assert list(bulk) == list(one_by_one) == [
+        (at(9, 30), at(11)),
+        (at(13, 15), at(16)),
+        (at(10, day=2), at(15, day=2)),
+    ]
+
+
+def test_difference_update_removing_everything():
+    s = IntervalSet([(at(9), at(10)), (at(11), at(12))])
+    s.difference_update([(at(8), at(13))])
+    assert list(s) == []
+    assert s.bounds() is None
+
+
+def test_free_slots_are_aligned_and_skip_events():
+    cal = IntervalCalendar(slot_minutes=30)
+    cal.add_availability(at(9, 10), at(12))
+    cal.add_event(at(10), at(10, 45), "standup")
+    assert cal.free_slots(at(0), at(23)) == [at(9, 30), at(11), at(11, 30)]
+    assert cal.day_slots(at(0).date(), slot_minutes=60) == ["11:00"]
+    assert cal.events_between(at(10, 30), at(11)) == [(at(10), at(10, 45), "standup")]
+    assert not cal.is_free(at(10, 30), at(11))
+
+
+def test_add_events_many_matches_add_event():
+    events = [(at(9), at(10), "a"), (at(9, 30), at(11), "b"), (at(14), at(15), "c")]
+    bulk = IntervalCalendar()
+    bulk.add_availability(at(8), at(17))
+    bulk.add_events_many(events)
+    single = IntervalCalendar()
+    single.add_availability(at(8), at(17))
+    for event in events:
+        single.add_event(*event)
+    assert list(bulk.free) == list(single.free) == [(at(8), at(9)), (at(11), at(14)), (at(15), at(17))]
+    assert bulk.events_between(at(0), at(23)) == single.events_between(at(0), at(23))
+
+
+def test_load_calendar_keeps_json_slot_length(tmp_path):
+    cal = IntervalCalendar(owner="nate", slot_minutes=30)
+    cal.add_availability(at(9), at(11))
+    path = tmp_path / "nate.json"
+    path.write_text(json.dumps(cal.to_dict()), encoding="utf-8")
+
+    loaded = load_calendar(path)
+    assert loaded.slot_minutes == 30
+    assert list(loaded.free) == [(at(9), at(11))]
+    assert load_calendar(path, slot_minutes=15).slot_minutes == 15
@@ -0,0 +1,59 @@
+from google.genai import types
+
+from host.context_compaction import _snapshot
+
+
+def _contents(tool: str, response: dict) -> list[types.Content]:
+    return [
+        types.Content(role="user", parts=[types.Part.from_text(text="Find a time with Nate")]),
+        types.Content(role="model", parts=[types.Part.from_function_call(name=tool, args={})]),
+        types.Content(role="user", parts=[types.Part.from_function_response(name=tool, response=response)]),
+    ]
+
+
+def test_full_send_message_result():
+    response = {
+        "result": {
+            "messages": [{"agent": "Nate Agent", "response": "Free at 10:00", "signature": "sig"}],
+            "nft_execution": None,
+            "trust_issues": None,
+            "error": None,
+        },
+        "status": "Nate Agent answered",
+    }
+    snapshot = _snapshot(_contents("send_message", response))
+    assert snapshot["friend_replies"] == {
+        "Nate Agent": {"response": "Free at 10:00", "status": "Nate Agent answered"}
+    }
+
+
+def test_compact_send_message_result():
+    response = {
+        "friend": "Nate Agent",
+        "verified": True,
+        "response": "Free at 10:00",
+        "status": "Nate Agent answered",
+        "audit_ref": "a1",
+    }
+    snapshot = _snapshot(_contents("send_message", response))
+    assert snapshot["friend_replies"]["Nate Agent"]["response"] == "Free at 10:00"
+    assert snapshot["friend_replies"]["Nate Agent"]["audit_ref"] == "a1"
+
+
+def test_ask_friends_result():
+    response = {
+        "answered": {"Nate Agent": {"friend": "Nate Agent", "response": "Free at 10:00"}},
+        "failed": {"Karley Agent": {"error": "timed out"}},
+        "pending": ["Kaitlynn Agent"],
+        "quorum_met": True,
+        "partial": True,
+    }
+    replies = _snapshot(_contents("ask_friends", response))["friend_replies"]
+    assert replies["Nate Agent"]["outcome"] == "answered"
+    assert replies["Karley Agent"] == {"outcome": "failed", "error": "timed out"}
+    assert replies["Kaitlynn Agent"] == {"outcome": "pending"}
+
+
+def test_other_tools_are_unwrapped():
+    contents = _contents("book_pickleball_court", {"result": "Booked court 1"})
+    assert _snapshot(contents)["bookings"] == ['"Booked court 1"']
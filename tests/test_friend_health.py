@@ -0,0 +1,87 @@
+from host import friend_health
+from host.friend_health import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def breaker(monkeypatch, reset_seconds: float = 30.0) -> tuple[CircuitBreaker, Clock]:
+    clock = Clock()
+    monkeypatch.setattr(friend_health.time, "monotonic", clock)
+    return CircuitBreaker(failure_threshold=2, reset_seconds=reset_seconds), clock
+
+
+def open_breaker(b: CircuitBreaker) -> None:
+    for _ in range(b.failure_threshold):
+        assert b.allow_request()
+        b.record_failure("down")
+    assert b.state == OPEN
+
+
+def test_opens_after_threshold_and_fails_fast(monkeypatch):
+    b, clock = breaker(monkeypatch)
+    assert b.allow_request()
+    b.record_failure("timeout")
+    assert b.state == CLOSED
+    assert b.allow_request()
+    b.record_failure("timeout")
+    assert b.state == OPEN
+    assert not b.allow_request()
+    assert not b.is_available()
+    clock.now += 29
+    assert not b.allow_request()
+
+
+def test_half_open_lets_one_trial_through(monkeypatch):
+    b, clock = breaker(monkeypatch)
+    open_breaker(b)
+    clock.now += 30
+    assert b.is_available()
+    assert b.allow_request()
+    assert b.state == HALF_OPEN
+    assert not b.allow_request()
+    b.record_success()
+    assert b.state == CLOSED
+    assert b.failures == 0
+    assert b.allow_request() and b.allow_request()
+
+
+def test_failed_trial_reopens(monkeypatch):
+    b, clock = breaker(monkeypatch)
+    open_breaker(b)
+    clock.now += 30
+    assert b.allow_request()
+    b.record_failure("still down")
+    assert b.state == OPEN
+    assert b.snapshot()["last_error"] == "still down"
+    assert not b.allow_request()
+
+
+def test_released_trial_allows_another(monkeypatch):
+    b, clock = breaker(monkeypatch)
+    open_breaker(b)
+    clock.now += 30
+    assert b.allow_request()
+    b.release()
+    assert b.state == HALF_OPEN
+    assert b.allow_request()
+
+
+def test_probe_half_opens_and_clears_a_lost_trial(monkeypatch):
+    b, clock = breaker(monkeypatch)
+    open_breaker(b)
+    b.probe_succeeded()
+    assert b.state == HALF_OPEN
+    assert b.allow_request()
+    # A trial still in flight is left alone until reset_seconds have passed.
+    clock.now += 10
+    b.probe_succeeded()
+    assert not b.allow_request()
+    clock.now += 20
+    b.probe_succeeded()
+    assert b.allow_request()
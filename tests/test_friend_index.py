@@ -0,0 +1,77 @@
+from a2a.types import AgentCapabilities, AgentCard, AgentSkill
+
+from host.friend_index import FriendIndex
+
+
+def card(name: str, description: str, skills: list[AgentSkill] = ()) -> AgentCard:
+    return AgentCard(
+        name=name,
+        description=description,
+        url=f"http://localhost/{name}",
+        version="1.0",
+        capabilities=AgentCapabilities(),
+        defaultInputModes=["text"],
+        defaultOutputModes=["text"],
+        skills=list(skills),
+    )
+
+
+def skill(name: str, description: str, tags: list[str], examples: list[str] = ()) -> AgentSkill:
+    return AgentSkill(
+        id=name.lower().replace(" ", "_"),
+        name=name,
+        description=description,
+        tags=tags,
+        examples=list(examples),
+    )
+
+
+def index() -> FriendIndex:
+    idx = FriendIndex()
+    idx.add(card("Karley Agent", "Helps with scheduling", [
+        skill("Calendar", "Checks Karley's calendar", ["calendar", "schedule"]),
+    ]))
+    idx.add(card("Nate Agent", "Plays pickleball and tennis", [
+        skill("Availability", "Checks when Nate can play", ["schedule"], ["Can you play pickleball?"]),
+    ]))
+    idx.add(card("Court Booker", "Books pickleball courts", [
+        skill("Courts", "Lists court availabilities", ["pickleball", "courts"]),
+    ]))
+    return idx
+
+
+def test_search_ranks_by_field_weight_and_rarity():
+    idx = index()
+    # Court Booker has "pickleball" as a tag and in its description, Nate only in
+    # the description and an example.
+    assert idx.search("pickleball") == ["Court Booker", "Nate Agent"]
+    # "schedule" is a tag of two friends and "calendar" of one, so calendar decides.
+    assert idx.search("schedule calendar") == ["Karley Agent", "Nate Agent"]
+    assert idx.search("tennis")[0] == "Nate Agent"
+
+
+def test_search_limit_exclude_and_no_match():
+    idx = index()
+    assert idx.search("pickleball", limit=1) == ["Court Booker"]
+    assert idx.search("pickleball", exclude={"Court Booker"}) == ["Nate Agent"]
+    assert idx.search("the and agent") == []
+    assert idx.search("") == []
+
+
+def test_named_needs_the_whole_name():
+    idx = index()
+    assert idx.named("Ask Karley and Nate") == ["Karley Agent", "Nate Agent"]
+    assert idx.named("book a court") == []
+    assert idx.named("court booker please") == ["Court Booker"]
+
+
+def test_add_replaces_and_remove_forgets():
+    idx = index()
+    idx.add(card("Nate Agent", "Plays chess"))
+    assert idx.search("pickleball") == ["Court Booker"]
+    assert idx.search("chess") == ["Nate Agent"]
+    idx.remove("Court Booker")
+    assert len(idx) == 2
+    assert idx.search("pickleball courts") == []
+    assert idx.named("court booker") == []
+    assert idx.describe("Nate Agent") == {"name": "Nate Agent", "description": "Plays chess", "skills": []}
@@ -0,0 +1,595 @@
+from __future__ import annotations
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from time import monotonic
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+DEFAULT_HORIZON_DAYS = int(os.getenv("CALENDAR_HORIZON_DAYS", "90"))
+DEFAULT_SLOT_MINUTES = int(os.getenv("CALENDAR_SLOT_MINUTES", "60"))
+DEFAULT_REFRESH_SECONDS = float(os.getenv("CALENDAR_REFRESH_SECONDS", "5"))
+# Daily free window an imported .ics of busy events is carved out of (HH:MM-HH:MM).
+DEFAULT_WORKING_HOURS = os.getenv("CALENDAR_WORKING_HOURS", "08:00-21:00")
+
+Interval = tuple[datetime, datetime]
+
+
+class IntervalSet:
+    """
+    Sorted, non-overlapping, half-open [start, end) intervals.
+    Starts and ends are kept in parallel lists so every lookup is a bisect.
+    """
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self._starts: list[datetime] = []
+        self._ends: list[datetime] = []
+        self.update(intervals)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __iter__(self) -> Iterator[Interval]:
+        return iter(zip(self._starts, self._ends))
+
+    def add(self, start: datetime, end: datetime) -> None:
+        if start >= end:
+            return
+        i = bisect_left(self._ends, start)
+        j = bisect_right(self._starts, end)
+        if i < j:
+            start = min(start, self._starts[i])
+            end = max(end, self._ends[j - 1])
+        self._starts[i:j] = [start]
+        self._ends[i:j] = [end]
+
+    def remove(self, start: datetime, end: datetime) -> None:
+        if start >= end:
+            return
+        i = bisect_right(self._ends, start)
+        j = bisect_left(self._starts, end)
+        if i >= j:
+            return
+        starts: list[datetime] = []
+        ends: list[datetime] = []
+        if self._starts[i] < start:
+            starts.append(self._starts[i])
+            ends.append(start)
+        if self._ends[j - 1] > end:
+            starts.append(end)
+            ends.append(self._ends[j - 1])
+        self._starts[i:j] = starts
+        self._ends[i:j] = ends
+
+    def update(self, intervals: Iterable[Interval]) -> None:
+        """Bulk add: one sort + merge instead of n list splices."""
+        incoming = [(s, e) for s, e in intervals if s < e]
+        if not incoming:
+            return
+        merged = _merge(sorted([*self, *incoming]))
+        self._starts = [s for s, _ in merged]
+        self._ends = [e for _, e in merged]
+
+    def difference_update(self, intervals: Iterable[Interval]) -> None:
+        """Bulk remove: a single linear sweep over both sorted lists."""
+        cuts = _merge(sorted((s, e) for s, e in intervals if s < e))
+        if not cuts or not self._starts:
+            return
+        starts: list[datetime] = []
+        ends: list[datetime] = []
+        k = 0
+        for s, e in self:
+            while k < len(cuts) and cuts[k][1] <= s:
+                k += 1
+            m = k
+            while m < len(cuts) and cuts[m][0] < e:
+                if cuts[m][0] > s:
+                    starts.append(s)
+                    ends.append(cuts[m][0])
+                s = max(s, cuts[m][1])
+                if cuts[m][1] >= e:
+                    break
+                m += 1
+            if s < e:
+                starts.append(s)
+                ends.append(e)
+        self._starts, self._ends = starts, ends
+
+    def overlapping(self, start: datetime, end: datetime) -> list[Interval]:
+        """Intervals intersecting [start, end), clipped to that window."""
+        i = bisect_right(self._ends, start)
+        j = bisect_left(self._starts, end)
+        return [
+            (max(s, start), min(e, end))
+            for s, e in zip(self._starts[i:j], self._ends[i:j])
+        ]
+
+    def contains(self, start: datetime, end: datetime) -> bool:
+        """True if [start, end) lies entirely inside one interval."""
+        i = bisect_right(self._starts, start) - 1
+        return i >= 0 and self._ends[i] >= end
+
+    def bounds(self) -> Optional[Interval]:
+        if not self._starts:
+            return None
+        return self._starts[0], self._ends[-1]
+
+
+def _merge(intervals: list[Interval]) -> list[Interval]:
+    merged: list[Interval] = []
+    for s, e in intervals:
+        if merged and s <= merged[-1][1]:
+            if e > merged[-1][1]:
+                merged[-1] = (merged[-1][0], e)
+        else:
+            merged.append((s, e))
+    return merged
+
+
+class IntervalCalendar:
+    """
+    A calendar backed by an interval index.
+
+    `free` holds the owner's availability windows; named events (bookings,
+    imported meetings) are subtracted from it and kept in a start-sorted list
+    so both free and busy lookups are O(log n + k) for k results.
+    """
+
+    def __init__(self, owner: str = "", slot_minutes: int = DEFAULT_SLOT_MINUTES):
+        if slot_minutes <= 0:
+            raise ValueError("slot_minutes must be positive")
+        self.owner = owner
+        self.slot_minutes = slot_minutes
+        self.free = IntervalSet()
+        self._events: list[tuple[datetime, datetime, str]] = []
+        self._max_event = timedelta(0)
+
+    def __repr__(self) -> str:
+        bounds = self.free.bounds()
+        span = f"{bounds[0]:%Y-%m-%d} → {bounds[1]:%Y-%m-%d}" if bounds else "empty"
+        return (
+            f"IntervalCalendar(owner={self.owner!r}, windows={len(self.free)}, "
+            f"events={len(self._events)}, span={span}, slot={self.slot_minutes}m)"
+        )
+
+    # ---- mutation -------------------------------------------------------
+
+    def add_availability(self, start: datetime, end: datetime) -> None:
+        self.free.add(start, end)
+
+    def add_availability_many(self, windows: Iterable[Interval]) -> None:
+        self.free.update(windows)
+
+    def add_event(self, start: datetime, end: datetime, label: str = "busy") -> None:
+        if start >= end:
+            raise ValueError("Event start must be before its end.")
+        self.free.remove(start, end)
+        insort(self._events, (start, end, label))
+        self._max_event = max(self._max_event, end - start)
+
+    def add_events_many(self, events: Iterable[tuple[datetime, datetime, str]]) -> None:
+        events = [ev for ev in events if ev[0] < ev[1]]
+        if not events:
+            return
+        self.free.difference_update((s, e) for s, e, _ in events)
+        self._events = sorted([*self._events, *events])
+        self._max_event = max(self._max_event, *(e - s for s, e, _ in events))
+
+    # ---- queries --------------------------------------------------------
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        return self.free.contains(start, end)
+
+    def events_between(self, start: datetime, end: datetime) -> list[tuple[datetime, datetime, str]]:
+        """Events intersecting [start, end)."""
+        lo = bisect_left(self._events, (start - self._max_event,))
+        hi = bisect_left(self._events, (end,))
+        return [ev for ev in self._events[lo:hi] if ev[1] > start]
+
+    def free_slots(
+        self, start: datetime, end: datetime, slot_minutes: Optional[int] = None
+    ) -> list[datetime]:
+        """
+        Start times of every full slot inside [start, end) that is free.
+        Slots are aligned to multiples of the slot length from midnight.
+        """
+        step = timedelta(minutes=slot_minutes or self.slot_minutes)
+        slots: list[datetime] = []
+        for s, e in self.free.overlapping(start, end):
+            midnight = datetime.combine(s.date(), time())
+            offset = (s - midnight) % step
+            cur = s if not offset else s + (step - offset)
+            while cur + step <= e:
+                slots.append(cur)
+                cur += step
+        return slots
+
+    def day_slots(self, day: date, slot_minutes: Optional[int] = None) -> list[str]:
+        """Free slot start times on `day`, formatted as HH:MM."""
+        start = datetime.combine(day, time())
+        return [
+            s.strftime("%H:%M")
+            for s in self.free_slots(start, start + timedelta(days=1), slot_minutes)
+        ]
+
+    def is_open(self, day: date) -> bool:
+        """True if the calendar has any free time or events on `day`."""
+        start = datetime.combine(day, time())
+        end = start + timedelta(days=1)
+        return bool(self.free.overlapping(start, end) or self.events_between(start, end))
+
+    # ---- serialization --------------------------------------------------
+
+    def to_dict(self) -> dict:
+        return {
+            "owner": self.owner,
+            "slot_minutes": self.slot_minutes,
+            "free": [[s.isoformat(), e.isoformat()] for s, e in self.free],
+            "events": [
+                {"start": s.isoformat(), "end": e.isoformat(), "label": label}
+                for s, e, label in self._events
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, owner: str = "", slot_minutes: Optional[int] = None) -> "IntervalCalendar":
+        """
+        Accepts either the `to_dict` shape or the legacy day → ["HH:MM", ...]
+        mapping, where each entry is one free slot of `slot_minutes`.
+        """
+        if "free" not in data and "events" not in data:
+            return cls.from_daily_slots(data, owner=owner, slot_minutes=slot_minutes or DEFAULT_SLOT_MINUTES)
+        cal = cls(
+            owner=data.get("owner", owner),
+            slot_minutes=slot_minutes or int(data.get("slot_minutes", DEFAULT_SLOT_MINUTES)),
+        )
+        cal.add_availability_many(
+            (datetime.fromisoformat(s), datetime.fromisoformat(e))
+            for s, e in data.get("free", [])
+        )
+        cal.add_events_many(
+            (
+                datetime.fromisoformat(ev["start"]),
+                datetime.fromisoformat(ev["end"]),
+                ev.get("label", "busy"),
+            )
+            for ev in data.get("events", [])
+        )
+        return cal
+
+    @classmethod
+    def from_daily_slots(
+        cls, slots: dict[str, list[str]], owner: str = "", slot_minutes: int = DEFAULT_SLOT_MINUTES
+    ) -> "IntervalCalendar":
+        cal = cls(owner=owner, slot_minutes=slot_minutes)
+        step = timedelta(minutes=slot_minutes)
+        windows = []
+        for day, times in slots.items():
+            for t in times:
+                start = datetime.strptime(f"{day} {t}", "%Y-%m-%d %H:%M")
+                windows.append((start, start + step))
+        cal.add_availability_many(windows)
+        return cal
+
+    def import_json(self, data: Union[str, dict]) -> None:
+        other = IntervalCalendar.from_dict(
+            json.loads(data) if isinstance(data, str) else data,
+            owner=self.owner,
+            slot_minutes=self.slot_minutes,
+        )
+        self.add_availability_many(other.free)
+        self.add_events_many(other._events)
+
+    def import_ics(self, text: str, as_availability: bool = False) -> int:
+        """
+        Imports VEVENTs from an iCalendar document.
+
+        Events are treated as busy time unless `as_availability` is set, in
+        which case they are added as free windows. Busy time is subtracted
+        from the availability already present, so an empty calendar needs
+        windows first (see `working_hours`). Returns the event count.
+        """
+        events = list(_parse_ics_events(text))
+        if as_availability:
+            self.add_availability_many((s, e) for s, e, _ in events)
+        else:
+            self.add_events_many(events)
+        return len(events)
+
+
+# ---- iCalendar parsing ---------------------------------------------------
+
+_DURATION_RE = re.compile(
+    r"^(?P<sign>[+-])?P(?:(?P<w>\d+)W)?(?:(?P<d>\d+)D)?"
+    r"(?:T(?:(?P<h>\d+)H)?(?:(?P<m>\d+)M)?(?:(?P<s>\d+)S)?)?$"
+)
+
+
+def _unfold_ics(text: str) -> Iterator[str]:
+    line = None
+    for raw in text.splitlines():
+        if raw[:1] in (" ", "\t") and line is not None:
+            line += raw[1:]
+            continue
+        if line is not None:
+            yield line
+        line = raw
+    if line is not None:
+        yield line
+
+
+def _parse_ics_datetime(params: str, value: str) -> tuple[datetime, bool]:
+    """Returns (naive local datetime, is_all_day)."""
+    value = value.strip()
+    if "VALUE=DATE" in params.upper() and "T" not in value:
+        return datetime.strptime(value, "%Y%m%d"), True
+    if value.endswith("Z"):
+        utc = datetime.strptime(value[:-1], "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
+        return utc.astimezone().replace(tzinfo=None), False
+    fmt = "%Y%m%dT%H%M%S" if len(value) > 13 else "%Y%m%dT%H%M"
+    return datetime.strptime(value, fmt), False
+
+
+def _parse_ics_duration(value: str) -> timedelta:
+    m = _DURATION_RE.match(value.strip())
+    if not m:
+        raise ValueError(f"Unsupported DURATION: {value!r}")
+    delta = timedelta(
+        weeks=int(m["w"] or 0),
+        days=int(m["d"] or 0),
+        hours=int(m["h"] or 0),
+        minutes=int(m["m"] or 0),
+        seconds=int(m["s"] or 0),
+    )
+    return -delta if m["sign"] == "-" else delta
+
+
+def _parse_ics_events(text: str) -> Iterator[tuple[datetime, datetime, str]]:
+    current: Optional[dict] = None
+    for line in _unfold_ics(text):
+        name, _, value = line.partition(":")
+        key, _, params = name.partition(";")
+        key = key.upper()
+        if key == "BEGIN" and value.strip().upper() == "VEVENT":
+            current = {}
+        elif key == "END" and value.strip().upper() == "VEVENT" and current is not None:
+            if "start" in current:
+                start, all_day = current["start"]
+                if "end" in current:
+                    end = current["end"][0]
+                elif "duration" in current:
+                    end = start + current["duration"]
+                else:
+                    end = start + (timedelta(days=1) if all_day else timedelta(0))
+                if end > start:
+                    yield start, end, current.get("summary", "busy")
+            current = None
+        elif current is not None:
+            if key == "DTSTART":
+                current["start"] = _parse_ics_datetime(params, value)
+            elif key == "DTEND":
+                current["end"] = _parse_ics_datetime(params, value)
+            elif key == "DURATION":
+                current["duration"] = _parse_ics_duration(value)
+            elif key == "SUMMARY":
+                current["summary"] = value.replace("\\,", ",").replace("\\;", ";").strip()
+
+
+# ---- loading helpers -----------------------------------------------------
+
+def working_hours(
+    start: date, days: int = DEFAULT_HORIZON_DAYS, hours: str = DEFAULT_WORKING_HOURS
+) -> list[Interval]:
+    """One free window per day for `days` days from `start`, e.g. hours="08:00-21:00"."""
+    opens, _, closes = hours.partition("-")
+    open_t = datetime.strptime(opens.strip(), "%H:%M").time()
+    close_t = datetime.strptime(closes.strip(), "%H:%M").time()
+    return [
+        (datetime.combine(day, open_t), datetime.combine(day, close_t))
+        for day in (start + timedelta(days=i) for i in range(days))
+    ]
+
+
+def load_calendar(
+    path: Union[str, os.PathLike],
+    owner: str = "",
+    slot_minutes: Optional[int] = None,
+    as_availability: bool = False,
+    horizon_days: int = DEFAULT_HORIZON_DAYS,
+) -> IntervalCalendar:
+    """
+    Loads a calendar from a `.ics` or `.json` file. The events of an `.ics`
+    file are busy time within DEFAULT_WORKING_HOURS over the next
+    `horizon_days` days, unless `as_availability` makes them the free windows.
+    A `.json` calendar keeps the slot length it was saved with unless
+    `slot_minutes` is given.
+    """
+    p = Path(path)
+    text = p.read_text(encoding="utf-8")
+    if p.suffix.lower() == ".ics":
+        cal = IntervalCalendar(owner=owner, slot_minutes=slot_minutes or DEFAULT_SLOT_MINUTES)
+        if not as_availability:
+            cal.add_availability_many(working_hours(date.today(), horizon_days))
+        cal.import_ics(text, as_availability=as_availability)
+        return cal
+    return IntervalCalendar.from_dict(json.loads(text), owner=owner, slot_minutes=slot_minutes)
+
+
+def iter_days(start: date, end: date) -> Iterator[date]:
+    for i in range((end - start).days + 1):
+        yield start + timedelta(days=i)
+
+
+# ---- shared persistent store ---------------------------------------------
+
+class CalendarStore:
+    """
+    Calendars persisted in one SQLite file, so every worker process of a
+    server (and every restart) serves the same calendar.
+
+    Each row carries a version that is bumped on every save, which lets
+    `SharedCalendar` refresh lazily, and the source it was built from, so an
+    imported file is only re-imported when it changes. Connections are
+    opened per process, so a store created before a fork stays usable in
+    the children.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike, None] = None,
+        refresh_interval: float = DEFAULT_REFRESH_SECONDS,
+    ):
+        self.path = str(path or os.getenv("CALENDAR_DB") or Path(tempfile.gettempdir()) / "a2a_calendars.sqlite3")
+        self.refresh_interval = refresh_interval
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS calendars ("
+                " owner TEXT PRIMARY KEY,"
+                " version INTEGER NOT NULL,"
+                " source TEXT,"
+                " updated REAL NOT NULL,"
+                " body TEXT NOT NULL)"
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def version(self, owner: str) -> Optional[int]:
+        row = self._conn().execute("SELECT version FROM calendars WHERE owner = ?", (owner,)).fetchone()
+        return row[0] if row else None
+
+    def load(self, owner: str) -> Optional[tuple[int, IntervalCalendar]]:
+        row = self._conn().execute(
+            "SELECT version, body FROM calendars WHERE owner = ?", (owner,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], IntervalCalendar.from_dict(json.loads(row[1]), owner=owner)
+
+    def save(self, calendar: IntervalCalendar, source: Optional[str] = None) -> int:
+        """Stores `calendar` under its owner and returns the new version."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = self._upsert(conn, calendar, source)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return version
+
+    def load_or_seed(
+        self,
+        owner: str,
+        seed: Callable[[], IntervalCalendar],
+        source: Optional[str] = None,
+    ) -> tuple[int, IntervalCalendar]:
+        """
+        Returns the stored calendar for `owner`, building it with `seed()`
+        first if there is none yet or it came from a different `source`.
+        The check and the seed run in one write transaction, so when several
+        workers start at once exactly one of them seeds.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT version, source, body FROM calendars WHERE owner = ?", (owner,)
+            ).fetchone()
+            if row is not None and (source is None or row[1] == source):
+                conn.execute("COMMIT")
+                return row[0], IntervalCalendar.from_dict(json.loads(row[2]), owner=owner)
+            calendar = seed()
+            calendar.owner = owner
+            version = self._upsert(conn, calendar, source)
+            conn.execute("COMMIT")
+            return version, calendar
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def shared(
+        self,
+        owner: str,
+        seed: Callable[[], IntervalCalendar],
+        source: Optional[str] = None,
+    ) -> "SharedCalendar":
+        version, calendar = self.load_or_seed(owner, seed, source)
+        return SharedCalendar(self, owner, version, calendar)
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, calendar: IntervalCalendar, source: Optional[str]) -> int:
+        body = json.dumps(calendar.to_dict())
+        conn.execute(
+            "INSERT INTO calendars(owner, version, source, updated, body) VALUES (?, 1, ?, ?, ?)"
+            " ON CONFLICT(owner) DO UPDATE SET version = version + 1, source = excluded.source,"
+            " updated = excluded.updated, body = excluded.body",
+            (calendar.owner, source, datetime.now(timezone.utc).timestamp(), body),
+        )
+        return conn.execute(
+            "SELECT version FROM calendars WHERE owner = ?", (calendar.owner,)
+        ).fetchone()[0]
+
+
+class SharedCalendar:
+    """
+    A process-local copy of a stored calendar. `current()` checks the stored
+    version at most every `refresh_interval` seconds and reloads only when
+    another process saved a newer one.
+    """
+
+    def __init__(self, store: CalendarStore, owner: str, version: int, calendar: IntervalCalendar):
+        self.store = store
+        self.owner = owner
+        self.version = version
+        self._calendar = calendar
+        self._checked = monotonic()
+
+    def __repr__(self) -> str:
+        return f"SharedCalendar(v{self.version}, {self._calendar!r})"
+
+    def current(self) -> IntervalCalendar:
+        now = monotonic()
+        if now - self._checked >= self.store.refresh_interval:
+            self._checked = now
+            if self.store.version(self.owner) != self.version:
+                loaded = self.store.load(self.owner)
+                if loaded is not None:
+                    self.version, self._calendar = loaded
+        return self._calendar
+
+    def save(self) -> None:
+        """Publishes local changes (e.g. new bookings) to the other processes."""
+        self.version = self.store.save(self._calendar)
+
+
+def load_shared_calendar(
+    owner: str,
+    generate: Callable[[], IntervalCalendar],
+    path: Union[str, os.PathLike, None] = None,
+    store: Optional[CalendarStore] = None,
+) -> SharedCalendar:
+    """
+    The calendar every worker of a friend server should serve: imported from
+    `path` (and re-imported when that file's contents change), or generated
+    with `generate()` and reused from the store for the rest of the day.
+    Generated calendars start today, so the first start on a later day
+    draws a new one instead of serving a horizon that has run out; it also
+    replaces a calendar imported from a path that is no longer configured.
+    """
+    store = store or CalendarStore()
+    if path:
+        source = "sha256:" + hashlib.sha256(Path(path).read_bytes()).hexdigest()
+        return store.shared(owner, lambda: load_calendar(path, owner=owner), source=source)
+    return store.shared(owner, generate, source=f"generated:{date.today().isoformat()}")
@@ -0,0 +1,39 @@
+from __future__ import annotations
+import time
+from typing import Any, Optional
+
+# Message metadata key carrying the time budget the caller gives the receiver.
+DEADLINE_METADATA_KEY = "deadline_ms"
+
+
+def deadline_metadata(budget_seconds: float) -> dict[str, int]:
+    """Message metadata telling a friend how long it has to answer."""
+    return {DEADLINE_METADATA_KEY: max(int(budget_seconds * 1000), 0)}
+
+
+def budget_from_metadata(metadata: Optional[dict[str, Any]]) -> Optional[float]:
+    """
+    Seconds the sender allowed for this message, or None when it did not say.
+    A relative budget is used instead of a wall-clock timestamp so clock skew
+    between machines does not matter.
+    """
+    if not metadata or DEADLINE_METADATA_KEY not in metadata:
+        return None
+    try:
+        return max(float(metadata[DEADLINE_METADATA_KEY]) / 1000.0, 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class Deadline:
+    """A point in (monotonic) time that a piece of work must finish by."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
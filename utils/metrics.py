@@ -0,0 +1,339 @@
+from __future__ import annotations
+import asyncio
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Gauge callbacks return one value, or {label value: value} for a labelled family.
+GaugeValue = Union[float, int, dict[str, Union[float, int]]]
+# How often each prefork worker writes its metrics for the others to serve.
+SNAPSHOT_SECONDS = float(os.getenv("METRICS_SNAPSHOT_SECONDS", "5"))
+
+# Set in prefork workers (see `start_worker_snapshots`): the directory the workers
+# of one server write their snapshots to, so any of them can serve the total.
+_multiprocess_dir: Optional[Path] = None
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(k), v] for k, v in self._values.items()]
+
+    def render(self, others: list = ()) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for snapshot in others:
+            for key, value in snapshot:
+                values[tuple(key)] = values.get(tuple(key), 0.0) + value
+        lines += [f"{self.name}{_labels(self.labels, k)} {v}" for k, v in values.items()]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        # Per label set: [count per bucket (+Inf last)], sum, count.
+        self._series: dict[tuple[str, ...], list[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0, 0])
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(k), list(counts), total, count] for k, (counts, total, count) in self._series.items()]
+
+    def render(self, others: list = ()) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: [list(counts), total, count] for k, (counts, total, count) in self._series.items()}
+        for snapshot in others:
+            for key, counts, total, count in snapshot:
+                merged = series.setdefault(tuple(key), [[0] * len(counts), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+                merged[2] += count
+        for key, (counts, total, count) in series.items():
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels((*self.labels, 'le'), (*key, str(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Gauge:
+    """
+    A value read when /metrics is scraped, so nothing is updated on the
+    request path. Across prefork workers each one's value is reported with
+    a `worker` label (its pid), since summing e.g. a shared store's size
+    would count it once per worker.
+    """
+
+    def __init__(self, name: str, help: str, fn: Callable[[], GaugeValue], label: str = ""):
+        self.name, self.help, self.fn, self.label = name, help, fn, label
+
+    def snapshot(self) -> Optional[GaugeValue]:
+        try:
+            return self.fn()
+        except Exception as e:
+            logger.warning(f"Gauge {self.name} failed: {e}")
+            return None
+
+    def render(self, others: Optional[dict[str, GaugeValue]] = None) -> list[str]:
+        value = self.snapshot()
+        if others is None:
+            values = {"": value} if value is not None else {}
+        else:
+            values = {**others, **({str(os.getpid()): value} if value is not None else {})}
+        if not values:
+            return []
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for worker, value in values.items():
+            names, keys = ((), ()) if others is None else (("worker",), (worker,))
+            if isinstance(value, dict):
+                lines += [f"{self.name}{_labels((self.label, *names), (k, *keys))} {v}"
+                          for k, v in value.items() if isinstance(v, (int, float))]
+            else:
+                lines.append(f"{self.name}{_labels(names, keys)} {value}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Union[Counter, Histogram, Gauge]] = {}
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, fn: Callable[[], GaugeValue], label: str = "") -> Gauge:
+        self._metrics[name] = Gauge(name, help, fn, label)
+        return self._metrics[name]
+
+    def snapshot(self) -> dict[str, Any]:
+        return {name: metric.snapshot() for name, metric in list(self._metrics.items())}
+
+    def render(self, others: Optional[dict[str, dict[str, Any]]] = None) -> str:
+        """Renders this process's metrics, summed with `others` ({worker pid: snapshot}) if given."""
+        lines: list[str] = []
+        for name, metric in list(self._metrics.items()):
+            if others is None:
+                lines += metric.render()
+            elif isinstance(metric, Gauge):
+                lines += metric.render({pid: snap[name] for pid, snap in others.items()
+                                        if snap.get(name) is not None})
+            else:
+                lines += metric.render([snap[name] for snap in others.values() if name in snap])
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "a2a_http_requests_total", "HTTP requests served.", ("method", "path", "status"))
+HTTP_SECONDS = REGISTRY.histogram(
+    "a2a_http_request_seconds", "HTTP request latency (until the response starts streaming).", ("method", "path"))
+SPAN_SECONDS = REGISTRY.histogram(
+    "a2a_span_seconds",
+    "Latency of traced operations: model calls, framework runs, signing, verification, NFT audits.",
+    ("span",))
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "a2a_event_loop_lag_seconds", "How late the event loop woke a 0.5s sleep.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5))
+
+_http_in_flight = 0
+_last_loop_lag = 0.0
+REGISTRY.gauge("a2a_http_in_flight", "HTTP requests being served.", lambda: _http_in_flight)
+REGISTRY.gauge("a2a_event_loop_lag_last_seconds", "Most recent event-loop lag sample.", lambda: _last_loop_lag)
+
+# Every span feeds the latency histograms, whether or not tracing is exporting it.
+tracing.add_span_listener(lambda s: SPAN_SECONDS.observe((s.end_ns - s.start_ns) / 1e9, span=s.name))
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware counting requests, in-flight requests and latency,
+    and starting the event-loop lag monitor on the first request. Paths
+    outside `paths` are reported as "other" to keep label cardinality bounded.
+    """
+
+    def __init__(self, app, paths: tuple[str, ...] = ("/", "/.well-known/agent.json", "/metrics")):
+        self.app = app
+        self.paths = paths
+        self._lag_task: Optional[asyncio.Task] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        global _http_in_flight
+        if self._lag_task is None:
+            self._lag_task = asyncio.create_task(_watch_loop_lag())
+        method = scope["method"]
+        path = scope["path"] if scope["path"] in self.paths else "other"
+        start = time.perf_counter()
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                HTTP_SECONDS.observe(time.perf_counter() - start, method=method, path=path)
+            await send(message)
+
+        _http_in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _http_in_flight -= 1
+            HTTP_REQUESTS.inc(method=method, path=path, status=status)
+
+
+async def _watch_loop_lag(interval: float = 0.5) -> None:
+    global _last_loop_lag
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        _last_loop_lag = max(time.perf_counter() - start - interval, 0.0)
+        LOOP_LAG_SECONDS.observe(_last_loop_lag)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    # Gauges may hit SQLite (task store size), so render off the event loop.
+    body = await asyncio.to_thread(render_all)
+    return Response(body, media_type=CONTENT_TYPE)
+
+
+def render_all() -> str:
+    """This process's metrics, plus the latest snapshots of its sibling prefork workers."""
+    if _multiprocess_dir is None:
+        return REGISTRY.render()
+    others: dict[str, dict[str, Any]] = {}
+    for path in _multiprocess_dir.glob("*.json"):
+        if path.stem == str(os.getpid()):
+            continue
+        try:
+            snapshot = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if not _alive(int(path.stem)):
+            # A dead worker's counts still belong in the totals; its gauges do not.
+            snapshot = {k: v for k, v in snapshot.items() if not isinstance(REGISTRY._metrics.get(k), Gauge)}
+        others[path.stem] = snapshot
+    return REGISTRY.render(others)
+
+
+def start_worker_snapshots(directory: Union[str, os.PathLike]) -> None:
+    """
+    Called by utils.prefork in each worker right after the fork: writes this
+    worker's metrics to `directory` every SNAPSHOT_SECONDS (and once more
+    on `write_snapshot()` at exit), so whichever worker is scraped reports
+    the whole server.
+    """
+    global _multiprocess_dir
+    _multiprocess_dir = Path(directory)
+
+    def run() -> None:
+        while True:
+            time.sleep(SNAPSHOT_SECONDS)
+            write_snapshot()
+
+    threading.Thread(target=run, name="metrics-snapshot", daemon=True).start()
+
+
+def write_snapshot() -> None:
+    if _multiprocess_dir is None:
+        return
+    path = _multiprocess_dir / f"{os.getpid()}.json"
+    tmp = path.with_suffix(".tmp")
+    try:
+        tmp.write_text(json.dumps(REGISTRY.snapshot(), default=str), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"Could not write metrics snapshot {path}: {e}")
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def instrument(
+    app,
+    *,
+    in_flight_tasks: Optional[Callable[[], int]] = None,
+    task_store: Any = None,
+    push_notifier: Any = None,
+    session_count: Optional[Callable[[], int]] = None,
+):
+    """
+    Adds GET /metrics (Prometheus text format) and request metrics to a
+    Starlette app built by A2AStarletteApplication, plus gauges for whatever
+    the server has: in-flight tasks, task store tiers, push queue and
+    sessions. With AGENT_WORKERS > 1 whichever worker is scraped reports
+    the totals of all of them (see `start_worker_snapshots`).
+    """
+    if in_flight_tasks is not None:
+        REGISTRY.gauge("a2a_tasks_in_flight", "Agent tasks currently executing.", in_flight_tasks)
+    if task_store is not None:
+        REGISTRY.gauge("a2a_task_store", "Task store tier sizes and counters.", task_store.metrics, label="stat")
+    if push_notifier is not None:
+        REGISTRY.gauge("a2a_push", "Push notification queue depth, counters and latency.",
+                       push_notifier.metrics, label="stat")
+    if session_count is not None:
+        REGISTRY.gauge("a2a_sessions", "Live conversation sessions.", session_count)
+    app.add_route("/metrics", metrics_endpoint, methods=["GET"])
+    app.add_middleware(MetricsMiddleware)
+    return app
@@ -0,0 +1,101 @@
+from __future__ import annotations
+import logging
+import os
+import shutil
+import signal
+import tempfile
+import time
+from typing import Optional
+
+import uvicorn
+
+from utils import metrics, structured_log
+
+logger = logging.getLogger(__name__)
+
+
+def worker_count() -> int:
+    """Number of server processes requested through AGENT_WORKERS (default 1)."""
+    return max(int(os.getenv("AGENT_WORKERS", "1")), 1)
+
+
+def serve(app, host: str, port: int, workers: Optional[int] = None, **config) -> None:
+    """
+    Runs an ASGI app on `workers` processes sharing one listening socket.
+
+    `uvicorn.run(workers=N)` needs an import string, but our servers build
+    their app in `main()`. Instead the parent binds the socket once, forks,
+    and each child runs `uvicorn.Server(...).run(sockets=[sock])`; the
+    kernel spreads connections across them. Children that die are
+    restarted; SIGINT/SIGTERM stop them all. With one worker (or no fork
+    support) this is plain `uvicorn.run`.
+
+    Anything opened before the fork must be fork-safe: the SQLite-backed
+    stores reopen their connections in the child, and since threads do not
+    survive fork, the trace exporter and the log listener start theirs
+    again there (via `os.register_at_fork`). Workers share their
+    metrics through a temporary directory, so /metrics on any of them
+    reports the whole server.
+    """
+    workers = workers or worker_count()
+    if structured_log.is_configured():
+        # Let uvicorn's loggers propagate to the queued root handler instead of writing directly.
+        config.setdefault("log_config", None)
+    if workers <= 1 or not hasattr(os, "fork"):
+        uvicorn.run(app, host=host, port=port, **config)
+        return
+
+    uv_config = uvicorn.Config(app, host=host, port=port, **config)
+    sock = uv_config.bind_socket()
+    metrics_dir = tempfile.mkdtemp(prefix="a2a_metrics_")
+    children: dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid:
+            children[pid] = slot
+            return
+        # Child: drop the parent's signal handlers; uvicorn installs its own.
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        metrics.start_worker_snapshots(metrics_dir)
+        code = 0
+        try:
+            uvicorn.Server(uvicorn.Config(app, host=host, port=port, **config)).run(sockets=[sock])
+        except BaseException:
+            logger.exception(f"Worker {os.getpid()} crashed")
+            code = 1
+        finally:
+            metrics.write_snapshot()
+            os._exit(code)
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for slot in range(workers):
+        spawn(slot)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    logger.info(f"Serving on http://{host}:{port} with {workers} worker processes")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        if slot is not None and not stopping:
+            logger.warning(f"Worker {pid} exited with status {status}; restarting")
+            time.sleep(1.0)
+            spawn(slot)
+    sock.close()
+    shutil.rmtree(metrics_dir, ignore_errors=True)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+from collections import deque
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Optional
+
+import httpx
+from a2a.server.tasks import PushNotifier
+from a2a.types import PushNotificationConfig, Task
+
+from utils.task_store import TERMINAL_STATES
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = "X-A2A-Notification-Token"
+
+
+class QueuedPushNotifier(PushNotifier):
+    """
+    PushNotifier that never sends on the caller's path.
+
+    `send_notification` only records the latest task snapshot and enqueues
+    its id; a pool of `workers` coroutines delivers from a bounded queue.
+    Rapid updates for the same task are coalesced, so only the newest state
+    is sent, and one task is never delivered by two workers at once, so a
+    webhook never sees an older state after a newer one. Failed deliveries
+    are retried with exponential backoff and jitter. Once a task's final
+    state has been delivered (or given up on), its config is forgotten.
+    """
+
+    def __init__(
+        self,
+        httpx_client: Optional[httpx.AsyncClient] = None,
+        workers: int = 4,
+        max_queue: int = 1000,
+        max_attempts: int = 5,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+        timeout: float = 5.0,
+    ):
+        self._client = httpx_client or httpx.AsyncClient(timeout=timeout)
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._configs: dict[str, PushNotificationConfig] = {}
+        self._pending: dict[str, tuple[float, Task]] = {}
+        self._in_flight: set[str] = set()
+        self._queue: Optional[asyncio.Queue[str]] = None
+        self._workers: list[asyncio.Task] = []
+        self._latencies: deque[float] = deque(maxlen=512)
+        self._stats = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "delivered": 0,
+            "retries": 0,
+            "failed": 0,
+            "dropped": 0,
+        }
+
+    @classmethod
+    def from_env(cls, httpx_client: Optional[httpx.AsyncClient] = None) -> "QueuedPushNotifier":
+        """Builds a notifier from PUSH_WORKERS / PUSH_QUEUE_SIZE / PUSH_MAX_ATTEMPTS / PUSH_TIMEOUT_SECONDS."""
+        return cls(
+            httpx_client=httpx_client,
+            workers=int(os.getenv("PUSH_WORKERS", "4")),
+            max_queue=int(os.getenv("PUSH_QUEUE_SIZE", "1000")),
+            max_attempts=int(os.getenv("PUSH_MAX_ATTEMPTS", "5")),
+            timeout=float(os.getenv("PUSH_TIMEOUT_SECONDS", "5")),
+        )
+
+    # ---- PushNotifier interface -----------------------------------------
+
+    async def set_info(self, task_id: str, notification_config: PushNotificationConfig) -> None:
+        self._configs[task_id] = notification_config
+
+    async def get_info(self, task_id: str) -> Optional[PushNotificationConfig]:
+        return self._configs.get(task_id)
+
+    async def delete_info(self, task_id: str) -> None:
+        self._configs.pop(task_id, None)
+
+    async def send_notification(self, task: Task) -> None:
+        if task.id not in self._configs:
+            return
+        self._ensure_workers()
+        queued = task.id in self._pending
+        self._pending[task.id] = (time.monotonic(), task)
+        if queued:
+            self._stats["coalesced"] += 1
+            return
+        if task.id in self._in_flight:
+            # The worker delivering the older state re-queues the task when done.
+            return
+        self._enqueue(task.id)
+
+    # ---- metrics --------------------------------------------------------
+
+    def metrics(self) -> dict[str, float]:
+        """Delivery counters, queue depth and delivery latency percentiles (seconds)."""
+        ordered = sorted(self._latencies)
+
+        def pct(p: float) -> float:
+            return ordered[int(p * (len(ordered) - 1))] if ordered else 0.0
+
+        return {
+            **self._stats,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "latency_p50": pct(0.50),
+            "latency_p95": pct(0.95),
+            "latency_max": ordered[-1] if ordered else 0.0,
+        }
+
+    async def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    # ---- internals ------------------------------------------------------
+
+    def _ensure_workers(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker(), name=f"push-worker-{i}")
+                for i in range(self.workers)
+            ]
+
+    def _enqueue(self, task_id: str) -> None:
+        try:
+            self._queue.put_nowait(task_id)
+            self._stats["enqueued"] += 1
+        except asyncio.QueueFull:
+            entry = self._pending.pop(task_id, None)
+            if entry is not None and task_id not in self._in_flight:
+                self._forget_if_final(entry[1])
+            self._stats["dropped"] += 1
+            logger.warning(f"Push queue full, dropping notification for task {task_id}")
+
+    async def _worker(self) -> None:
+        while True:
+            task_id = await self._queue.get()
+            task: Optional[Task] = None
+            try:
+                entry = self._pending.pop(task_id, None)
+                config = self._configs.get(task_id)
+                if entry is None or config is None:
+                    continue
+                self._in_flight.add(task_id)
+                enqueued_at, task = entry
+                if await self._deliver(config, task):
+                    self._latencies.append(time.monotonic() - enqueued_at)
+            except Exception as e:
+                logger.error(f"Push worker error for task {task_id}: {e}")
+            finally:
+                self._in_flight.discard(task_id)
+                if task_id in self._pending:
+                    self._enqueue(task_id)
+                elif task is not None:
+                    self._forget_if_final(task)
+                self._queue.task_done()
+
+    def _forget_if_final(self, task: Task) -> None:
+        """No more updates follow a terminal state, so its webhook config can go."""
+        if task.status.state in TERMINAL_STATES:
+            self._configs.pop(task.id, None)
+
+    async def _deliver(self, config: PushNotificationConfig, task: Task) -> bool:
+        headers = {TOKEN_HEADER: config.token} if config.token else None
+        body = task.model_dump(mode="json", exclude_none=True)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = await self._client.post(config.url, json=body, headers=headers)
+                if response.status_code < 500 and response.status_code != 429:
+                    response.raise_for_status()
+                    self._stats["delivered"] += 1
+                    return True
+                error = f"HTTP {response.status_code}"
+            except httpx.HTTPStatusError as e:
+                # 4xx other than 429 will not get better by retrying.
+                self._stats["failed"] += 1
+                logger.error(f"Push to {config.url} rejected for task {task.id}: {e}")
+                return False
+            except httpx.HTTPError as e:
+                error = str(e) or type(e).__name__
+            if attempt == self.max_attempts or task.id in self._pending:
+                # Give up, or let the newer state for this task go out instead.
+                break
+            self._stats["retries"] += 1
+            delay = min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        if task.id not in self._pending:
+            self._stats["failed"] += 1
+            logger.error(f"Push to {config.url} failed for task {task.id}: {error}")
+        return False
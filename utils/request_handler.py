@@ -0,0 +1,115 @@
+from __future__ import annotations
+import asyncio
+import logging
+from typing import Optional, Union
+
+from a2a.server.context import ServerCallContext
+from a2a.server.events import EventConsumer
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import ResultAggregator, TaskManager
+from a2a.types import Message, MessageSendParams, Task, TaskState, TaskStatus
+
+from utils.task_store import TERMINAL_STATES
+
+logger = logging.getLogger(__name__)
+
+
+class NonBlockingRequestHandler(DefaultRequestHandler):
+    """
+    DefaultRequestHandler that honours `configuration.blocking = False` on
+    `message/send`.
+
+    The SDK handler always waits for the task to finish. Here a non-blocking
+    send returns the task as soon as the executor has published its first
+    event. The rest of the run is consumed in the background, and every
+    update goes to the caller's push-notification webhook, so a slow task
+    does not keep the caller's HTTP connection open.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._background: set[asyncio.Task] = set()
+
+    async def on_message_send(
+        self,
+        params: MessageSendParams,
+        context: Optional[ServerCallContext] = None,
+    ) -> Union[Message, Task]:
+        config = params.configuration
+        if not (self._push_notifier and config and config.blocking is False):
+            return await super().on_message_send(params, context)
+
+        task_manager = TaskManager(
+            task_id=params.message.taskId,
+            context_id=params.message.contextId,
+            task_store=self.task_store,
+            initial_message=params.message,
+        )
+        task = await task_manager.get_task()
+        if task:
+            task = task_manager.update_with_message(params.message, task)
+        request_context = await self._request_context_builder.build(
+            params=params,
+            task_id=task.id if task else None,
+            context_id=params.message.contextId,
+            task=task,
+            context=context,
+        )
+        task_id = request_context.task_id
+        queue = await self._queue_manager.create_or_tap(task_id)
+        result_aggregator = ResultAggregator(task_manager)
+        producer_task = asyncio.create_task(self._run_event_stream(request_context, queue))
+        await self._register_producer(task_id, producer_task)
+
+        consumer = EventConsumer(queue)
+        producer_task.add_done_callback(consumer.agent_task_callback)
+        events = result_aggregator.consume_and_emit(consumer)
+        try:
+            first = await anext(events)
+        except BaseException:
+            await self._cleanup_producer(producer_task, task_id)
+            raise
+
+        if isinstance(first, Message):
+            self._track(self._drain(events, result_aggregator, producer_task, task_id, notify=False))
+            return first
+
+        if config.pushNotificationConfig:
+            await self._push_notifier.set_info(task_id, config.pushNotificationConfig)
+        await self._notify(result_aggregator)
+        self._track(self._drain(events, result_aggregator, producer_task, task_id))
+        return await result_aggregator.current_result
+
+    def _track(self, coro) -> None:
+        bg = asyncio.create_task(coro)
+        self._background.add(bg)
+        bg.add_done_callback(self._background.discard)
+
+    async def _notify(self, result_aggregator: ResultAggregator) -> None:
+        latest = await result_aggregator.current_result
+        if isinstance(latest, Task):
+            await self._push_notifier.send_notification(latest)
+
+    async def _drain(
+        self,
+        events,
+        result_aggregator: ResultAggregator,
+        producer_task: asyncio.Task,
+        task_id: str,
+        notify: bool = True,
+    ) -> None:
+        try:
+            async for _ in events:
+                if notify:
+                    await self._notify(result_aggregator)
+        except Exception as e:
+            logger.error(f"Background run for task {task_id} failed: {e}")
+            # Nobody is waiting on the HTTP response, so report the failure via push.
+            task = await result_aggregator.current_result
+            if isinstance(task, Task) and task.status.state not in TERMINAL_STATES:
+                task.status = TaskStatus(state=TaskState.failed)
+                await self.task_store.save(task)
+                if notify:
+                    await self._push_notifier.send_notification(task)
+        finally:
+            await self._cleanup_producer(producer_task, task_id)
@@ -0,0 +1,191 @@
+from __future__ import annotations
+import logging
+import os
+import time
+from typing import Callable, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_AUTHOR = "conversation_summary"
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+
+Summarizer = Callable[[list[Event]], str]
+
+
+def _event_text(event: Event, limit: int) -> str:
+    """One-line rendering of an event for the extractive summary."""
+    pieces = []
+    for part in (event.content.parts if event.content and event.content.parts else []):
+        if part.text:
+            pieces.append(part.text.strip())
+        elif part.function_call:
+            pieces.append(f"called {part.function_call.name}({part.function_call.args})")
+        elif part.function_response:
+            pieces.append(f"{part.function_response.name} → {part.function_response.response}")
+    text = " ".join(pieces).replace("\n", " ")
+    if len(text) > limit:
+        text = text[: limit - 1] + "…"
+    return f"{event.author}: {text}" if text else ""
+
+
+def summarize_events(events: list[Event], max_chars: int = 2000, per_event: int = 200) -> str:
+    """
+    Cheap extractive summary: one truncated line per dropped event, keeping
+    the most recent lines when the total exceeds `max_chars`.
+    """
+    lines: list[str] = []
+    for event in events:
+        if event.author == SUMMARY_AUTHOR and event.content and event.content.parts:
+            # Carry an earlier summary forward line by line instead of re-truncating it.
+            lines.extend(event.content.parts[0].text.splitlines()[1:])
+        elif line := _event_text(event, per_event):
+            lines.append(line)
+    out: list[str] = []
+    total = 0
+    for line in reversed(lines):
+        total += len(line) + 1
+        if total > max_chars:
+            break
+        out.append(line)
+    return "\n".join(reversed(out))
+
+
+class BoundedSessionService(InMemorySessionService):
+    """
+    InMemorySessionService with bounded memory.
+
+    * Sessions idle for longer than `idle_ttl_seconds` are evicted.
+    * Each session keeps at most `max_events` events; older events are
+      dropped, or folded into a single summary event when a `summarizer`
+      is configured, so the prompt rebuilt from history stays bounded.
+    """
+
+    def __init__(
+        self,
+        idle_ttl_seconds: float = 3600.0,
+        max_events: int = 50,
+        summarizer: Optional[Summarizer] = None,
+        sweep_interval: float = 60.0,
+    ):
+        super().__init__()
+        if max_events < 2:
+            raise ValueError("max_events must be at least 2")
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_events = max_events
+        self.summarizer = summarizer
+        self.sweep_interval = sweep_interval
+        self._touched: dict[tuple[str, str, str], float] = {}
+        self._last_sweep = time.monotonic()
+        self.evicted_sessions = 0
+        self.compacted_events = 0
+
+    @classmethod
+    def from_env(cls) -> "BoundedSessionService":
+        """
+        Builds a service from SESSION_IDLE_TTL_SECONDS / SESSION_MAX_EVENTS /
+        SESSION_SUMMARIZE (set to "false" to drop old events without a summary).
+        """
+        summarize = os.getenv("SESSION_SUMMARIZE", "true").lower() != "false"
+        return cls(
+            idle_ttl_seconds=float(os.getenv("SESSION_IDLE_TTL_SECONDS", "3600")),
+            max_events=int(os.getenv("SESSION_MAX_EVENTS", "50")),
+            summarizer=summarize_events if summarize else None,
+        )
+
+    def session_count(self) -> int:
+        return len(self._touched)
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        await self._maybe_sweep()
+        session = await super().create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        self._touched[(app_name, user_id, session.id)] = time.monotonic()
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        await self._maybe_sweep()
+        session = await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        if session is not None:
+            self._touched[(app_name, user_id, session_id)] = time.monotonic()
+        return session
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        self._touched.pop((app_name, user_id, session_id), None)
+        await super().delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        key = (session.app_name, session.user_id, session.id)
+        self._touched[key] = time.monotonic()
+        stored = self.sessions.get(session.app_name, {}).get(session.user_id, {}).get(session.id)
+        if stored is not None and len(stored.events) > self.max_events:
+            self._compact(stored)
+        return event
+
+    def _compact(self, session: Session) -> None:
+        events = session.events
+        keep = self.max_events - (1 if self.summarizer else 0)
+        cut = len(events) - keep
+        # Never start the retained window on an orphaned function response.
+        while cut < len(events) and events[cut].get_function_responses():
+            cut += 1
+        dropped, kept = events[:cut], events[cut:]
+        if not dropped:
+            return
+
+        if self.summarizer:
+            summary = self.summarizer(dropped)
+            if summary:
+                kept.insert(
+                    0,
+                    Event(
+                        author=SUMMARY_AUTHOR,
+                        invocation_id=dropped[-1].invocation_id,
+                        timestamp=dropped[-1].timestamp,
+                        content=types.Content(
+                            role="user",
+                            parts=[types.Part(text=f"{SUMMARY_HEADER}\n{summary}")],
+                        ),
+                    ),
+                )
+        session.events = kept
+        self.compacted_events += len(dropped)
+        logger.debug("Compacted %d event(s) from session %s", len(dropped), session.id)
+
+    async def _maybe_sweep(self) -> None:
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        cutoff = now - self.idle_ttl_seconds
+        idle = [key for key, touched in self._touched.items() if touched < cutoff]
+        for app_name, user_id, session_id in idle:
+            await self.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+            user_sessions = self.sessions.get(app_name, {})
+            if user_id in user_sessions and not user_sessions[user_id]:
+                del user_sessions[user_id]
+        self.evicted_sessions += len(idle)
+        if idle:
+            logger.info("Evicted %d idle session(s)", len(idle))
@@ -0,0 +1,392 @@
+from __future__ import annotations
+from collections import OrderedDict
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Unix socket of the per-machine signing daemon. Unset, agents call their node directly.
+SIGN_SIDECAR_SOCKET = os.getenv("SIGN_SIDECAR_SOCKET", "")
+# Node requests per second per node (0 = unlimited), and how many may go in one burst.
+SIGN_SIDECAR_RATE = float(os.getenv("SIGN_SIDECAR_RATE", "20"))
+SIGN_SIDECAR_BURST = int(os.getenv("SIGN_SIDECAR_BURST", "10"))
+# How long the daemon collects requests into one batch, and the largest batch.
+SIGN_SIDECAR_BATCH_WINDOW_MS = float(os.getenv("SIGN_SIDECAR_BATCH_WINDOW_MS", "2"))
+SIGN_SIDECAR_MAX_BATCH = int(os.getenv("SIGN_SIDECAR_MAX_BATCH", "32"))
+SIGN_SIDECAR_TIMEOUT_SECONDS = float(os.getenv("SIGN_SIDECAR_TIMEOUT_SECONDS", "15"))
+SIGN_SIDECAR_DID_TTL_SECONDS = float(os.getenv("SIGN_SIDECAR_DID_TTL_SECONDS", "3600"))
+# Largest request line the daemon reads; longer ones are answered with an error.
+SIGN_SIDECAR_MAX_REQUEST_BYTES = int(os.getenv("SIGN_SIDECAR_MAX_REQUEST_BYTES", str(1 << 20)))
+VERIFY_CACHE_SIZE = 4096
+
+
+class SidecarError(Exception):
+    """The daemon (or the node behind it) rejected or failed a request."""
+
+
+class SidecarUnavailable(SidecarError):
+    """The daemon is not running; callers fall back to calling their node."""
+
+
+# ---- client ----------------------------------------------------------------
+
+class SidecarClient:
+    """
+    Blocking client for the signing daemon, called from the agents' sign
+    and verify helpers (which already run in worker threads). Each thread
+    keeps one connection open, so a call costs one round trip over the
+    Unix socket.
+    """
+
+    def __init__(self, path: str = SIGN_SIDECAR_SOCKET, timeout: float = SIGN_SIDECAR_TIMEOUT_SECONDS):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+
+    def sign(self, node: str, did: Optional[str], msg: str, password: str) -> str:
+        return self.call("sign", node=node, did=did, msg=msg, password=password)
+
+    def verify(self, node: str, did: str, msg: str, signature: str) -> bool:
+        return bool(self.call("verify", node=node, did=did, msg=msg, signature=signature))
+
+    def did(self, node: str) -> Optional[str]:
+        return self.call("did", node=node)
+
+    def call(self, op: str, **fields: Any) -> Any:
+        request_id = next(self._ids)
+        line = json.dumps({"id": request_id, "op": op, **fields}).encode() + b"\n"
+        if len(line) > SIGN_SIDECAR_MAX_REQUEST_BYTES:
+            raise SidecarError(
+                f"Signing sidecar {op} request is {len(line)} bytes; the limit is "
+                f"SIGN_SIDECAR_MAX_REQUEST_BYTES={SIGN_SIDECAR_MAX_REQUEST_BYTES}"
+            )
+        stream = self._stream()
+        try:
+            stream.write(line)
+            stream.flush()
+            reply = stream.readline()
+        except OSError as e:
+            self._close()
+            raise SidecarError(f"Signing sidecar {op} failed: {e}") from e
+        if not reply:
+            self._close()
+            raise SidecarUnavailable("Signing sidecar closed the connection")
+        response = json.loads(reply)
+        if response.get("id") != request_id:
+            self._close()
+            raise SidecarError(f"Signing sidecar answered request {response.get('id')}, not {request_id}")
+        if not response.get("ok"):
+            raise SidecarError(response.get("error") or f"Signing sidecar {op} failed")
+        return response.get("result")
+
+    def _stream(self):
+        stream = getattr(self._local, "stream", None)
+        if stream is None or self._local.pid != os.getpid():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError as e:
+                sock.close()
+                raise SidecarUnavailable(f"Signing sidecar not reachable at {self.path}: {e}") from e
+            stream = sock.makefile("rwb")
+            self._local.sock, self._local.stream, self._local.pid = sock, stream, os.getpid()
+        return stream
+
+    def _close(self) -> None:
+        for name in ("stream", "sock"):
+            handle = getattr(self._local, name, None)
+            if handle is not None:
+                try:
+                    handle.close()
+                except OSError:
+                    pass
+            setattr(self._local, name, None)
+
+
+# Shared client for the agents; None when no sidecar is configured.
+sidecar: Optional[SidecarClient] = SidecarClient() if SIGN_SIDECAR_SOCKET else None
+
+
+def resolve_did(node) -> Optional[str]:
+    """A NodeClient's DID, from the sidecar's cache when one is running."""
+    if sidecar is not None:
+        try:
+            return sidecar.did(node.get_base_url())
+        except SidecarError as e:
+            logger.warning(f"Resolving the DID without the signing sidecar: {e}")
+    return node.get_did()
+
+
+# ---- daemon ----------------------------------------------------------------
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate, self.burst = rate, max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class NodeLane:
+    """
+    Everything the daemon does against one node: a pooled keep-alive
+    connection, the node's DID (cached), a rate limit shared by every agent
+    on the machine, and a batcher. Requests arriving within the batch
+    window are collected, identical ones are sent once, and the batch goes
+    out concurrently over the pool.
+    """
+
+    def __init__(self, base_url: str, rate: float = SIGN_SIDECAR_RATE, burst: int = SIGN_SIDECAR_BURST,
+                 window: float = SIGN_SIDECAR_BATCH_WINDOW_MS / 1000, max_batch: int = SIGN_SIDECAR_MAX_BATCH):
+        self.base_url = base_url.rstrip("/")
+        self.window, self.max_batch = window, max_batch
+        self._client = httpx.AsyncClient(base_url=self.base_url, timeout=SIGN_SIDECAR_TIMEOUT_SECONDS)
+        self._bucket = TokenBucket(rate, burst)
+        self._queue: asyncio.Queue[tuple[str, str, dict]] = asyncio.Queue()
+        self._pending: dict[str, asyncio.Future] = {}
+        self._in_flight: set[asyncio.Task] = set()
+        self._verified: OrderedDict[str, bool] = OrderedDict()
+        self._did: Optional[str] = None
+        self._did_at = 0.0
+        self._worker = asyncio.create_task(self._run())
+        self.stats = {"requests": 0, "coalesced": 0, "node_calls": 0, "batches": 0, "verify_cache_hits": 0}
+
+    async def submit(self, op: str, fields: dict) -> Any:
+        self.stats["requests"] += 1
+        if op == "did":
+            return await self.did()
+        if not fields.get("did"):
+            fields = {**fields, "did": await self.did()}
+        key = hashlib.sha256(json.dumps([op, fields], sort_keys=True).encode()).hexdigest()
+        if op == "verify" and key in self._verified:
+            self.stats["verify_cache_hits"] += 1
+            self._verified.move_to_end(key)
+            return self._verified[key]
+        future = self._pending.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+        else:
+            future = self._pending[key] = asyncio.get_running_loop().create_future()
+            self._queue.put_nowait((key, op, fields))
+        return await asyncio.shield(future)
+
+    async def did(self) -> Optional[str]:
+        if self._did is None or time.monotonic() - self._did_at > SIGN_SIDECAR_DID_TTL_SECONDS:
+            await self._bucket.acquire()
+            self.stats["node_calls"] += 1
+            resp = await self._client.get("/api/get-by-node")
+            resp.raise_for_status()
+            txns = resp.json().get("TxnCount") or []
+            self._did = txns[0].get("DID") if txns else None
+            self._did_at = time.monotonic()
+        return self._did
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            until = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), max(until - loop.time(), 0)))
+                except asyncio.TimeoutError:
+                    break
+            self.stats["batches"] += 1
+            # The next batch is collected while this one is in flight; the rate limit paces both.
+            for item in batch:
+                task = asyncio.create_task(self._execute(*item))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+
+    async def _execute(self, key: str, op: str, fields: dict) -> None:
+        future = self._pending[key]
+        try:
+            result = await (self._sign(fields) if op == "sign" else self._verify(fields))
+            # A failed check may only mean the node had not caught up yet; ask again next time.
+            if op == "verify" and result:
+                self._verified[key] = result
+                if len(self._verified) > VERIFY_CACHE_SIZE:
+                    self._verified.popitem(last=False)
+            future.set_result(result)
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            del self._pending[key]
+
+    async def _post(self, path: str, payload: dict) -> dict:
+        await self._bucket.acquire()
+        self.stats["node_calls"] += 1
+        try:
+            resp = await self._client.post(path, json=payload)
+            resp.raise_for_status()
+            return resp.json()
+        except httpx.HTTPError as e:
+            raise SidecarError(f"HTTP error during {path}: {e}") from e
+        except ValueError as e:
+            raise SidecarError(f"Invalid JSON in {path} response: {e}") from e
+
+    async def _sign(self, fields: dict) -> str:
+        # Same two-step flow as each agent's sign_api.sign_message.
+        data = await self._post("/api/sign", {"signer_did": fields["did"], "msg_to_sign": fields["msg"]})
+        if data.get("status") and isinstance(data.get("result"), str):
+            return data["result"]
+        if not data.get("status") or not isinstance(data.get("result"), dict):
+            raise SidecarError(f"Unexpected sign response: {data}")
+        sign_id = data["result"].get("id")
+        if sign_id is None:
+            raise SidecarError(f"Sign API returned no id/mode for password flow: {data['result']}")
+        data = await self._post("/api/signature-response",
+                                {"id": sign_id, "mode": 0, "password": fields["password"]})
+        if not data.get("status"):
+            raise SidecarError(f"Signature-response API returned error: {data.get('message', '<no message>')}")
+        signature = (data.get("result") or {}).get("signature")
+        if not signature:
+            raise SidecarError("Signature-response API succeeded but no `signature` in result")
+        return signature
+
+    async def _verify(self, fields: dict) -> bool:
+        await self._bucket.acquire()
+        self.stats["node_calls"] += 1
+        params = {"signer_did": fields["did"], "signed_msg": fields["msg"], "signature": fields["signature"]}
+        try:
+            resp = await self._client.get("/api/verify-signature", params=params)
+            resp.raise_for_status()
+            return bool(resp.json().get("status", False))
+        except httpx.HTTPError as e:
+            raise SidecarError(f"HTTP error during verify_signature: {e}") from e
+        except ValueError as e:
+            raise SidecarError(f"Invalid JSON in verify_signature response: {e}") from e
+
+
+class SigningSidecar:
+    """
+    The per-machine signing daemon: newline-delimited JSON requests
+    ({"id", "op": "sign" | "verify" | "did", "node", ...}) over a Unix
+    socket, answered as {"id", "ok", "result" | "error"}. Requests on one
+    connection are handled concurrently and may be answered out of order.
+    {"op": "stats"} returns each node's request, batch and node-call counts.
+    """
+
+    def __init__(self, path: str = SIGN_SIDECAR_SOCKET):
+        if not path:
+            raise ValueError("SIGN_SIDECAR_SOCKET is not set")
+        self.path = path
+        self.lanes: dict[str, NodeLane] = {}
+
+    async def serve(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        # The socket carries node passwords; only this user may connect. The umask makes
+        # it private from the moment it is bound, not only after the chmod.
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(
+                self._handle, path=self.path, limit=SIGN_SIDECAR_MAX_REQUEST_BYTES
+            )
+        finally:
+            os.umask(umask)
+        os.chmod(self.path, 0o600)
+        logger.info(f"Signing sidecar listening on {self.path}")
+        async with server:
+            await server.serve_forever()
+
+    def lane(self, node: str) -> NodeLane:
+        lane = self.lanes.get(node)
+        if lane is None:
+            lane = self.lanes[node] = NodeLane(node)
+        return lane
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        write_lock = asyncio.Lock()
+        tasks: set[asyncio.Task] = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    line = e.partial
+                except asyncio.LimitOverrunError:
+                    await self._skip_line(reader)
+                    await self._reply(writer, write_lock, {
+                        "id": None, "ok": False,
+                        "error": f"Request is longer than {SIGN_SIDECAR_MAX_REQUEST_BYTES} bytes",
+                    })
+                    continue
+                if not line:
+                    break
+                task = asyncio.create_task(self._answer(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except asyncio.IncompleteReadError:
+            pass  # The client went away in the middle of an over-long line.
+        finally:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def _answer(self, line: bytes, writer: asyncio.StreamWriter, write_lock: asyncio.Lock) -> None:
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.pop("id", None)
+            op = request.pop("op")
+            if op == "stats":
+                result = {node: lane.stats for node, lane in self.lanes.items()}
+            elif op in ("sign", "verify", "did"):
+                result = await self.lane(request.pop("node")).submit(op, request)
+            else:
+                raise SidecarError(f"Unknown op {op!r}")
+            response = {"id": request_id, "ok": True, "result": result}
+        except Exception as e:
+            response = {"id": request_id, "ok": False, "error": str(e) or type(e).__name__}
+        await self._reply(writer, write_lock, response)
+
+    @staticmethod
+    async def _skip_line(reader: asyncio.StreamReader) -> None:
+        """Drops the rest of an over-long line without buffering it."""
+        while True:
+            try:
+                await reader.readuntil(b"\n")
+                return
+            except asyncio.LimitOverrunError as e:
+                await reader.readexactly(e.consumed)
+
+    @staticmethod
+    async def _reply(writer: asyncio.StreamWriter, write_lock: asyncio.Lock, response: dict) -> None:
+        async with write_lock:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+
+def main() -> None:
+    from utils.structured_log import configure_logging
+    configure_logging("sign-sidecar")
+    asyncio.run(SigningSidecar().serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+from __future__ import annotations
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+from utils.tracing import current_span
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # "text" or "json"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "500"))
+
+_listener: Optional[QueueListener] = None
+_handler: Optional["DroppingQueueHandler"] = None
+_service = ""
+
+
+def truncate(value: Any, limit: int = LOG_MAX_FIELD_CHARS) -> Any:
+    """Shortens long strings and serializes containers so one field never floods the log."""
+    if isinstance(value, (dict, list, tuple)):
+        value = json.dumps(value, default=str, ensure_ascii=False, sort_keys=True)
+    elif not isinstance(value, (str, int, float, bool, type(None))):
+        value = str(value)
+    if isinstance(value, str) and len(value) > limit:
+        return f"{value[:limit]}…(+{len(value) - limit} chars)"
+    return value
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without blocking: nothing is
+    formatted or serialized here, and a full queue drops the record
+    (counted in `dropped`) instead of making the caller wait.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Tie the record to the trace it was logged in; the listener thread has no span.
+        span = current_span()
+        if span is not None:
+            record.trace_id = span.trace_id
+        # Resolve the exception text now, while the traceback is still meaningful.
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats on the listener thread: one JSON object per line, or `key=value` text."""
+
+    def __init__(self, fmt: str = LOG_FORMAT):
+        super().__init__()
+        self.fmt = fmt
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {k: truncate(v) for k, v in getattr(record, "fields", {}).items()}
+        message = truncate(record.getMessage(), LOG_MAX_FIELD_CHARS * 4)
+        trace_id = getattr(record, "trace_id", None)
+        if self.fmt == "json":
+            entry = {
+                "ts": round(record.created, 3),
+                "level": record.levelname,
+                "service": _service,
+                "logger": record.name,
+                "msg": message,
+                **fields,
+            }
+            if trace_id:
+                entry["trace_id"] = trace_id
+            if record.exc_text:
+                entry["exc"] = record.exc_text
+            return json.dumps(entry, default=str, ensure_ascii=False)
+
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        extra = " ".join(f"{k}={v}" for k, v in fields.items())
+        line = f"{stamp} {record.levelname:<7} {record.name}: {message}" + (f" {extra}" if extra else "")
+        if trace_id:
+            line += f" trace_id={trace_id}"
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+def configure_logging(service: str, level: str = LOG_LEVEL) -> None:
+    """
+    Routes all stdlib logging through a bounded queue to one listener
+    thread that formats and writes to stderr, so request handlers never
+    block on terminal or pipe I/O. Replaces handlers installed earlier
+    (e.g. by `logging.basicConfig`). Safe to call more than once.
+    """
+    global _listener, _handler, _service
+    _service = service
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _handler is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(StructuredFormatter())
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    _handler = DroppingQueueHandler(log_queue)
+    root.addHandler(_handler)
+    _listener = QueueListener(log_queue, stream, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+    if hasattr(os, "register_at_fork"):
+        # Each prefork worker gets its own listener (see utils.prefork).
+        os.register_at_fork(after_in_child=_restart_listener)
+
+
+def is_configured() -> bool:
+    return _handler is not None
+
+
+def _restart_listener() -> None:
+    global _listener
+    if _listener is None or _handler is None:
+        return
+    # The inherited queue's lock may have been held by a parent thread at fork time,
+    # and it can hold records the parent still writes; the child starts on its own.
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def log_event(logger: logging.Logger, level: int, event: str, sample: float = 1.0, **fields: Any) -> None:
+    """
+    Logs `event` with structured `fields`. Costs one level check when the
+    level is off, and `sample` < 1 keeps only that fraction of records for
+    chatty events. Fields are truncated and serialized on the listener
+    thread, not here, so pass payloads as they are.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if sample < 1.0 and random.random() >= sample:
+        return
+    logger.log(level, event, extra={"fields": fields}, stacklevel=2)
@@ -0,0 +1,227 @@
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+import asyncio
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from typing import Optional, Union
+
+from a2a.server.tasks import TaskStore
+from a2a.types import Task, TaskState
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = {
+    TaskState.completed,
+    TaskState.canceled,
+    TaskState.failed,
+    TaskState.rejected,
+}
+
+
+class TieredTaskStore(TaskStore):
+    """
+    A TaskStore with a bounded in-memory LRU (hot tier) in front of a
+    zlib-compressed SQLite table (cold tier).
+
+    Tasks leave the hot tier when it grows past `max_hot` entries, or once
+    they reach a terminal state and have not been touched for `ttl_seconds`.
+    Evicted tasks are spilled to SQLite, so `get(task_id)` still finds them.
+    Cold rows older than `retention_seconds` are purged.
+
+    With `write_through` every save is also written to SQLite, so when a
+    server runs several worker processes on the same file, `tasks/get`
+    finds a task whichever worker it lands on. Another worker may still
+    move a live task along, so in that mode only terminal tasks (which no
+    longer change) are cached in the hot tier; the rest are always read
+    from SQLite.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike] = ":memory:",
+        max_hot: int = 1000,
+        ttl_seconds: float = 900.0,
+        retention_seconds: float = 7 * 24 * 3600.0,
+        sweep_interval: float = 30.0,
+        write_through: bool = False,
+    ):
+        if max_hot <= 0:
+            raise ValueError("max_hot must be positive")
+        self.max_hot = max_hot
+        self.ttl_seconds = ttl_seconds
+        self.retention_seconds = retention_seconds
+        self.sweep_interval = sweep_interval
+        self.write_through = write_through
+        self.path = str(path)
+
+        self._hot: OrderedDict[str, tuple[float, Task]] = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._last_sweep = time.monotonic()
+        self._stats = {
+            "hot_hits": 0,
+            "cold_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "spilled_bytes": 0,
+            "purged": 0,
+        }
+
+        self._open()
+        if hasattr(os, "register_at_fork"):
+            # A SQLite connection must not be shared across fork(); children reopen it.
+            os.register_at_fork(after_in_child=self._open)
+
+    def _open(self) -> None:
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " id TEXT PRIMARY KEY,"
+            " state TEXT NOT NULL,"
+            " updated REAL NOT NULL,"
+            " body BLOB NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS tasks_updated ON tasks(updated)")
+        self._db.commit()
+
+    @classmethod
+    def from_env(cls, name: str) -> "TieredTaskStore":
+        """
+        Builds a store from TASK_STORE_PATH / TASK_STORE_MAX_HOT /
+        TASK_STORE_TTL_SECONDS / TASK_STORE_RETENTION_SECONDS /
+        TASK_STORE_WRITE_THROUGH. The cold tier defaults to a per-agent file
+        in the system temp directory; write-through defaults to on when
+        AGENT_WORKERS asks for more than one process.
+        """
+        default_path = Path(tempfile.gettempdir()) / f"a2a_tasks_{name}.sqlite3"
+        multi_worker = int(os.getenv("AGENT_WORKERS", "1")) > 1
+        write_through = os.getenv("TASK_STORE_WRITE_THROUGH", str(multi_worker)).lower() == "true"
+        return cls(
+            path=os.getenv("TASK_STORE_PATH") or default_path,
+            max_hot=int(os.getenv("TASK_STORE_MAX_HOT", "1000")),
+            ttl_seconds=float(os.getenv("TASK_STORE_TTL_SECONDS", "900")),
+            retention_seconds=float(os.getenv("TASK_STORE_RETENTION_SECONDS", str(7 * 24 * 3600))),
+            write_through=write_through,
+        )
+
+    # ---- TaskStore interface --------------------------------------------
+
+    async def save(self, task: Task) -> None:
+        async with self._lock:
+            if self._cacheable(task):
+                self._hot[task.id] = (time.monotonic(), task)
+                self._hot.move_to_end(task.id)
+            else:
+                self._hot.pop(task.id, None)
+            spill = self._collect_evictions()
+        if self.write_through:
+            spill.append(task)
+        if spill:
+            await asyncio.to_thread(self._spill, spill)
+
+    async def get(self, task_id: str) -> Optional[Task]:
+        async with self._lock:
+            entry = self._hot.get(task_id)
+            if entry is not None:
+                self._hot[task_id] = (time.monotonic(), entry[1])
+                self._hot.move_to_end(task_id)
+                self._stats["hot_hits"] += 1
+                return entry[1]
+
+        task = await asyncio.to_thread(self._load, task_id)
+        async with self._lock:
+            if task is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["cold_hits"] += 1
+            # Tasks that can still progress come back into the hot tier. With
+            # write-through another worker may be progressing them, so there
+            # it is the finished ones that are cached instead.
+            spill = []
+            terminal = task.status.state in TERMINAL_STATES
+            if terminal if self.write_through else not terminal:
+                self._hot[task.id] = (time.monotonic(), task)
+                spill = self._collect_evictions()
+        if spill:
+            await asyncio.to_thread(self._spill, spill)
+        return task
+
+    async def delete(self, task_id: str) -> None:
+        async with self._lock:
+            self._hot.pop(task_id, None)
+        await asyncio.to_thread(self._delete, task_id)
+
+    # ---- metrics --------------------------------------------------------
+
+    def metrics(self) -> dict[str, int]:
+        """Returns tier sizes and hit/eviction counters."""
+        with self._db_lock:
+            cold_size = self._db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+        return {"hot_size": len(self._hot), "cold_size": cold_size, **self._stats}
+
+    # ---- internals ------------------------------------------------------
+
+    def _cacheable(self, task: Task) -> bool:
+        return not self.write_through or task.status.state in TERMINAL_STATES
+
+    def _collect_evictions(self) -> list[Task]:
+        """Pops LRU overflow and expired terminal tasks. Caller holds _lock."""
+        spill: list[Task] = []
+        while len(self._hot) > self.max_hot:
+            _, (_, task) = self._hot.popitem(last=False)
+            spill.append(task)
+            self._stats["evictions"] += 1
+
+        now = time.monotonic()
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            cutoff = now - self.ttl_seconds
+            expired = []
+            for task_id, (touched, task) in self._hot.items():
+                if touched > cutoff:
+                    break
+                if task.status.state in TERMINAL_STATES:
+                    expired.append(task_id)
+            for task_id in expired:
+                spill.append(self._hot.pop(task_id)[1])
+                self._stats["expirations"] += 1
+        return spill
+
+    def _spill(self, tasks: list[Task]) -> None:
+        now = time.time()
+        rows = []
+        for task in tasks:
+            body = zlib.compress(task.model_dump_json(exclude_none=True).encode("utf-8"))
+            self._stats["spilled_bytes"] += len(body)
+            rows.append((task.id, task.status.state.value, now, body))
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO tasks(id, state, updated, body) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            purged = self._db.execute(
+                "DELETE FROM tasks WHERE updated < ?", (now - self.retention_seconds,)
+            ).rowcount
+            self._db.commit()
+        self._stats["purged"] += max(purged, 0)
+        logger.debug("Spilled %d task(s) to cold tier", len(rows))
+
+    def _load(self, task_id: str) -> Optional[Task]:
+        with self._db_lock:
+            row = self._db.execute("SELECT body FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None:
+            return None
+        return Task.model_validate_json(zlib.decompress(row[0]))
+
+    def _delete(self, task_id: str) -> None:
+        with self._db_lock:
+            self._db.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            self._db.commit()
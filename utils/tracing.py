@@ -0,0 +1,314 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Message metadata key carrying the W3C trace context (https://www.w3.org/TR/trace-context/).
+TRACEPARENT_METADATA_KEY = "traceparent"
+
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "")
+
+
+class Span:
+    """One timed operation. Ended spans are handed to the exporter."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "sampled", "attributes",
+                 "start_ns", "end_ns", "status", "_exporter")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 attributes: dict[str, Any], exporter: Optional["FileExporter"]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status: Optional[str] = None
+        self._exporter = exporter
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        for listener in _listeners:
+            try:
+                listener(self)
+            except Exception as e:
+                logger.warning(f"Span listener failed: {e}")
+        if self.sampled and self._exporter is not None:
+            self._exporter.export(self)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_listeners: list = []
+
+
+def add_span_listener(listener) -> None:
+    """Calls `listener(span)` for every ended span, sampled or not (e.g. for latency metrics)."""
+    _listeners.append(listener)
+
+
+class FileExporter:
+    """
+    Writes ended spans from a background thread, one OTLP/JSON
+    `ExportTraceServiceRequest` per line, so the request path never waits on
+    disk. Any OTLP-aware tool (or `python -m utils.tracing`) can read it.
+    """
+
+    def __init__(self, path: str, service_name: str, max_queue: int = 10000):
+        self.path = path
+        self.service_name = service_name
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._start()
+        if hasattr(os, "register_at_fork"):
+            # Each prefork worker exports through its own thread (see utils.prefork).
+            os.register_at_fork(after_in_child=self._start)
+
+    def _start(self) -> None:
+        self._queue: queue.Queue[Span] = queue.Queue(maxsize=self.max_queue)
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            spans = [self._queue.get()]
+            while len(spans) < 512:
+                try:
+                    spans.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(self._otlp(s)) + "\n" for s in spans))
+            except OSError as e:
+                logger.warning(f"Could not write {len(spans)} spans to {self.path}: {e}")
+
+    def _otlp(self, span: Span) -> dict[str, Any]:
+        record: dict[str, Any] = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": k, "value": {"stringValue": str(v)}} for k, v in span.attributes.items()],
+            "status": {"code": 2, "message": span.status} if span.status else {"code": 1},
+        }
+        if span.parent_id:
+            record["parentSpanId"] = span.parent_id
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "a2a"}, "spans": [record]}],
+        }]}
+
+
+class Tracer:
+    """
+    Minimal span tracer with W3C trace context propagation.
+
+    Tracing is off (spans cost one object and no I/O) unless TRACE_FILE is
+    set. A new trace is sampled with TRACE_SAMPLE_RATE; a trace continued
+    from a caller's `traceparent` keeps the caller's sampling decision, so a
+    request is traced end to end across the host and every friend or not
+    at all.
+    """
+
+    def __init__(self, service_name: str = "", path: str = TRACE_FILE, sample_rate: float = TRACE_SAMPLE_RATE):
+        self.service_name = service_name or os.path.basename(sys.argv[0]) or "a2a"
+        self.sample_rate = sample_rate
+        self.exporter = FileExporter(path, self.service_name) if path else None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, parent: Optional[str] = None, **attributes: Any) -> Span:
+        """Starts a span under `parent` (a traceparent), the current span, or a new trace."""
+        current = _current.get()
+        remote = _parse_traceparent(parent) if parent else None
+        if remote is not None:
+            trace_id, parent_id, sampled = remote
+        elif current is not None:
+            trace_id, parent_id, sampled = current.trace_id, current.span_id, current.sampled
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = self.enabled and random.random() < self.sample_rate
+        return Span(name, trace_id, parent_id, sampled and self.enabled, attributes, self.exporter)
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+        """Runs the block inside a new span, which is current for its duration."""
+        span = self.start_span(name, parent, **attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            reset_current_span(token)
+            span.end()
+
+
+tracer = Tracer(SERVICE_NAME)
+
+
+def configure(service_name: str) -> Tracer:
+    """Names this process in the trace output (unless TRACE_SERVICE_NAME is set); call from main()."""
+    if not SERVICE_NAME:
+        tracer.service_name = service_name
+        if tracer.exporter is not None:
+            tracer.exporter.service_name = service_name
+    return tracer
+
+
+def span(name: str, parent: Optional[str] = None, **attributes: Any):
+    return tracer.span(name, parent, **attributes)
+
+
+def traced(name: str):
+    """Decorator running a sync or async function inside a span."""
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def set_current_span(span: Span) -> Token:
+    """Makes `span` current until `reset_current_span(token)`; for spans opened and closed by callbacks."""
+    return _current.set(span)
+
+
+def reset_current_span(token: Token) -> None:
+    reset_var(_current, token)
+
+
+def reset_var(var: ContextVar, token: Token) -> None:
+    """
+    `var.reset(token)`, except when the block that set it is closed from
+    another context (e.g. an abandoned async generator finalised by the
+    event loop); the value dies with its own context then.
+    """
+    try:
+        var.reset(token)
+    except ValueError:
+        pass
+
+
+def trace_metadata() -> dict[str, str]:
+    """Message metadata that continues the current trace on the receiving agent."""
+    current = _current.get()
+    return {TRACEPARENT_METADATA_KEY: current.traceparent} if current is not None else {}
+
+
+def traceparent_from_metadata(metadata: Optional[dict[str, Any]]) -> Optional[str]:
+    value = (metadata or {}).get(TRACEPARENT_METADATA_KEY)
+    return value if isinstance(value, str) else None
+
+
+def _parse_traceparent(value: str) -> Optional[tuple[str, str, bool]]:
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+def waterfall(path: str, trace_id: Optional[str] = None) -> str:
+    """Renders one trace from a TRACE_FILE (the latest, by default) as an indented waterfall."""
+    spans: dict[str, list[dict]] = {}
+    order: list[str] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            request = json.loads(line)
+            for resource in request["resourceSpans"]:
+                service = next((a["value"]["stringValue"] for a in resource["resource"]["attributes"]
+                                if a["key"] == "service.name"), "?")
+                for scope in resource["scopeSpans"]:
+                    for s in scope["spans"]:
+                        s["service"] = service
+                        if s["traceId"] not in spans:
+                            order.append(s["traceId"])
+                        spans.setdefault(s["traceId"], []).append(s)
+    if not order:
+        return "No spans recorded."
+    trace = spans.get(trace_id or order[-1], [])
+    if not trace:
+        return f"Trace {trace_id} not found."
+
+    start = min(int(s["startTimeUnixNano"]) for s in trace)
+    ids = {s["spanId"] for s in trace}
+    children: dict[Optional[str], list[dict]] = {}
+    for s in trace:
+        parent = s.get("parentSpanId") if s.get("parentSpanId") in ids else None
+        children.setdefault(parent, []).append(s)
+
+    lines = [f"trace {trace[0]['traceId']}"]
+
+    def walk(parent: Optional[str], depth: int) -> None:
+        for s in sorted(children.get(parent, []), key=lambda s: int(s["startTimeUnixNano"])):
+            begin = (int(s["startTimeUnixNano"]) - start) / 1e6
+            took = (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6
+            error = f"  !! {s['status']['message']}" if s["status"].get("code") == 2 else ""
+            lines.append(f"{begin:9.1f}ms {took:9.1f}ms  {'  ' * depth}{s['name']} [{s['service']}]{error}")
+            walk(s["spanId"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python -m utils.tracing TRACE_FILE [trace_id]")
+        sys.exit(2)
+    print(waterfall(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None))